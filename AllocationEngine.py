@@ -0,0 +1,332 @@
+"""
+AllocationEngine - Motores de alocação dos coristas influentes nas vozes de um lado (F/M)
+Responsabilidades:
+- Distribuir os coristas "influentes" (com vozes recomendadas) entre as vozes ativas
+- Otimizar, nesta ordem: cobertura das recomendadas, equilíbrio dos naipes e utilidades
+- Oferecer motores intercambiáveis com o mesmo objetivo e o mesmo desempate
+
+Todos os motores recebem o problema já indexado:
+    allowed[i]     -> índices das vozes permitidas para o corista i (ordem agudo -> grave)
+    rec_fit[i]     -> máscara das vozes que são recomendadas E cabem para o corista i
+    utils[i][j]    -> tupla (label, spec, high_pref, low_pref) do corista i na voz j
+    k              -> número de vozes ativas do lado
+    required_mask  -> vozes em que existe algum recomendado possível (contam na cobertura)
+
+e devolvem choice[i] = índice da voz escolhida para o corista i.
+
+O argumento opcional `stats` (dict) recebe contadores do motor para o profiler.
+"""
+from collections import deque
+from functools import lru_cache
+import heapq
+
+
+def allocate_influents_dp(allowed, rec_fit, utils, k, required_mask, stats=None):
+    """
+    Programação dinâmica memoizada sobre (i, contagens, máscara de recomendadas).
+
+    É o motor original: exato, mas o espaço de estados cresce com o número de
+    influentes e de vozes. Mantido como referência para validar os demais motores.
+    """
+    n = len(allowed)
+    if n == 0:
+        return []
+
+    def imbalance(counts: tuple[int, ...]) -> int:
+        if k <= 1:
+            return 0
+        return max(counts) - min(counts)
+
+    @lru_cache(maxsize=None)
+    def dp(i: int, counts: tuple[int, ...], rec_mask: int):
+        if i == n:
+            cover = int((rec_mask & required_mask).bit_count())
+            imb = imbalance(counts)
+            # maximiza cover, depois minimiza imbalance, depois preferências
+            return (cover, -imb, 0, 0, 0, 0)
+
+        best = None
+        for j in allowed[i]:
+            new_counts = list(counts)
+            new_counts[j] += 1
+            new_counts = tuple(new_counts)
+
+            new_mask = rec_mask
+            if (rec_fit[i] >> j) & 1:
+                new_mask |= (1 << j)
+
+            nxt = dp(i + 1, new_counts, new_mask)
+            if nxt is None:
+                continue
+
+            u = utils[i][j]
+            val = (nxt[0], nxt[1], nxt[2] + u[0], nxt[3] + u[1], nxt[4] + u[2], nxt[5] + u[3])
+            if best is None or val > best:
+                best = val
+        return best
+
+    # reconstrução
+    choice = []
+    counts = tuple([0] * k)
+    rec_mask = 0
+    for i in range(n):
+        best_choice = None
+        best_val = None
+        for j in allowed[i]:
+            new_counts = list(counts)
+            new_counts[j] += 1
+            new_counts = tuple(new_counts)
+
+            new_mask = rec_mask
+            if (rec_fit[i] >> j) & 1:
+                new_mask |= (1 << j)
+
+            nxt = dp(i + 1, new_counts, new_mask)
+            if nxt is None:
+                continue
+
+            u = utils[i][j]
+            val = (nxt[0], nxt[1], nxt[2] + u[0], nxt[3] + u[1], nxt[4] + u[2], nxt[5] + u[3])
+            if best_val is None or val > best_val:
+                best_val = val
+                best_choice = (j, new_counts, new_mask)
+
+        j, counts, rec_mask = best_choice
+        choice.append(j)
+
+    if stats is not None:
+        info = dp.cache_info()
+        stats["dp_states"] = stats.get("dp_states", 0) + info.currsize
+        stats["dp_cache_hits"] = stats.get("dp_cache_hits", 0) + info.hits
+    return choice
+
+
+def allocate_influents_flow(allowed, rec_fit, utils, k, required_mask, stats=None):
+    """
+    Fluxo de custo mínimo com o mesmo objetivo lexicográfico da DP.
+
+    - Cobertura: cada voz tem um nó "recomendado"; a primeira unidade que passa
+      por ele ganha um bônus que domina todo o resto.
+    - Equilíbrio: as contagens por voz ficam presas numa janela [lo, lo + d];
+      procura-se o menor d viável (podado pelas condições de Hall) e, dentro
+      dele, a melhor janela.
+    - Utilidades: somadas como um único inteiro em base mista, preservando a
+      ordem (label, spec, high_pref, low_pref).
+    - Desempate: um termo em base k reproduz a escolha da DP (primeira voz
+      possível na ordem, corista a corista).
+
+    Os caminhos aumentantes são calculados só sobre os nós de voz (2k + 1 nós),
+    com os remanejamentos de coristas mantidos em heaps, então o custo é
+    O(n · k² · log n) por janela em vez de exponencial. Os caminhos mínimos usam
+    fila (SPFA): só os nós cuja distância mudou são reexaminados.
+    """
+    n = len(allowed)
+    if n == 0:
+        return []
+    if k <= 1:
+        return [allowed[i][0] for i in range(n)]
+
+    # ---------- pesos exatos (inteiros do Python) ----------
+    spread = max(
+        sum(max(abs(utils[i][j][c]) for j in allowed[i]) for i in range(n))
+        for c in range(4)
+    )
+    base = 2 * spread + 1
+    tiebreak_span = k ** n
+
+    cost = []
+    for i in range(n):
+        digit = k ** (n - 1 - i)
+        row = {}
+        for j in allowed[i]:
+            label, spec, high_pref, low_pref = utils[i][j]
+            encoded = ((label * base + spec) * base + high_pref) * base + low_pref
+            row[j] = -encoded * tiebreak_span + j * digit
+        cost.append(row)
+
+    cover_bonus = 2 * base ** 4 * tiebreak_span
+    mandatory_bonus = (k + 2) * cover_bonus
+
+    # ---------- condições de Hall por subconjunto de vozes ----------
+    allowed_masks = []
+    for i in range(n):
+        m = 0
+        for j in allowed[i]:
+            m |= (1 << j)
+        allowed_masks.append(m)
+
+    full = (1 << k) - 1
+    forced = [0] * (1 << k)  # coristas cujas vozes permitidas estão contidas em A
+    for m in allowed_masks:
+        forced[m] += 1
+    for j in range(k):
+        bit = 1 << j
+        for A in range(1 << k):
+            if A & bit:
+                forced[A] += forced[A ^ bit]
+
+    def window_may_be_feasible(lo: int, hi: int) -> bool:
+        if k * lo > n or k * hi < n:
+            return False
+        for A in range(1, 1 << k):
+            size = A.bit_count()
+            if forced[A] > hi * size:
+                return False
+            if n - forced[full ^ A] < lo * size:
+                return False
+        return True
+
+    # ---------- fluxo de custo mínimo para uma janela [lo, hi] ----------
+    def node_of(i: int, j: int) -> int:
+        return k + j if (rec_fit[i] >> j) & 1 else j
+
+    def solve_window(lo: int, hi: int):
+        where = [-1] * n
+        at_node = [0] * (2 * k)
+        heaps = {}
+        moves_from = [set() for _ in range(2 * k)]  # nós y com heap (x, y) já criado
+        sink = 2 * k
+
+        def voice(x: int) -> int:
+            return x if x < k else x - k
+
+        def push_moves(i: int):
+            x = where[i]
+            jx = voice(x)
+            for j in allowed[i]:
+                if j == jx:
+                    continue
+                y = node_of(i, j)
+                heapq.heappush(heaps.setdefault((x, y), []), (cost[i][j] - cost[i][jx], i))
+                moves_from[x].add(y)
+
+        def best_move(x: int, y: int):
+            h = heaps.get((x, y))
+            while h and where[h[0][1]] != x:
+                heapq.heappop(h)
+            return h[0] if h else None
+
+        def arc_cost(x: int, y: int):
+            """Custo residual das arestas internas (sem coristas) entre nós de voz."""
+            if y == sink:
+                if x >= k:
+                    return None
+                count = at_node[x] + at_node[x + k]
+                if count < lo:
+                    return -mandatory_bonus
+                return 0 if count < hi else None
+            if x >= k and y == x - k:  # rec -> voz
+                return -cover_bonus if at_node[x] == 0 else 0
+            if x < k and y == x + k:  # voz -> rec (desfaz fluxo)
+                if at_node[y] >= 2:
+                    return 0
+                return cover_bonus if at_node[y] == 1 else None
+            return None
+
+        if stats is not None:
+            stats["flow_windows"] = stats.get("flow_windows", 0) + 1
+
+        total = 0
+        for new in range(n):
+            dist = [None] * (2 * k + 1)
+            pred = [None] * (2 * k + 1)
+            for j in allowed[new]:
+                y = node_of(new, j)
+                if dist[y] is None or cost[new][j] < dist[y]:
+                    dist[y] = cost[new][j]
+                    pred[y] = ('src', j)
+
+            # Bellman-Ford com fila sobre os nós de voz (grafo residual sem ciclos
+            # negativos); arestas internas: x -> sumidouro e x <-> nó "recomendado" da mesma voz
+            queue = deque(x for x in range(2 * k) if dist[x] is not None)
+            queued = [dist[x] is not None for x in range(2 * k)]
+            while queue:
+                x = queue.popleft()
+                queued[x] = False
+                edges = []
+                for y in (sink, x + k) if x < k else (x - k,):
+                    c = arc_cost(x, y)
+                    if c is not None:
+                        edges.append((y, c, ('arc', x)))
+                for y in moves_from[x]:
+                    mv = best_move(x, y)
+                    if mv is not None:
+                        edges.append((y, mv[0], ('move', x, mv[1])))
+                for y, c, kind in edges:
+                    nd = dist[x] + c
+                    if dist[y] is None or nd < dist[y]:
+                        dist[y] = nd
+                        pred[y] = kind
+                        if y != sink and not queued[y]:
+                            queued[y] = True
+                            queue.append(y)
+
+            if dist[sink] is None:
+                return None  # janela inviável: alguém ficou sem voz
+
+            # aplica o caminho aumentante
+            path = []
+            y = sink
+            while True:
+                p = pred[y]
+                path.append((p, y))
+                if p[0] == 'src':
+                    break
+                y = p[1]
+            total += dist[sink]
+
+            for p, y in reversed(path):
+                if p[0] == 'src':
+                    where[new] = y
+                    at_node[y] += 1
+                    push_moves(new)
+                elif p[0] == 'move':
+                    i = p[2]
+                    at_node[where[i]] -= 1
+                    where[i] = y
+                    at_node[y] += 1
+                    push_moves(i)
+
+        if stats is not None:
+            stats["flow_augmentations"] = stats.get("flow_augmentations", 0) + n
+        counts = [at_node[j] + at_node[j + k] for j in range(k)]
+        mandatory = sum(min(lo, c) for c in counts)
+        cover = sum(1 for j in range(k) if at_node[j + k] > 0 and (required_mask >> j) & 1)
+        utility_cost = total + mandatory * mandatory_bonus + \
+            sum(cover_bonus for j in range(k) if at_node[j + k] > 0)
+        choice = [voice(where[i]) for i in range(n)]
+        return choice, counts, mandatory, cover, utility_cost
+
+    # 1) Cobertura máxima (sem restringir o equilíbrio)
+    free = solve_window(0, n)
+    _, free_counts, _, max_cover, _ = free
+    free_imbalance = max(free_counts) - min(free_counts)
+
+    # 2) Menor desequilíbrio que mantém a cobertura máxima; 3) melhor utilidade nele
+    d = 0 if n % k == 0 else 1
+    while d <= free_imbalance:
+        best = None
+        for lo in range(max(0, -(-n // k) - d), n // k + 1):
+            hi = lo + d
+            if not window_may_be_feasible(lo, hi):
+                continue
+            result = solve_window(lo, hi)
+            if result is None:
+                continue
+            choice, counts, mandatory, cover, utility_cost = result
+            if mandatory < k * lo or cover < max_cover:
+                continue
+            if best is None or utility_cost < best[0]:
+                best = (utility_cost, choice)
+        if best is not None:
+            return best[1]
+        d += 1
+
+    return free[0]
+
+
+# Motores disponíveis (AnalysisManager.allocation_engine escolhe qual usar)
+ALLOCATION_ENGINES = {
+    "fluxo": allocate_influents_flow,
+    "dp": allocate_influents_dp,
+}
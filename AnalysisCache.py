@@ -0,0 +1,150 @@
+"""
+AnalysisCache - Cache em disco dos resultados de análise de transposição
+Responsabilidades:
+- Guardar o dicionário analysis_all de cada combinação de parâmetros
+- Montar a chave a partir da música, do hash dos coristas e dos parâmetros da análise
+- Descartar as entradas menos usadas quando o limite de entradas é atingido (LRU)
+- Invalidar as entradas de um grupo quando os coristas são salvos
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from Constants import ANALYSIS_CACHE_DIR, ANALYSIS_CACHE_MAX_ENTRIES
+
+
+class AnalysisCache:
+    """
+    Cada entrada é um arquivo pickle no diretório do cache, com nome
+    "<hash do grupo>_<hash da chave>.pkl". A data de modificação do arquivo
+    marca o último uso, então o LRU sobrevive entre execuções sem índice extra.
+    """
+
+    SUFFIX = ".pkl"
+
+    def __init__(self,
+                 cache_dir=ANALYSIS_CACHE_DIR, max_entries=ANALYSIS_CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    @staticmethod
+    def _digest(value) -> str:
+        payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=list)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def make_key(self,
+                 grupo, music_name, roster_fingerprint, piece_ranges, solistas, confort,
+                 use_group_ranges, group_ranges=None, root=None, mode=None, search_mode="conforto") -> str:
+        """
+        Monta a chave (nome do arquivo) de uma análise.
+
+        Args:
+            grupo: Nome do grupo atual (prefixo usado na invalidação)
+            music_name: Nome da música analisada
+            roster_fingerprint: Hash dos coristas (CoristasManager.roster_fingerprint)
+            piece_ranges: Ranges da peça {voz: (min, max)}
+            solistas: Solistas {nome: (min, max)}
+            confort: Valor do slider de conforto
+            use_group_ranges: True se a análise usa os ranges do grupo
+            group_ranges: Ranges do grupo usados na análise (se houver)
+            root, mode: Tom e modo originais (definem a tonalidade sugerida)
+            search_mode: Modo de escolha do melhor T (AnalysisManager.SEARCH_MODES)
+
+        Returns:
+            str: Chave da entrada
+        """
+        params = {
+            "music": music_name,
+            "roster": roster_fingerprint,
+            "piece_ranges": piece_ranges or {},
+            "solistas": solistas or {},
+            "confort": float(confort),
+            "group_mode": bool(use_group_ranges),
+            "group_ranges": group_ranges or {},
+            "root": root,
+            "mode": mode,
+            "search": search_mode,
+        }
+        return f"{self._digest(grupo)[:12]}_{self._digest(params)}"
+
+    def _path(self,
+              key):
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        return [os.path.join(self.cache_dir, n) for n in names if n.endswith(self.SUFFIX)]
+
+    def get(self,
+            key):
+        """Retorna a análise guardada (uma cópia nova a cada leitura) ou None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            os.utime(path)  # marca como usada recentemente
+            return result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Erro ao ler cache de análise: {e}")
+            self._remove(path)
+            return None
+
+    def put(self,
+            key, analysis):
+        """Grava a análise (escrita atômica) e aplica o limite de entradas."""
+        tmp = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(analysis, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except Exception as e:
+            print(f"Erro ao gravar cache de análise: {e}")
+            if tmp:
+                self._remove(tmp)
+            return False
+
+        self._evict()
+        return True
+
+    def _evict(self):
+        entries = self._entries()
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+
+        def last_used(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+
+        for path in sorted(entries, key=last_used)[:excess]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def invalidate_group(self,
+                         grupo):
+        """Remove todas as entradas do grupo (coristas foram alterados)."""
+        prefix = self._digest(grupo)[:12] + "_"
+        for path in self._entries():
+            if os.path.basename(path).startswith(prefix):
+                self._remove(path)
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        for path in self._entries():
+            self._remove(path)
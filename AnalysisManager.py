@@ -8,17 +8,110 @@ Responsabilidades:
 - Processar ranges de vozes e grupos
 - Gerar dados para visualização
 """
-import librosa
+import numpy as np
 from Constants import VOICES, VOICE_BASE_RANGES, MALE_VOICES, FEMALE_VOICES, OCTAVE_SHIFTS
-from copy import deepcopy
 from GeneralFunctions import transpose_note, transpose_key
+from AllocationEngine import ALLOCATION_ENGINES
+from AnalysisCache import AnalysisCache
+from RangeModel import Formation, Roster, VoiceRange, parse_ranges, midi_to_note
+from Profiler import AnalysisProfiler, NULL_PROFILER
 from typing import Dict, Optional, Any
 from itertools import combinations
-from functools import lru_cache
+from collections import OrderedDict
 import math
 
 
+def comfort_scores(low, high, min_v, max_v, confort: float) -> np.ndarray:
+    """
+    Versão vetorizada do score de conforto (piece_range vs vocal_range).
+
+    Aceita arrays NumPy com broadcasting (ex: T × O × voz) e devolve um array
+    de scores com a mesma forma, com ponto ideal controlado por `confort`.
+
+    Interpretação:
+    - excess = (max_v - min_v) - (high - low)  # folga disponível para "posicionar" o trecho
+    - O início ideal (low ideal) fica em: min_v + confort * excess
+      * confort=0   => ideal no limite do grave (min_v)
+      * confort=1/2 => ideal no meio
+      * confort=1   => ideal no limite do agudo (min_v + excess)
+
+    Regras:
+    - Fora dos limites (low < min_v ou high > max_v): score negativo com penalidade 3x.
+    - Dentro dos limites:
+      * score máximo (=1) no ponto ideal.
+      * score decresce linearmente até 0 nas extremidades possíveis.
+      * A assimetria da penalidade é automática: o lado com mais margem penaliza menos.
+    """
+    if not (0.0 <= confort <= 1.0):
+        raise ValueError("confort must be between 0.0 and 1.0")
+
+    low, high, min_v, max_v = np.broadcast_arrays(low, high, min_v, max_v)
+
+    required_span = high - low
+    allowed_span = max_v - min_v
+    excess = allowed_span - required_span
+
+    left_margin = confort * excess
+    right_margin = (1.0 - confort) * excess
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Fora dos limites
+        below = np.maximum(0, min_v - low)
+        above = np.maximum(0, high - max_v)
+        ref = np.minimum(left_margin, right_margin)
+        ref = np.where(ref <= 0, excess, ref)  # confort == 0 ou 1
+        base_weight = np.where(excess > 0, 1.0 / ref, 1.0)
+        total_penalty = (below + above) * base_weight * 3.0
+        outside_score = -total_penalty
+
+        # Dentro dos limites
+        ideal_start = min_v + (confort * excess)
+        d = low - ideal_start  # <0: mais grave; >0: mais agudo
+        margin = np.where(d < 0, left_margin, right_margin)
+        inside_score = np.maximum(0.0, np.minimum(1.0, 1.0 - (np.abs(d) / margin)))
+        inside_score = np.where(margin <= 0, 0.0, inside_score)  # confort=0 ou 1
+        inside_score = np.where(d == 0, 1.0, inside_score)  # exatamente no ideal
+        inside_score = np.where(excess <= 0, 0.0, inside_score)  # sem folga
+
+    outside = (low < min_v) | (high > max_v)
+    return np.where(outside, outside_score, inside_score)
+
+
+def infer_sex(cdata: dict) -> str | None:
+    """Lado do corista na formação ("F"/"M"): pelo sexo informado ou, na falta dele, pelas vozes."""
+    sx = cdata.get("sexo") or cdata.get("gender")
+    if sx:
+        sx = str(sx).lower()
+        if sx.startswith("m"):
+            return "M"
+        if sx.startswith("f"):
+            return "F"
+
+    for k in ("voz_calculada", "voz_atribuida"):
+        v = cdata.get(k)
+        if v in FEMALE_VOICES:
+            return "F"
+        if v in MALE_VOICES:
+            return "M"
+
+    rec = cdata.get("vozes_recomendadas") or []
+    poss = cdata.get("vozes_possiveis") or []
+    any_voices = list(rec) + list(poss)
+    if any(v in FEMALE_VOICES for v in any_voices):
+        return "F"
+    if any(v in MALE_VOICES for v in any_voices):
+        return "M"
+    return None
+
+
 class AnalysisManager:
+    # Quantas combinações (coristas, ranges da peça) manter no cache de formações
+    FORMATION_CACHE_SIZE = 8
+    # Modos de escolha do melhor T: só pelo conforto, ou tom + formação juntos (search_joint_T)
+    SEARCH_MODES = ("conforto", "conjunta")
+    # Busca conjunta: cada corista fora da formação custa o mesmo que uma voz no ponto ideal
+    JOINT_NOT_FIT_WEIGHT = 1.0
+
     def __init__(self,coristas_mgr):
         self.coristas_mgr = coristas_mgr
         self.group_ranges = None
@@ -27,6 +120,32 @@ class AnalysisManager:
         self.analysis_all = {}
         self.current_piece_ranges = None
         self._use_group_ranges = False
+        self._formation_cache = OrderedDict()
+        self.allocation_engine = "fluxo"  # ver AllocationEngine.ALLOCATION_ENGINES
+        self.analysis_cache = AnalysisCache()
+        self.profiler = NULL_PROFILER  # ver enable_profiling
+        self.search_mode = "conforto"  # ver SEARCH_MODES
+        self.group_range_coverage = 1.0  # fração do naipe no range do grupo (1.0 = interseção)
+        coristas_mgr.add_change_listener(self.analysis_cache.invalidate_group)
+
+    def enable_profiling(self,
+                         enabled=True):
+        """
+        Liga/desliga a medição das etapas da análise.
+
+        Returns:
+            AnalysisProfiler ativo (ou None, se desligado)
+        """
+        if enabled:
+            if not self.profiler.enabled:
+                self.profiler = AnalysisProfiler()
+            return self.profiler
+        self.profiler = NULL_PROFILER
+        return None
+
+    def _base_ranges(self):
+        """Ranges base do grupo atual (os do grupo, se ele tiver, ou VOICE_BASE_RANGES)."""
+        return getattr(self.coristas_mgr, "base_ranges", None) or VOICE_BASE_RANGES
 
     def set_solistas(self,
                      solistas):
@@ -38,6 +157,41 @@ class AnalysisManager:
         """
         self.solistas = solistas
 
+    def set_search_mode(self,
+                        mode: str):
+        """
+        Define como o melhor T é escolhido.
+
+        Args:
+            mode: "conforto" (só pelos scores de conforto) ou "conjunta"
+                  (tom e formação juntos, ver search_joint_T)
+        """
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Modo de busca inválido: {mode!r}")
+        self.search_mode = mode
+
+    def set_group_range_coverage(self,
+                                 coverage: float):
+        """
+        Define a fração de cada naipe que o range do grupo deve cobrir.
+
+        1.0 é a interseção estrita (maior mínimo, menor máximo); 0.8 é o range
+        que 80% dos coristas da voz alcançam. Se os ranges do grupo estiverem
+        em uso, são recalculados na hora.
+
+        Returns:
+            Ranges do grupo atualizados, ou None se a análise usa os ranges base
+        """
+        if not 0 < coverage <= 1:
+            raise ValueError(f"Cobertura inválida: {coverage!r} (esperado entre 0 e 1)")
+        self.group_range_coverage = coverage
+        if self._use_group_ranges:
+            self.group_ranges, self.group_extension = self.coristas_mgr.get_voice_group_ranges(
+                solistas=self.solistas if self.solistas else None,
+                coverage=coverage
+            )
+        return self.group_ranges
+
     def toggle_range_mode(self
                           ):
         """
@@ -54,7 +208,8 @@ class AnalysisManager:
             if hasattr(self.coristas_mgr, "get_voice_group_ranges"):
                 self.group_ranges, self.group_extension = \
                     self.coristas_mgr.get_voice_group_ranges(
-                        solistas=self.solistas if self.solistas else None
+                        solistas=self.solistas if self.solistas else None,
+                        coverage=self.group_range_coverage
                     )
                 return 'grupo', self.group_ranges
             else:
@@ -69,7 +224,7 @@ class AnalysisManager:
             return 'base', None
 
     def run_analysis(self,
-                     piece_ranges, root, mode, viz_data, confort):
+                     piece_ranges, root, mode, viz_data, confort, music_name=None):
         """
         Executa análise completa de transposição.
 
@@ -77,6 +232,8 @@ class AnalysisManager:
             piece_ranges: Ranges da peça {voz: (min, max)}
             root: Tom original (ex: "C", "D#")
             mode: Modo da música ("maior" ou "menor")
+            music_name: Nome da música (opcional); quando informado, o resultado
+                é guardado/lido do cache em disco (AnalysisCache)
 
         Returns:
             Dicionário com resultados da análise
@@ -92,11 +249,33 @@ class AnalysisManager:
             piece_ranges = combined_ranges
 
         self.current_piece_ranges = piece_ranges
+        prof = self.profiler
+
+        cache_key = None
+        if music_name:
+            with prof.stage("analysis_cache_get"):
+                cache_key = self.analysis_cache.make_key(
+                    self.coristas_mgr.grupo, music_name, self.coristas_mgr.roster_fingerprint(),
+                    piece_ranges, self.solistas, confort, self._use_group_ranges,
+                    self.group_ranges if self.group_ranges is not None or self._base_ranges() is VOICE_BASE_RANGES
+                    else self._base_ranges(), root, mode, self.search_mode
+                )
+                cached = self.analysis_cache.get(cache_key)
+            if cached is not None:
+                prof.count("analysis_cache_hits")
+                self.analysis_all = cached
+                return True
+            prof.count("analysis_cache_misses")
 
         # Executa análise completa
-        self.analysis_all = self.analyze_ranges_with_penalty(
-            root, mode, self.current_piece_ranges, self.group_ranges, confort
-        )
+        with prof.stage("run_analysis"):
+            self.analysis_all = self.analyze_ranges_with_penalty(
+                root, mode, self.current_piece_ranges, self.group_ranges, confort
+            )
+
+        if cache_key:
+            with prof.stage("analysis_cache_put"):
+                self.analysis_cache.put(cache_key, self.analysis_all)
 
         return True
 
@@ -111,7 +290,7 @@ class AnalysisManager:
             group_ranges.keys())
 
         if group_ranges is None:
-            group_ranges = VOICE_BASE_RANGES
+            group_ranges = self._base_ranges()
 
         per_voice_Os: Dict[str, int] = {}
 
@@ -119,16 +298,10 @@ class AnalysisManager:
             if v not in piece_ranges or piece_ranges[v] == ('', ''):
                 continue
 
-            mn = librosa.note_to_midi(piece_ranges[v][0])
-            mx = librosa.note_to_midi(piece_ranges[v][1])
+            mn, mx = VoiceRange.from_notes(*piece_ranges[v])
 
             # Faixa da voz (grupo/base)
-            if v in group_ranges:
-                g_min = librosa.note_to_midi(group_ranges[v][0])
-                g_max = librosa.note_to_midi(group_ranges[v][1])
-            else:
-                g_min = librosa.note_to_midi(VOICE_BASE_RANGES[v][0])
-                g_max = librosa.note_to_midi(VOICE_BASE_RANGES[v][1])
+            g_min, g_max = VoiceRange.from_notes(*(group_ranges[v] if v in group_ranges else self._base_ranges()[v]))
 
             best_O = None
             best_pen = float('inf')
@@ -165,6 +338,12 @@ class AnalysisManager:
         if not piece_ranges:
             return {}
 
+        # Consulta a tabela da última análise quando os ranges são os analisados
+        if piece_ranges is self.current_piece_ranges:
+            Os = self.analysis_all.get("Os_by_T", {}).get(T)
+            if Os is not None:
+                return dict(Os)
+
         per_voice_Os = self.compute_per_voice_Os_for_T(T, piece_ranges, self.group_ranges)
         return per_voice_Os
 
@@ -198,6 +377,13 @@ class AnalysisManager:
         if per_voice_Os is None:
             per_voice_Os = self.compute_transposition_for_t(T, piece_ranges)
 
+        # Faixas já transpostas pela análise (válidas só para as mesmas oitavas)
+        table = {}
+        if piece_ranges is self.current_piece_ranges:
+            Os = self.analysis_all.get("Os_by_T", {}).get(T, {})
+            table = {v: rng for v, rng in self.analysis_all.get("transposed_by_T", {}).get(T, {}).items()
+                     if per_voice_Os.get(v, 0) == Os.get(v)}
+
         transposed = {}
         voices_to_check = self.group_ranges.keys() if self._use_group_ranges else VOICES
 
@@ -206,16 +392,15 @@ class AnalysisManager:
             if not mn or not mx:
                 continue
 
-            min_m = librosa.note_to_midi(mn)
-            max_m = librosa.note_to_midi(mx)
             O = per_voice_Os.get(v, 0)
-
-            min_final = int(min_m + T + 12 * O)
-            max_final = int(max_m + T + 12 * O)
+            if v in table:
+                min_final, max_final = table[v]
+            else:
+                min_final, max_final = VoiceRange.from_notes(mn, mx).shifted(T + 12 * O)
 
             transposed[v] = {
-                'min': librosa.midi_to_note(min_final),
-                'max': librosa.midi_to_note(max_final),
+                'min': midi_to_note(min_final),
+                'max': midi_to_note(max_final),
                 'O': O
             }
 
@@ -305,6 +490,7 @@ class AnalysisManager:
         Returns:
             dict com: group_ranges, group_extension, voice_scores
         """
+        self.ensure_formation(T)
 
         return {
             'group_ranges': self.group_ranges,
@@ -320,10 +506,89 @@ class AnalysisManager:
         """Retorna True se está usando ranges de grupo."""
         return self._use_group_ranges
 
+    def build_fit_masks(self,
+                        piece_ranges: Optional[Dict[str, tuple]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Pré-calcula, para cada corista, uma máscara de 12 bits por voz da peça.
+
+        O bit s fica ligado quando a voz, transposta s semitons, cabe em alguma
+        oitava do range do corista. Como o encaixe só depende de T mod 12,
+        a máscara vale para todas as transposições (T e T±12 são equivalentes).
+
+        Returns:
+            {nome: {voz: máscara}} (coristas sem range ficam de fora)
+        """
+        if piece_ranges is None:
+            piece_ranges = self.current_piece_ranges
+
+        music_midi = {v: tuple(vr.ordered()) for v, vr in parse_ranges(piece_ranges).items()}
+
+        roster = Roster.from_coristas(self.coristas_mgr.coristas)
+        fit_masks: Dict[str, Dict[str, int]] = {}
+        for name, p_min, p_max in zip(roster.names, roster.mins, roster.maxs):
+            masks = {}
+            for v, (m_min, m_max) in music_midi.items():
+                mask = 0
+                for shift in range(12):
+                    k_lo = math.ceil((p_min - m_min - shift) / 12.0)
+                    k_hi = math.floor((p_max - m_max - shift) / 12.0)
+                    if k_lo <= k_hi:
+                        mask |= (1 << shift)
+                masks[v] = mask
+            fit_masks[name] = masks
+
+        return fit_masks
+
+    def invalid_transpositions(self,
+                               piece_ranges: Dict[str, tuple],
+                               fit_masks: Dict[str, Dict[str, int]]) -> set:
+        """
+        T inválidos (-11..11) tirados só das máscaras de encaixe, sem alocar ninguém.
+
+        Mesmo critério de compute_formations (corista no best_fit e no not_fit):
+        quem tem vozes recomendadas entra forçado no best_fit do seu lado, então
+        o T é inválido se ele não cabe em nenhuma voz desse lado (ou não tem range).
+        Corista sem sexo definido vai para o lado em que cabe, se houver algum.
+        """
+        active = list(parse_ranges(piece_ranges))
+        female_active = [v for v in active if v in FEMALE_VOICES]
+        male_active = [v for v in active if v in MALE_VOICES]
+
+        bad = 0  # bit s: classe T mod 12 inválida
+        for name, cdata in self.coristas_mgr.coristas.items():
+            if not cdata.get("vozes_recomendadas"):
+                continue
+            masks = fit_masks.get(name)
+            sx = infer_sex(cdata)
+            if sx == "F":
+                side = female_active
+            elif sx == "M":
+                side = male_active
+            else:
+                # sem range, pick_side_for_unknown o deixa só no not_fit
+                side = female_active + male_active if masks is not None else []
+            if not side:
+                continue
+            if masks is None:
+                return set(range(-11, 12))
+            fits = 0
+            for v in side:
+                fits |= masks[v]
+            bad |= ~fits & 0xFFF
+        return {T for T in range(-11, 12) if (bad >> (T % 12)) & 1}
+
     def calculate_best_fit_voices(self,
-                                  T: int):
+                                  T: int, fit_masks: Optional[Dict[str, Dict[str, int]]] = None):
         coristas: dict = self.coristas_mgr.coristas
         piece_range: dict = self.current_piece_ranges
+        prof = self.profiler
+
+        if fit_masks is None:
+            fit_masks = self.build_fit_masks(piece_range)
+        shift = int(T) % 12
+
+        roster = Roster.from_coristas(coristas)
+        piece_midi = parse_ranges(piece_range)
 
         female_order = ["Soprano", "Mezzo-soprano", "Contralto"]  # agudo -> grave
         male_order = ["Tenor", "Barítono", "Baixo"]  # agudo -> grave
@@ -331,53 +596,19 @@ class AnalysisManager:
         # ----------------------------
         # Helpers
         # ----------------------------
-        def infer_sex(cdata: dict) -> str | None:
-            sx = cdata.get("sexo") or cdata.get("gender")
-            if sx:
-                sx = str(sx).lower()
-                if sx.startswith("m"):
-                    return "M"
-                if sx.startswith("f"):
-                    return "F"
-
-            for k in ("voz_calculada", "voz_atribuida"):
-                v = cdata.get(k)
-                if v in FEMALE_VOICES:
-                    return "F"
-                if v in MALE_VOICES:
-                    return "M"
-
-            rec = cdata.get("vozes_recomendadas") or []
-            poss = cdata.get("vozes_possiveis") or []
-            any_voices = list(rec) + list(poss)
-            if any(v in FEMALE_VOICES for v in any_voices):
-                return "F"
-            if any(v in MALE_VOICES for v in any_voices):
-                return "M"
-            return None
-
         def person_range_midi(name: str) -> tuple[int, int] | None:
-            c = coristas[name]
-            rmin = c.get("range_min") or ""
-            rmax = c.get("range_max") or ""
-            if not rmin or not rmax:
-                return None
-            p_min = int(librosa.note_to_midi(rmin))
-            p_max = int(librosa.note_to_midi(rmax))
-            return (p_min, p_max) if p_min <= p_max else (p_max, p_min)
+            vr = roster.range_of(name)
+            return tuple(vr) if vr is not None else None
 
         def voice_range_midi_transposed(v: str) -> tuple[int, int] | None:
-            r = piece_range.get(v)
-            if not r or r == ("", "") or not r[0] or not r[1]:
+            vr = piece_midi.get(v)
+            if vr is None:
                 return None
-            mn = int(librosa.note_to_midi(r[0])) + int(T)
-            mx = int(librosa.note_to_midi(r[1])) + int(T)
-            return (mn, mx) if mn <= mx else (mx, mn)
+            return tuple(vr.shifted(int(T)).ordered())
 
-        def fits_in_some_octave(p_min: int, p_max: int, m_min: int, m_max: int) -> bool:
-            k_lo = math.ceil((p_min - m_min) / 12.0)
-            k_hi = math.floor((p_max - m_max) / 12.0)
-            return k_lo <= k_hi
+        def fits_in_some_octave(name: str, v: str) -> bool:
+            # consulta a máscara pré-calculada (depende só de T mod 12)
+            return bool((fit_masks[name][v] >> shift) & 1)
 
         def best_intersection_len(p_min: int, p_max: int, m_min: int, m_max: int) -> int:
             # para not_fit no possible_fit: maximiza quantos semitons do requerido ele cobre
@@ -404,7 +635,7 @@ class AnalysisManager:
                 best = float("inf")
                 for v in voices:
                     m_min, m_max = music_midi[v]
-                    if fits_in_some_octave(p_min, p_max, m_min, m_max):
+                    if fits_in_some_octave(name, v):
                         return 0.0
                     inter = best_intersection_len(p_min, p_max, m_min, m_max)
                     best = min(best, 10_000 - inter)
@@ -503,8 +734,7 @@ class AnalysisManager:
 
                 fit_voices = []
                 for v in voices_sorted:
-                    m_min, m_max = music_midi[v]
-                    if fits_in_some_octave(p_min, p_max, m_min, m_max):
+                    if fits_in_some_octave(nm, v):
                         fit_voices.append(v)
 
                 if not fit_voices:
@@ -542,7 +772,7 @@ class AnalysisManager:
             influents = [nm for nm, d in people.items() if not d["is_cafe"]]
             cafes = [nm for nm, d in people.items() if d["is_cafe"]]
 
-            # DP para influentes (sem caps fixos; minimiza desequilíbrio)
+            # Influentes: motor de alocação (sem caps fixos; minimiza desequilíbrio)
             n = len(influents)
             k = len(voices_sorted)
             if n > 0:
@@ -581,69 +811,32 @@ class AnalysisManager:
                     low_pref = low_weight * int(-p_min)
                     return (label, spec, high_pref, low_pref)
 
-                def imbalance(counts: tuple[int, ...]) -> int:
-                    if k <= 1:
-                        return 0
-                    return max(counts) - min(counts)
-
-                @lru_cache(maxsize=None)
-                def dp(i: int, counts: tuple[int, ...], rec_mask: int):
-                    if i == n:
-                        cover = int((rec_mask & required_mask).bit_count())
-                        imb = imbalance(counts)
-                        # maximiza cover, depois minimiza imbalance, depois preferências
-                        return (cover, -imb, 0, 0, 0, 0)
-
-                    nm = influents[i]
-                    best = None
-                    for v in people[nm]["allowed"]:
-                        j = voice_to_j[v]
-                        new_counts = list(counts)
-                        new_counts[j] += 1
-                        new_counts = tuple(new_counts)
-
-                        new_mask = rec_mask
-                        if (v in people[nm]["rec_set"]) and (v in people[nm]["fit_voices"]):
-                            new_mask |= (1 << j)
-
-                        nxt = dp(i + 1, new_counts, new_mask)
-                        if nxt is None:
-                            continue
-
-                        u = util(nm, v)
-                        val = (nxt[0], nxt[1], nxt[2] + u[0], nxt[3] + u[1], nxt[4] + u[2], nxt[5] + u[3])
-                        if best is None or val > best:
-                            best = val
-                    return best
-
-                # reconstrução
-                counts = tuple([0] * k)
-                rec_mask = 0
-                for i, nm in enumerate(influents):
-                    best_choice = None
-                    best_val = None
-                    for v in people[nm]["allowed"]:
-                        j = voice_to_j[v]
-                        new_counts = list(counts)
-                        new_counts[j] += 1
-                        new_counts = tuple(new_counts)
-
-                        new_mask = rec_mask
-                        if (v in people[nm]["rec_set"]) and (v in people[nm]["fit_voices"]):
-                            new_mask |= (1 << j)
-
-                        nxt = dp(i + 1, new_counts, new_mask)
-                        if nxt is None:
-                            continue
-
-                        u = util(nm, v)
-                        val = (nxt[0], nxt[1], nxt[2] + u[0], nxt[3] + u[1], nxt[4] + u[2], nxt[5] + u[3])
-                        if best_val is None or val > best_val:
-                            best_val = val
-                            best_choice = (v, new_counts, new_mask)
-
-                    v, counts, rec_mask = best_choice
-                    alloc[v].append(nm)
+                # problema indexado para o motor escolhido
+                allowed_js = []
+                rec_fit_masks = []
+                utils = []
+                for nm in influents:
+                    d = people[nm]
+                    allowed_js.append([voice_to_j[v] for v in d["allowed"]])
+                    rec_fit = 0
+                    for v in d["allowed"]:
+                        if (v in d["rec_set"]) and (v in d["fit_voices"]):
+                            rec_fit |= (1 << voice_to_j[v])
+                    rec_fit_masks.append(rec_fit)
+                    utils.append({voice_to_j[v]: util(nm, v) for v in d["allowed"]})
+
+                engine = ALLOCATION_ENGINES[self.allocation_engine]
+                prof.count("influents_allocated", len(influents))
+                with prof.stage("allocation"):
+                    if prof.enabled:
+                        stats = {}
+                        choice = engine(allowed_js, rec_fit_masks, utils, k, required_mask, stats=stats)
+                        for name, n in stats.items():
+                            prof.count(name, n)
+                    else:
+                        choice = engine(allowed_js, rec_fit_masks, utils, k, required_mask)
+                for nm, j in zip(influents, choice):
+                    alloc[voices_sorted[j]].append(nm)
 
             # cafés entram depois (não influenciam), balanceando por tamanho do grupo
             def cafe_sort_key(nm: str):
@@ -681,13 +874,11 @@ class AnalysisManager:
         # ----------------------------
         # 4) POSSIBLE_FIT: best_fit + (somente quem ainda não está alocado) vindo do not_fit
         # ----------------------------
-        possible_fit = deepcopy(best_fit)
+        possible_fit = {v: list(lst) for v, lst in best_fit.items()}
+        allocated = {nm for lst in best_fit.values() for nm in lst}
 
         def already_allocated(nm: str) -> bool:
-            for v in possible_fit.keys():
-                if nm in possible_fit[v]:
-                    return True
-            return False
+            return nm in allocated
 
         def add_not_fit_to_possible(nm: str, side_voices: list[str], voice_order: list[str]):
             if not side_voices:
@@ -699,6 +890,7 @@ class AnalysisManager:
             if pr is None:
                 chosen = min(side_voices, key=lambda v: (len(possible_fit[v]), order_idx.get(v, 10 ** 9)))
                 possible_fit[chosen].append(nm)
+                allocated.add(nm)
                 return
 
             p_min, p_max = pr
@@ -713,6 +905,7 @@ class AnalysisManager:
                     best_v = v
 
             possible_fit[best_v].append(nm)
+            allocated.add(nm)
 
         for nm in not_fit:
             if already_allocated(nm):
@@ -741,11 +934,176 @@ class AnalysisManager:
                         else:
                             add_not_fit_to_possible(nm, male_active, male_order)
 
+        # formações imutáveis: podem ser compartilhadas entre Ts sem cópia
+        best_fit = Formation(best_fit)
+        possible_fit = Formation(possible_fit)
+        not_fit = tuple(not_fit)
+
         self.best_fit = best_fit
         self.possible_fit = possible_fit
         self.not_fit = not_fit
         return best_fit, not_fit, possible_fit
 
+    def _formation_key(self,
+                       piece_ranges: Dict[str, tuple]) -> tuple:
+        """Chave do cache de formações: coristas do grupo + ranges da peça."""
+        roster_key = self.coristas_mgr.roster_fingerprint()
+        ranges_key = tuple((v, tuple(r)) for v, r in piece_ranges.items())
+        return roster_key, ranges_key
+
+    def compute_formations(self,
+                           piece_ranges: Dict[str, tuple], residues=None) -> Dict[str, Any]:
+        """
+        Etapa de formação da análise: aloca os coristas nas vozes para cada T.
+
+        Não depende de `confort`, então o resultado fica em cache (LRU) por
+        coristas + ranges da peça; mexer no slider de conforto só reexecuta a
+        etapa de pontuação.
+
+        Args:
+            piece_ranges: Ranges da peça {voz: (min, max)}
+            residues: Classes de T (T mod 12) a calcular; None = todas. As já
+                      calculadas vêm do cache, então a entrada pode ser completada aos poucos.
+
+        Returns:
+            dict com best_fit, possible_fit, not_fit (por T), invalid_Ts (todos
+            os T, já na criação da entrada) e residues (classes já calculadas)
+        """
+        prof = self.profiler
+        key = self._formation_key(piece_ranges)
+        formations = self._formation_cache.get(key)
+        if formations is None:
+            formations = {
+                "best_fit": {},
+                "possible_fit": {},
+                "not_fit": {},
+                "invalid_Ts": set(),
+                "residues": set(),
+                "fit_masks": None,
+            }
+            self._formation_cache[key] = formations
+            while len(self._formation_cache) > self.FORMATION_CACHE_SIZE:
+                self._formation_cache.popitem(last=False)
+        else:
+            self._formation_cache.move_to_end(key)
+
+        # máscaras e T inválidos valem para todas as classes: o ranking e a busca
+        # conjunta usam invalid_Ts sem precisar alocar cada T
+        if formations["fit_masks"] is None:
+            with prof.stage("fit_masks"):
+                formations["fit_masks"] = self.build_fit_masks(piece_ranges)
+                formations["invalid_Ts"].update(
+                    self.invalid_transpositions(piece_ranges, formations["fit_masks"]))
+        fit_masks = formations["fit_masks"]
+
+        wanted = range(12) if residues is None else residues
+        missing = [r for r in wanted if r not in formations["residues"]]
+        if not missing:
+            prof.count("formation_cache_hits")
+            return formations
+        prof.count("formation_cache_misses")
+
+        # garante que calculate_best_fit_voices use estes ranges
+        self.current_piece_ranges = piece_ranges
+
+        best_fit_by_T: Dict[int, Formation] = formations["best_fit"]
+        possible_fit_by_T: Dict[int, Formation] = formations["possible_fit"]
+        not_fit_by_T: Dict[int, tuple] = formations["not_fit"]
+        invalid_Ts = formations["invalid_Ts"]
+
+        # T e T±12 geram a mesma formação: calcula uma vez por classe (T mod 12).
+        # As formações são imutáveis; as iguais entre classes viram uma só instância.
+        shared = {}
+        for by_T in (best_fit_by_T, possible_fit_by_T, not_fit_by_T):
+            for f in by_T.values():
+                shared.setdefault(f, f)
+
+        for residue in missing:
+            Ts = [T for T in range(-11, 12) if T % 12 == residue]
+            prof.count("formation_residues")
+            with prof.stage("best_fit_voices"):
+                bf, nf, pf = self.calculate_best_fit_voices(Ts[0], fit_masks)
+
+            # invalidez: alguém está em best_fit e também em not_fit
+            invalid = not bf.names().isdisjoint(nf)
+
+            bf, pf, nf = shared.setdefault(bf, bf), shared.setdefault(pf, pf), shared.setdefault(nf, nf)
+            for T in Ts:
+                best_fit_by_T[T] = bf
+                possible_fit_by_T[T] = pf
+                not_fit_by_T[T] = nf
+                if invalid:
+                    invalid_Ts.add(T)
+            formations["residues"].add(residue)
+
+        return formations
+
+    def search_joint_T(self,
+                       piece_ranges: Dict[str, tuple], t_scores: Dict[int, float],
+                       t_has_neg: Dict[int, bool]):
+        """
+        Escolhe tom e formação juntos, com poda (branch-and-bound).
+
+        Objetivo de cada T (comparado como tupla, maior é melhor):
+            (sem voz negativa, soma dos scores - JOINT_NOT_FIT_WEIGHT * |not_fit|, -|T|)
+        com os T inválidos descartados. Como a penalidade nunca é negativa, o
+        score de conforto sozinho é um limite superior do objetivo: os T são
+        avaliados do maior limite para o menor e a busca para quando o limite
+        do próximo T já não supera o melhor objetivo encontrado, sem alocar
+        os coristas dos T restantes.
+
+        Args:
+            piece_ranges: Ranges da peça {voz: (min, max)}
+            t_scores: {T: soma dos scores de conforto}
+            t_has_neg: {T: True se alguma voz ficou com score negativo}
+
+        Returns:
+            (best_T ou None, formações (só as classes avaliadas), {T avaliado: objetivo})
+        """
+        prof = self.profiler
+
+        def bound(T):
+            return (not t_has_neg[T], t_scores[T], -abs(T))
+
+        order = sorted(t_scores, key=bound, reverse=True)
+        formations = self.compute_formations(piece_ranges, residues=())
+        invalid_Ts = formations["invalid_Ts"]
+        best_T, best_key = None, None
+        joint_scores = {}
+        for i, T in enumerate(order):
+            if best_key is not None and bound(T) <= best_key:
+                prof.count("joint_T_pruned", len(order) - i)
+                break
+            if T in invalid_Ts:
+                continue
+            prof.count("joint_T_evaluated")
+            formations = self.compute_formations(piece_ranges, residues=(T % 12,))
+            joint = t_scores[T] - self.JOINT_NOT_FIT_WEIGHT * len(formations["not_fit"][T])
+            joint_scores[T] = joint
+            key = (not t_has_neg[T], joint, -abs(T))
+            if best_key is None or key > best_key:
+                best_T, best_key = T, key
+        return best_T, formations, joint_scores
+
+    def ensure_formation(self,
+                         T: int):
+        """
+        Garante best_fit/possible_fit/not_fit de T em analysis_all.
+
+        A busca conjunta só aloca os coristas dos T que avaliou; os demais são
+        calculados aqui quando o slider (ou "Aplicar Vozes") pede por eles.
+        """
+        possible_fit = self.analysis_all.get("possible_fit")
+        if possible_fit is None or T in possible_fit or not self.current_piece_ranges:
+            return
+        if not -11 <= T <= 11:
+            return
+        formations = self.compute_formations(self.current_piece_ranges, residues=(T % 12,))
+        for name in ("best_fit", "possible_fit", "not_fit"):
+            if self.analysis_all[name] is not formations[name]:
+                self.analysis_all[name].update(formations[name])
+        self.analysis_all["invalid_Ts"] = sorted(formations["invalid_Ts"])
+
     def analyze_ranges_with_penalty(
             self,
             original_root: str,
@@ -759,28 +1117,27 @@ class AnalysisManager:
             if group_ranges is None else list(group_ranges.keys())
 
         if group_ranges is None:
-            group_ranges = VOICE_BASE_RANGES
+            group_ranges = self._base_ranges()
 
-        # garante que calculate_best_fit_voices use estes ranges
+        # ranges efetivamente analisados (inclui solistas, quando mesclados)
         self.current_piece_ranges = piece_ranges
+        prof = self.profiler
 
-        piece_mins, piece_maxs = {}, {}
-        for v in voices:
-            if v in piece_ranges:
-                mn, mx = piece_ranges[v]
-                if mn and mx:
-                    piece_mins[v] = librosa.note_to_midi(mn)
-                    piece_maxs[v] = librosa.note_to_midi(mx)
-            else:
-                piece_mins[v] = librosa.note_to_midi("A4")
-                piece_maxs[v] = librosa.note_to_midi("A5")
+        with prof.stage("parse_notes"):
+            piece_mins, piece_maxs = {}, {}
+            for v in voices:
+                if v in piece_ranges:
+                    mn, mx = piece_ranges[v]
+                    if mn and mx:
+                        piece_mins[v], piece_maxs[v] = VoiceRange.from_notes(mn, mx)
+                else:
+                    piece_mins[v], piece_maxs[v] = VoiceRange.from_notes("A4", "A5")
 
-        voice_base_mins, voice_base_maxs = {}, {}
-        for v in voices:
-            mn, mx = group_ranges[v]
-            if mn and mx:
-                voice_base_mins[v] = librosa.note_to_midi(mn)
-                voice_base_maxs[v] = librosa.note_to_midi(mx)
+            voice_base_mins, voice_base_maxs = {}, {}
+            for v in voices:
+                mn, mx = group_ranges[v]
+                if mn and mx:
+                    voice_base_mins[v], voice_base_maxs[v] = VoiceRange.from_notes(mn, mx)
 
         voice_scores_by_voice = {v: {} for v in voices}
         T_values = list(range(-11, 12))
@@ -848,165 +1205,119 @@ class AnalysisManager:
             # Garante que seja não-negativo dentro dos limites
             return max(0.0, score)
 
-        def calculate_comfort_score_for_range(
-                low: int,
-                high: int,
-                min_v: int,
-                max_v: int,
-                confort: float,
-        ) -> float:
-            """
-            Score de conforto baseado no piece_range vs vocal_range, com ponto ideal controlado por `confort`.
-
-            Interpretação:
-            - excess = (max_v - min_v) - (high - low)  # folga disponível para "posicionar" o trecho
-            - O início ideal (low ideal) fica em: min_v + confort * excess
-              * confort=0   => ideal no limite do grave (min_v)
-              * confort=1/2 => ideal no meio
-              * confort=1   => ideal no limite do agudo (min_v + excess)
-
-            Regras:
-            - Fora dos limites (low < min_v ou high > max_v): score negativo com penalidade 3x.
-            - Dentro dos limites:
-              * score máximo (=1) no ponto ideal.
-              * score decresce linearmente até 0 nas extremidades possíveis.
-              * A assimetria da penalidade é automática: o lado com mais margem penaliza menos.
-            """
-            if not (0.0 <= confort <= 1.0):
-                raise ValueError("confort must be between 0.0 and 1.0")
-
-            required_span = high - low
-            allowed_span = max_v - min_v
-            excess = allowed_span - required_span
-
-            # Fora dos limites
-            if low < min_v or high > max_v:
-                below = max(0, min_v - low)
-                above = max(0, high - max_v)
-
-                if excess > 0:
-                    left_margin = confort * excess
-                    right_margin = (1.0 - confort) * excess
-                    ref = min(left_margin, right_margin)
-                    if ref <= 0:  # confort == 0 ou 1
-                        ref = excess
-                    base_weight = 1.0 / ref
-                else:
-                    base_weight = 1.0
-
-                total_penalty = (below + above) * base_weight * 3.0
-                return -total_penalty
-
-            # Dentro dos limites
-            if excess <= 0:
-                return 0.0  # sem folga (ou inválido), não há "conforto" extra a pontuar
-
-            ideal_start = min_v + (confort * excess)
-            d = low - ideal_start  # <0: mais grave; >0: mais agudo
-
-            left_margin = confort * excess
-            right_margin = (1.0 - confort) * excess
-
-            if d < 0:
-                margin = left_margin
-            elif d > 0:
-                margin = right_margin
-            else:
-                return 1.0  # exatamente no ideal
-
-            # Robustez (casos extremos confort=0 ou 1)
-            if margin <= 0:
-                return 0.0
-
-            score = 1.0 - (abs(d) / margin)
-            return max(0.0, min(1.0, score))
-
-        # novos: formações por transposição
-        best_fit_by_T: Dict[int, dict] = {}
-        possible_fit_by_T: Dict[int, dict] = {}
-        not_fit_by_T: Dict[int, list] = {}
-        invalid_Ts = set()
-
-        best_T = None
-        best_score = -float('inf')
-        best_offsets = {}
-
         t_scores = {}  # T -> soma
         t_has_neg = {}  # T -> bool
+        t_offsets = {}  # T -> {voz: O}
         all_T_info = []  # (T, total_score, has_negative, offsets)
 
-        for T in T_values:
-            offsets = {}
-            total_score = 0.0
-            has_negative = False
-
-            for v in voices:
-                if v in piece_ranges and piece_ranges[v] != ('', ''):
-                    min_i = piece_mins[v]
-                    max_i = piece_maxs[v]
-                    min_v = voice_base_mins[v]
-                    max_v = voice_base_maxs[v]
-
-                    best_score_v = -float('inf')
-                    best_O = None
-
-                    # Testa diferentes oitavas
-                    for O in range(-4, 5):
-                        low = min_i + T + 12 * O
-                        high = max_i + T + 12 * O
-
-                        # Calcula o score usando a nova função de conforto
-                        score_v = calculate_comfort_score_for_range(low, high, min_v, max_v, confort)
-
-                        # Escolhe a melhor oitava (maior score, desempate por O mais próximo de 0)
-                        if (score_v > best_score_v) or (
-                                abs(score_v - best_score_v) < 1e-12 and (best_O is None or abs(O) < abs(best_O))
-                        ):
-                            best_score_v = score_v
-                            best_O = O
-
-                    offsets[v] = best_O
+        # Tensor de scores T × O × voz calculado de uma só vez
+        scored_voices = [v for v in voices if v in piece_ranges and piece_ranges[v] != ('', '')]
+        O_values = list(range(-4, 5))
+
+        with prof.stage("comfort_scoring"):
+            T_axis = np.array(T_values)[:, None, None]
+            O_axis = np.array(O_values)[None, :, None]
+            min_i = np.array([piece_mins[v] for v in scored_voices], dtype=int)[None, None, :]
+            max_i = np.array([piece_maxs[v] for v in scored_voices], dtype=int)[None, None, :]
+            min_v = np.array([voice_base_mins[v] for v in scored_voices], dtype=int)[None, None, :]
+            max_v = np.array([voice_base_maxs[v] for v in scored_voices], dtype=int)[None, None, :]
+
+            low = min_i + T_axis + 12 * O_axis
+            high = max_i + T_axis + 12 * O_axis
+            scores = comfort_scores(low, high, min_v, max_v, confort) if scored_voices else \
+                np.zeros((len(T_values), len(O_values), 0))
+
+            # Escolhe a melhor oitava (maior score, desempate por O mais próximo de 0),
+            # percorrendo o eixo das oitavas na mesma ordem da busca escalar
+            best_scores = np.full((len(T_values), len(scored_voices)), -np.inf)
+            best_Os = np.zeros((len(T_values), len(scored_voices)), dtype=int)
+            best_abs_Os = np.full((len(T_values), len(scored_voices)), len(O_values))
+            for j, O in enumerate(O_values):
+                score_O = scores[:, j, :]
+                take = (score_O > best_scores) | (
+                        (np.abs(score_O - best_scores) < 1e-12) & (abs(O) < best_abs_Os)
+                )
+                best_scores = np.where(take, score_O, best_scores)
+                best_Os = np.where(take, O, best_Os)
+                best_abs_Os = np.where(take, abs(O), best_abs_Os)
+
+            best_scores_rows = best_scores.tolist()
+            best_Os_rows = best_Os.tolist()
+
+        # Tabela de oitavas para o slider de T: mesma regra de penalidade de
+        # compute_per_voice_Os_for_T (menor extrapolação, desempate por |O| menor)
+        with prof.stage("offsets_table"):
+            penalties = np.maximum(0, min_v - low) + np.maximum(0, high - max_v)
+            pen_best = np.full((len(T_values), len(scored_voices)), np.iinfo(int).max)
+            pen_Os = np.zeros((len(T_values), len(scored_voices)), dtype=int)
+            for j, O in enumerate(O_values):
+                pen_O = penalties[:, j, :]
+                take = (pen_O < pen_best) | ((pen_O == pen_best) & (abs(O) < np.abs(pen_Os)))
+                pen_best = np.where(take, pen_O, pen_best)
+                pen_Os = np.where(take, O, pen_Os)
+
+            pen_Os_rows = pen_Os.tolist()
+            Os_by_T = {}
+            transposed_by_T = {}
+            for ti, T in enumerate(T_values):
+                Os_by_T[T] = {v: pen_Os_rows[ti][j] for j, v in enumerate(scored_voices)}
+                transposed_by_T[T] = {
+                    v: (int(piece_mins[v] + T + 12 * O), int(piece_maxs[v] + T + 12 * O))
+                    for v, O in Os_by_T[T].items()
+                }
+
+        prof.count("T_evaluated", len(T_values))
+        with prof.stage("totals"):
+            for ti, T in enumerate(T_values):
+                offsets = {}
+                total_score = 0.0
+                has_negative = False
+
+                for j, v in enumerate(scored_voices):
+                    best_score_v = best_scores_rows[ti][j]
+                    offsets[v] = best_Os_rows[ti][j]
                     voice_scores_by_voice[v][T] = best_score_v
                     total_score += best_score_v
                     if best_score_v < 0:
                         has_negative = True
-                else:
-                    voice_scores_by_voice[v][T] = 0.0
-
-            t_scores[T] = total_score
-            t_has_neg[T] = has_negative
-            all_T_info.append((T, total_score, has_negative, offsets))
 
-            # chama calculate_best_fit_voices para este T e salva
-            bf, nf, pf = self.calculate_best_fit_voices(T)
-            best_fit_by_T[T] = deepcopy(bf)
-            possible_fit_by_T[T] = deepcopy(pf)
-            not_fit_by_T[T] = list(nf)  # nf já é list[str]
-
-            # invalidez: alguém está em best_fit e também em not_fit
-            best_names = set()
-            for vv, lst in bf.items():
-                best_names.update(lst)
-            if best_names.intersection(nf):
-                invalid_Ts.add(T)
+                for v in voices:
+                    if v not in offsets:
+                        voice_scores_by_voice[v][T] = 0.0
+
+                t_scores[T] = total_score
+                t_has_neg[T] = has_negative
+                t_offsets[T] = offsets
+                all_T_info.append((T, total_score, has_negative, offsets))
+
+        # formações por transposição (etapa em cache, não depende de confort)
+        joint_scores = {}
+        if self.search_mode == "conjunta":
+            with prof.stage("joint_search"):
+                best_T, formations, joint_scores = self.search_joint_T(piece_ranges, t_scores, t_has_neg)
+            invalid_Ts = formations["invalid_Ts"]
+        else:
+            with prof.stage("formations"):
+                formations = self.compute_formations(piece_ranges)
+            invalid_Ts = formations["invalid_Ts"]
 
             # Melhor T: prioriza "válido", depois "sem negativos", depois maior soma, depois |T| menor
-            if T not in invalid_Ts:
-                if best_T is None:
-                    best_T, best_score, best_offsets = T, total_score, offsets
-                else:
-                    curr_key = (True, not has_negative, total_score, -abs(T))
-                    best_key = (True, not t_has_neg[best_T], t_scores[best_T], -abs(best_T))
-                    if curr_key > best_key:
-                        best_T, best_score, best_offsets = T, total_score, offsets
+            valid_Ts = [T for T in T_values if T not in invalid_Ts]
+            best_T = max(valid_Ts, key=lambda t: (not t_has_neg[t], t_scores[t], -abs(t)), default=None)
+
+        best_fit_by_T = formations["best_fit"]
+        possible_fit_by_T = formations["possible_fit"]
+        not_fit_by_T = formations["not_fit"]
+        best_offsets = t_offsets[best_T] if best_T is not None else {}
 
-        # ranking debug: remove inválidos
-        nonneg = [T for (T, _, has_neg, _) in all_T_info if (not has_neg) and (T not in invalid_Ts)]
-        withneg = [T for (T, _, has_neg, _) in all_T_info if has_neg and (T not in invalid_Ts)]
+        with prof.stage("ranking"):
+            # ranking debug: remove inválidos
+            nonneg = [T for (T, _, has_neg, _) in all_T_info if (not has_neg) and (T not in invalid_Ts)]
+            withneg = [T for (T, _, has_neg, _) in all_T_info if has_neg and (T not in invalid_Ts)]
 
-        nonneg_sorted = sorted(nonneg, key=lambda t: (-t_scores[t], abs(t)))
-        withneg_sorted = sorted(withneg, key=lambda t: (-t_scores[t], abs(t)))
-        debug_ranking_T = nonneg_sorted + withneg_sorted
+            nonneg_sorted = sorted(nonneg, key=lambda t: (-t_scores[t], abs(t)))
+            withneg_sorted = sorted(withneg, key=lambda t: (-t_scores[t], abs(t)))
+            debug_ranking_T = nonneg_sorted + withneg_sorted
 
         if best_T is None:
             new_root, new_mode = original_root, original_mode
@@ -1024,10 +1335,18 @@ class AnalysisManager:
             "debug_with_negative": withneg_sorted,
 
             # novos retornos pedidos
-            "best_fit": best_fit_by_T,  # {T: {voz: [nomes]}}
-            "possible_fit": possible_fit_by_T,  # {T: {voz: [nomes]}}
-            "not_fit": not_fit_by_T,  # {T: [nomes]}
+            "best_fit": best_fit_by_T,  # {T: Formation {voz: (nomes)}}
+            "possible_fit": possible_fit_by_T,  # {T: Formation {voz: (nomes)}}
+            "not_fit": not_fit_by_T,  # {T: (nomes)}
+
+            # tabela para o slider de T (regra de penalidade de compute_per_voice_Os_for_T)
+            "Os_by_T": Os_by_T,  # {T: {voz: O}}
+            "transposed_by_T": transposed_by_T,  # {T: {voz: (midi_min, midi_max)}}
 
             # útil para inspeção (não entra no ranking)
             "invalid_Ts": sorted(invalid_Ts),
+
+            # busca conjunta: objetivo dos T avaliados (vazio no modo "conforto")
+            "search_mode": self.search_mode,
+            "joint_scores": joint_scores,  # {T: soma dos scores - peso * |not_fit|}
         }
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""
+BatchAnalysis - Análise de transposição de um repertório inteiro, sem interface gráfica
+Responsabilidades:
+- Ler o arquivo de dados (grupos e músicas)
+- Analisar todas as músicas de um grupo (ou de todos) em paralelo, num pool de processos
+- Gerar um resumo por música: melhor transposição, tonalidade sugerida e quem não cabe
+
+Uso:
+    python BatchAnalysis.py                      # todas as músicas de todos os grupos
+    python BatchAnalysis.py --grupo "Grupo Vocal" --saida resumo.csv
+    python BatchAnalysis.py --ranges-grupo --conforto 0.5 --saida resumo.json
+    python BatchAnalysis.py --busca-conjunta     # escolhe tom e formação juntos
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from Constants import DATA_FILE, VOICES
+from StorageBackend import open_storage
+
+SUMMARY_FIELDS = ["grupo", "musica", "tom_original", "best_T", "tom_sugerido", "not_fit", "erro"]
+
+
+def music_jobs(data, grupo=None):
+    """
+    Lista as músicas a analisar.
+
+    Args:
+        data: Conteúdo do arquivo de dados
+        grupo: Nome do grupo (None = todos os grupos)
+
+    Returns:
+        Lista de tuplas (grupo, nome_da_musica, dados_da_musica)
+    """
+    grupos = data.get("grupos", {})
+    jobs = []
+    for nome, musica in data.get("musicas", {}).items():
+        g = musica.get("grupo")
+        if g not in grupos:
+            continue
+        if grupo and g != grupo:
+            continue
+        jobs.append((g, nome, musica))
+    return jobs
+
+
+def analyze_music(data_file, grupo, music_name, music_data, confort, use_group_ranges, search_mode="conforto",
+                  group_range_coverage=1.0):
+    """
+    Analisa uma música como a interface faz ao carregá-la e clicar em analisar.
+
+    Executada nos processos do pool: cria seus próprios gerenciadores.
+
+    Returns:
+        Dicionário com os campos de SUMMARY_FIELDS
+    """
+    from AnalysisManager import AnalysisManager
+    from CoristasManager import CoristasManager
+    from MusicDataManager import MusicDataManager
+
+    root = music_data.get("root", "C")
+    mode = music_data.get("mode", "maior")
+    summary = {
+        "grupo": grupo,
+        "musica": music_name,
+        "tom_original": f"{root} {mode}",
+        "best_T": None,
+        "tom_sugerido": None,
+        "not_fit": [],
+        "erro": None,
+    }
+
+    try:
+        coristas_mgr = CoristasManager(data_file=data_file, grupo=grupo)
+        coristas_mgr.load_data()
+
+        # Vozes atribuídas salvas com a música (como em load_music_ranges_for_selection)
+        for voice, coristas in music_data.get("voices", {}).items():
+            for corista_nome in coristas:
+                if corista_nome in coristas_mgr.coristas:
+                    coristas_mgr.set_voz_atribuida(corista_nome, voice)
+
+        analysis_mgr = AnalysisManager(coristas_mgr)
+        analysis_mgr.set_search_mode(search_mode)
+        analysis_mgr.set_group_range_coverage(group_range_coverage)
+        solistas = MusicDataManager(coristas_mgr).normalize_solistas_data(music_data.get("solistas", {}))
+        analysis_mgr.set_solistas(solistas)
+        if use_group_ranges:
+            analysis_mgr.toggle_range_mode()
+
+        ranges = music_data.get("ranges", {})
+        piece_ranges = {v: (ranges.get(v, {}).get("min", ""), ranges.get(v, {}).get("max", "")) for v in VOICES}
+        if not any(mn and mx for mn, mx in piece_ranges.values()):
+            summary["erro"] = "Música sem ranges"
+            return summary
+
+        analysis_mgr.run_analysis(piece_ranges, root, mode, None, confort)
+        analysis = analysis_mgr.analysis_all
+
+        best_T = analysis.get("best_T")
+        summary["best_T"] = best_T
+        if best_T is None:
+            summary["erro"] = "Nenhuma transposição válida"
+        else:
+            summary["tom_sugerido"] = f"{analysis.get('best_key_root')} {analysis.get('best_key_mode')}"
+            summary["not_fit"] = list(analysis.get("not_fit", {}).get(best_T, []))
+    except Exception as e:
+        summary["erro"] = str(e)
+
+    return summary
+
+
+def run_batch(data_file=DATA_FILE, grupo=None, confort=0.33, use_group_ranges=False, workers=None,
+              search_mode="conforto", group_range_coverage=1.0):
+    """
+    Analisa as músicas em paralelo.
+
+    Returns:
+        Lista de resumos, na ordem do arquivo de dados
+    """
+    storage = open_storage(data_file)
+    try:
+        data = storage.load_all()
+    finally:
+        storage.close()
+
+    jobs = music_jobs(data, grupo)
+    if not jobs:
+        return []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(analyze_music, data_file, g, nome, musica, confort, use_group_ranges, search_mode,
+                        group_range_coverage)
+            for g, nome, musica in jobs
+        ]
+        return [fut.result() for fut in futures]
+
+
+def write_summary(summaries, path):
+    """Grava o resumo em .csv ou .json (pela extensão do arquivo)."""
+    if path.lower().endswith(".csv"):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            for s in summaries:
+                writer.writerow({**s, "not_fit": "; ".join(s["not_fit"])})
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
+
+
+def format_summary(summaries):
+    """Texto legível do resumo, uma linha por música."""
+    lines = []
+    for s in summaries:
+        if s["erro"]:
+            lines.append(f"[{s['grupo']}] {s['musica']}: {s['erro']}")
+            continue
+        line = f"[{s['grupo']}] {s['musica']}: {s['best_T']:+d} semitons → {s['tom_sugerido']}"
+        if s["not_fit"]:
+            line += f" | não cabem: {', '.join(s['not_fit'])}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisa as transposições de todo o repertório.")
+    parser.add_argument("--dados", default=DATA_FILE, help="arquivo de dados (padrão: %(default)s)")
+    parser.add_argument("--grupo", help="analisa só as músicas deste grupo")
+    parser.add_argument("--conforto", type=float, default=0.33, help="valor de conforto (padrão: %(default)s)")
+    parser.add_argument("--ranges-grupo", action="store_true", help="usa os ranges do grupo em vez dos ranges base")
+    parser.add_argument("--cobertura", type=float, default=1.0,
+                        help="fração de cada naipe no range do grupo, ex.: 0.8 (padrão: %(default)s = interseção)")
+    parser.add_argument("--processos", type=int, default=None, help="número de processos (padrão: núcleos da CPU)")
+    parser.add_argument("--busca-conjunta", action="store_true",
+                        help="escolhe tom e formação juntos (menos coristas de fora)")
+    parser.add_argument("--saida", help="grava o resumo em .csv ou .json")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.dados):
+        parser.error(f"arquivo não encontrado: {args.dados}")
+    if not 0 < args.cobertura <= 1:
+        parser.error(f"cobertura deve estar entre 0 e 1: {args.cobertura}")
+
+    summaries = run_batch(args.dados, args.grupo, args.conforto, args.ranges_grupo, args.processos,
+                          "conjunta" if args.busca_conjunta else "conforto", args.cobertura)
+    if not summaries:
+        print("Nenhuma música encontrada.")
+        return 1
+
+    print(format_summary(summaries))
+    if args.saida:
+        write_summary(summaries, args.saida)
+        print(f"\nResumo gravado em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,6 @@
 # ===== CONSTANTES =====
+from NoteMath import note_frequency_table
+
 VOICE_BASE_RANGES = {
     "Soprano": ("C4", "A5"),
     "Mezzo-soprano": ("A3", "F5"),
@@ -22,24 +24,8 @@ NOTE_TO_SEMITONE = {
     'B': 11, 'Cb': 11
 }
 
-NOTES_FREQUENCY_HZ = {'C0': 16.35, 'C#0': 17.32, 'D0': 18.35, 'D#0': 19.45, 'E0': 20.6, 'F0': 21.83, 'F#0': 23.12,
-                      'G0': 24.5, 'G#0': 25.96, 'A0': 27.5, 'A#0': 29.13, 'B0': 30.87, 'C1': 32.7, 'C#1': 34.65,
-                      'D1': 36.71, 'D#1': 38.89, 'E1': 41.2, 'F1': 43.65, 'F#1': 46.25, 'G1': 49.0, 'G#1': 51.91,
-                      'A1': 55.0, 'A#1': 58.27, 'B1': 61.73, 'C2': 65.41, 'C#2': 69.29, 'D2': 73.41, 'D#2': 77.78,
-                      'E2': 82.41, 'F2': 87.31, 'F#2': 92.5, 'G2': 98.0, 'G#2': 103.82, 'A2': 110.0, 'A#2': 116.54,
-                      'B2': 123.47, 'C3': 130.81, 'C#3': 138.59, 'D3': 146.83, 'D#3': 155.56, 'E3': 164.81,
-                      'F3': 174.61, 'F#3': 184.99, 'G3': 195.99, 'G#3': 207.65, 'A3': 220.0, 'A#3': 233.08,
-                      'B3': 246.94, 'C4': 261.62, 'C#4': 277.18, 'D4': 293.66, 'D#4': 311.12, 'E4': 329.62,
-                      'F4': 349.22, 'F#4': 369.99, 'G4': 391.99, 'G#4': 415.3, 'A4': 439.99, 'A#4': 466.15,
-                      'B4': 493.87, 'C5': 523.24, 'C#5': 554.35, 'D5': 587.32, 'D#5': 622.24, 'E5': 659.24,
-                      'F5': 698.44, 'F#5': 739.97, 'G5': 783.97, 'G#5': 830.59, 'A5': 879.98, 'A#5': 932.31,
-                      'B5': 987.75, 'C6': 1046.48, 'C#6': 1108.71, 'D6': 1174.63, 'D#6': 1244.48, 'E6': 1318.48,
-                      'F6': 1396.88, 'F#6': 1479.95, 'G6': 1567.95, 'G#6': 1661.18, 'A6': 1759.96, 'A#6': 1864.62,
-                      'B6': 1975.49, 'C7': 2092.96, 'C#7': 2217.41, 'D7': 2349.27, 'D#7': 2488.96, 'E7': 2636.96,
-                      'F7': 2793.77, 'F#7': 2959.89, 'G7': 3135.9, 'G#7': 3322.37, 'A7': 3519.93, 'A#7': 3729.23,
-                      'B7': 3950.98, 'C8': 4185.92, 'C#8': 4434.83, 'D8': 4698.54, 'D#8': 4977.93, 'E8': 5273.93,
-                      'F8': 5587.53, 'F#8': 5919.78, 'G8': 6271.79, 'G#8': 6644.73, 'A8': 7039.85, 'A#8': 7458.46,
-                      'B8': 7901.96}
+# Frequências (Hz) de C0 a B8, geradas a partir de A4 = 440 Hz
+NOTES_FREQUENCY_HZ = note_frequency_table("C0", "B8")
 
 VOICES = ["Soprano", "Mezzo-soprano", "Contralto", "Tenor", "Barítono", "Baixo"]
 
@@ -48,4 +34,8 @@ SEMITONE_TO_SHARP = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#',
 SEMITONE_TO_BEMOL = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
 
 DATA_FILE = "coristas_music_data.json"
-#DATA_FILE = "C:\Users\Sérgio\PycharmProjects\Gerenciador de Coral\coristas_music_data.json"
\ No newline at end of file
+#DATA_FILE = "C:\Users\Sérgio\PycharmProjects\Gerenciador de Coral\coristas_music_data.json"
+
+# Cache em disco dos resultados de análise (AnalysisCache)
+ANALYSIS_CACHE_DIR = ".analysis_cache"
+ANALYSIS_CACHE_MAX_ENTRIES = 64
@@ -0,0 +1,172 @@
+"""
+CoristasImport - Importação de coristas em lote a partir de planilhas
+Responsabilidades:
+- Ler as linhas de um CSV (separador , ; ou tab) ou de uma planilha .xlsx
+- Reconhecer as colunas pelo cabeçalho (nome, range mínimo/máximo, voz, sexo),
+  com ou sem acentos e em maiúsculas/minúsculas
+- Gravar e resumir o relatório por linha devolvido por CoristasManager.import_coristas
+
+A validação, a classificação e a gravação (uma só) ficam em
+CoristasManager.import_coristas; este módulo só lida com os arquivos.
+.xlsx depende do openpyxl (opcional): sem ele, use CSV.
+
+Uso:
+    python CoristasImport.py coristas.csv --grupo "Coral Infantil"
+    python CoristasImport.py coristas.xlsx --grupo "Coral Infantil" --simular --relatorio relatorio.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import unicodedata
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Campo do corista -> nomes aceitos no cabeçalho (sem acento, minúsculas, _ no lugar de espaço)
+COLUMNS = {
+    "nome": ("nome", "name", "corista"),
+    "range_min": ("range_min", "min", "minimo", "nota_min", "nota_minima", "grave"),
+    "range_max": ("range_max", "max", "maximo", "nota_max", "nota_maxima", "agudo"),
+    "voz_atribuida": ("voz_atribuida", "voz", "naipe"),
+    "sexo": ("sexo", "genero", "gender"),
+}
+REQUIRED_COLUMNS = ("nome", "range_min", "range_max")
+REPORT_FIELDS = ("linha", "nome", "status", "mensagem")
+CSV_DELIMITERS = ",;\t"
+
+
+def _header_key(text) -> str:
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii")
+    return "_".join(text.strip().lower().replace("-", " ").split())
+
+
+def map_columns(header) -> dict:
+    """
+    {campo: índice da coluna} a partir do cabeçalho.
+
+    Raises:
+        ValueError: se faltar alguma coluna obrigatória (nome, range mínimo e máximo)
+    """
+    aliases = {alias: field for field, names in COLUMNS.items() for alias in names}
+    columns = {}
+    for i, title in enumerate(header):
+        field = aliases.get(_header_key(title))
+        if field and field not in columns:
+            columns[field] = i
+    missing = [field for field in REQUIRED_COLUMNS if field not in columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing)} "
+                         f"(cabeçalho encontrado: {', '.join(str(t) for t in header)})")
+    return columns
+
+
+def _table_rows(path) -> list:
+    """Células (texto) de cada linha do arquivo, cabeçalho incluído."""
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm"):
+        if openpyxl is None:
+            raise ValueError("Planilhas .xlsx precisam do openpyxl (pip install openpyxl); salve como CSV")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            return [["" if cell is None else str(cell) for cell in row]
+                    for row in workbook.worksheets[0].iter_rows(values_only=True)]
+        finally:
+            workbook.close()
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel
+        return list(csv.reader(f, dialect))
+
+
+def read_rows(path) -> list:
+    """
+    Lê as linhas de coristas de um CSV ou .xlsx com cabeçalho.
+
+    Returns:
+        [(linha, {campo: texto}), ...]; `linha` é o número da linha no arquivo
+        (o cabeçalho é a 1) e linhas em branco ficam de fora
+
+    Raises:
+        ValueError: arquivo vazio, sem as colunas obrigatórias ou .xlsx sem openpyxl
+    """
+    table = _table_rows(path)
+    if not table:
+        raise ValueError("Arquivo vazio")
+    columns = map_columns(table[0])
+
+    rows = []
+    for number, cells in enumerate(table[1:], start=2):
+        if not any(str(c).strip() for c in cells):
+            continue
+        rows.append((number, {field: cells[i].strip() if i < len(cells) else ""
+                              for field, i in columns.items()}))
+    return rows
+
+
+def summarize(report) -> str:
+    """Resumo do relatório numa linha (ex.: "58 novo(s), 2 com erro")."""
+    counts = {}
+    for entry in report:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    parts = [f"{counts[s]} {s}(s)" for s in ("novo", "atualizado") if counts.get(s)]
+    if counts.get("erro"):
+        parts.append(f"{counts['erro']} com erro")
+    return ", ".join(parts) if parts else "nenhuma linha"
+
+
+def write_report(report, path):
+    """Grava o relatório por linha em CSV (UTF-8 com BOM, abre direto no Excel)."""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, delimiter=';')
+        writer.writeheader()
+        for entry in report:
+            writer.writerow({field: entry.get(field, "") for field in REPORT_FIELDS})
+
+
+def main(argv=None):
+    from Constants import DATA_FILE
+    from CoristasManager import CoristasManager
+
+    parser = argparse.ArgumentParser(description="Importa coristas de um CSV/.xlsx com uma única gravação.")
+    parser.add_argument("planilha")
+    parser.add_argument("--grupo", required=True, help="grupo que recebe os coristas")
+    parser.add_argument("--dados", default=DATA_FILE, help="arquivo de dados (padrão: %(default)s)")
+    parser.add_argument("--substituir", action="store_true", help="substitui coristas que já existem no grupo")
+    parser.add_argument("--simular", action="store_true", help="só valida e classifica, sem gravar")
+    parser.add_argument("--relatorio", help="grava o relatório por linha neste CSV")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = read_rows(args.planilha)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    mgr = CoristasManager(data_file=args.dados, grupo=args.grupo)
+    if args.grupo in mgr.storage.list_groups():
+        mgr.load_data()
+    elif not args.simular:
+        mgr.adicionar_grupo(args.grupo)
+        mgr.load_data()
+    # simulação num grupo que não existe: parte de um grupo vazio, sem criá-lo
+    report = mgr.import_coristas(rows, overwrite=args.substituir, dry_run=args.simular)
+    mgr.storage.close()
+
+    for entry in report:
+        if entry["status"] == "erro":
+            print(f"linha {entry['linha']}: {entry['nome'] or '(sem nome)'}: {entry['mensagem']}")
+    print(("Simulação: " if args.simular else "") + summarize(report))
+    if args.relatorio:
+        write_report(report, args.relatorio)
+        print(f"Relatório gravado em {args.relatorio}")
+    return 1 if any(entry["status"] == "erro" for entry in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,26 @@
+import hashlib
 import json
-import os
 import re
 import time
-import librosa
+import numpy as np
 from tkinter import messagebox
 from Constants import DATA_FILE, VOICES, VOICE_BASE_RANGES, SEMITONE_TO_SHARP
 from GeneralFunctions import rreplace
+from RangeModel import GroupRanges, Roster, coverage_range, midi_to_note, note_to_midi
+from StorageBackend import open_storage
+from VoiceClassifier import get_classifier
 from typing import overload, Literal
 
 # ===== GERENCIAMENTO DE CORISTAS E DADOS =====
 class CoristasManager:
     def __init__(self, data_file=DATA_FILE, grupo=None):
         self.data_file = data_file
+        self.storage = open_storage(data_file)  # JSON ou SQLite, pela extensão
         self.grupo = grupo          # Nome do grupo atual
         self.coristas = {}          # Dict de coristas do grupo atual
+        self.base_ranges = VOICE_BASE_RANGES  # Ranges base do grupo atual (padrão ou próprios)
+        self._change_listeners = [] # Callbacks chamados após salvar alterações nos coristas
+        self._group_ranges = GroupRanges(VOICES)  # Ranges por voz, atualizados a cada alteração
 
     def set_group(self,
             grupo):
@@ -23,15 +30,54 @@ class CoristasManager:
 
     def load_data(self
                   ):
-        #data, lista_grupos = self.read_data('grupos', both=True, group_list=True)
-        with open(self.data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            lista_grupos = list(data.get('grupos', {}).keys())
+        lista_grupos = self.storage.list_groups()
 
         self.grupo = lista_grupos[0] if len(lista_grupos) > 0 and not self.grupo else self.grupo
 
         # versão: coristas é um dicionário, não lista
-        self.coristas = data['grupos'][self.grupo]
+        self.coristas = self.storage.load_group(self.grupo)
+        self.base_ranges = self._group_base_ranges()
+        self._group_ranges.rebuild(self.coristas)
+
+    def _group_base_ranges(self
+                           ) -> dict:
+        """Ranges base do grupo atual: os padrão, com os do grupo por cima (se houver)."""
+        custom = self.storage.get_base_ranges(self.grupo) if self.grupo else None
+        return self._merge_base_ranges(custom)
+
+    @staticmethod
+    def _merge_base_ranges(custom) -> dict:
+        if not custom:
+            return VOICE_BASE_RANGES
+        return {v: tuple(custom.get(v) or VOICE_BASE_RANGES[v]) for v in VOICES if v in VOICE_BASE_RANGES or v in custom}
+
+    def roster_fingerprint(self
+                           ) -> str:
+        """
+        Retorna um hash estável dos coristas do grupo atual.
+
+        Qualquer alteração de range, voz atribuída ou classificação muda o hash,
+        o que permite usá-lo como chave de cache das análises.
+        """
+        payload = json.dumps(self.coristas, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def add_change_listener(self,
+                            callback):
+        """
+        Registra uma função chamada como callback(grupo) sempre que os coristas
+        de um grupo são gravados no arquivo (ex.: invalidar caches de análise).
+        """
+        if callback not in self._change_listeners:
+            self._change_listeners.append(callback)
+
+    def _notify_change(self,
+                       grupo):
+        for callback in list(self._change_listeners):
+            try:
+                callback(grupo)
+            except Exception as e:
+                print(f"Erro ao notificar alteração de coristas: {e}")
 
     def save_music_ranges_to_json(self,
                                   music_name: str, ranges: dict, solistas: dict, vozes_por_corista: dict, root: str, mode: str) -> bool:
@@ -75,32 +121,22 @@ class CoristasManager:
             return False, "; ".join(msgs) + "\nEsperado: letra A-G + número 2-7"
 
         try:
-            # ===== UMA ÚNICA ABERTURA DO ARQUIVO =====
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            else:
-                data = {"grupos": {}, "musicas": {}}
-
-            # ===== TODAS AS MODIFICAÇÕES EM MEMÓRIA =====
-            # 1) Atualizar/criar grupo se necessário
-            if self.grupo and self.grupo not in data.get("grupos", {}):
-                data.setdefault("grupos", {})[self.grupo] = self.coristas
-
-            # 2) Criar ou sobrescrever música
-            data.setdefault("musicas", {})[music_name] = {
-                "root": root,
-                "mode": mode,
-                "grupo": self.grupo,
-                "ranges": ranges_normalized,
-                "solistas": solistas or {},
-                "voices": vozes_por_corista or {},
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            }
-
-            # ===== ÚNICA ESCRITA NO ARQUIVO =====
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # ===== UMA ÚNICA GRAVAÇÃO (batch) =====
+            with self.storage.batch():
+                # 1) Atualizar/criar grupo se necessário
+                if self.grupo and self.grupo not in self.storage.list_groups():
+                    self.storage.save_group(self.grupo, self.coristas)
+
+                # 2) Criar ou sobrescrever música
+                self.storage.save_music(music_name, {
+                    "root": root,
+                    "mode": mode,
+                    "grupo": self.grupo,
+                    "ranges": ranges_normalized,
+                    "solistas": solistas or {},
+                    "voices": vozes_por_corista or {},
+                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                })
 
             return True, f"Faixa '{music_name}' salva com sucesso!"
 
@@ -111,10 +147,8 @@ class CoristasManager:
                            music_name: str) -> bool:
         """Verifica se uma música já existe no arquivo"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                return music_name in data.get("musicas", {})
+            if self.storage.exists():
+                return self.storage.music_exists(music_name)
         except Exception:
             pass
         return False
@@ -126,54 +160,20 @@ class CoristasManager:
             print("Grupo não definido para salvar coristas.")
             return False
 
+        if corista_nome:
+            if replace and replace != corista_nome:
+                self._group_ranges.remove(replace)
+            self._group_ranges.update(corista_nome, self.coristas[corista_nome])
+        else:
+            self._group_ranges.sync(self.coristas)
+
         try:
-            mode = 'r+' if os.path.exists(self.data_file) else 'w+'
-
-            with open(self.data_file, mode, encoding='utf-8') as f:
-                if mode == 'r+':
-                    try:
-                        f.seek(0)
-                        data = json.load(f)
-                    except (json.JSONDecodeError, ValueError):
-                        data = {}
-
-                if not isinstance(data, dict):
-                    data = {}
-
-                if 'grupos' not in data or not isinstance(data['grupos'], dict):
-                    data['grupos'] = {}
-
-                if self.grupo not in data['grupos']:
-                    data['grupos'][self.grupo] = {}
-
-                # Atualiza coristas
-                if replace:
-                    data['grupos'][self.grupo][corista_nome] = data['grupos'][self.grupo].pop(replace)
-
-                    # Atualiza referências em músicas do mesmo grupo
-                    if 'musicas' in data and isinstance(data['musicas'], dict):
-                        for musica in data['musicas'].values():
-                            if musica.get('grupo') == self.grupo:
-                                # Solistas: renomeia chave mantendo valor
-                                if 'solistas' in musica and replace in musica['solistas']:
-                                    musica['solistas'][corista_nome] = musica['solistas'].pop(replace)
-
-                                # Voices: substitui nome em listas de naipes
-                                if 'voices' in musica and isinstance(musica['voices'], dict):
-                                    for naipe in musica['voices'].values():
-                                        if isinstance(naipe, list) and replace in naipe:
-                                            naipe[naipe.index(replace)] = corista_nome
-
-                if corista_nome:
-                    data['grupos'][self.grupo][corista_nome] = self.coristas[corista_nome]
-                else:
-                    data['grupos'][self.grupo] = self.coristas
-
-                # Escreve no arquivo
-                f.seek(0)
-                f.truncate()
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if corista_nome:
+                self.storage.save_corista(self.grupo, corista_nome, self.coristas[corista_nome], replace=replace)
+            else:
+                self.storage.save_group(self.grupo, self.coristas)
 
+            self._notify_change(self.grupo)
             return True
 
         except Exception as e:
@@ -203,22 +203,19 @@ class CoristasManager:
 
     def adicionar_grupo(self,
                         nome):
-        with open(DATA_FILE, 'r+', encoding='utf-8') as f:
-            data = json.load(f)
-            data['grupos'][nome] = {}
-            # Salvar
-            f.seek(0)
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            f.truncate()
+        self.storage.add_group(nome)
 
     def read_data(self,
                   extract=None, all_in=False, both=False, group_list=False):
-        if not os.path.exists(self.data_file):
+        if not self.storage.exists():
             return {} if not extract else {f'{extract}_não_encontrado': True}
 
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # Só a lista de grupos: não precisa copiar o documento
+            if extract and group_list and not all_in and not both:
+                return self.storage.list_groups()
+
+            data = self.storage.load_all()
 
             # Retorna apenas o que foi solicitado
             if extract:
@@ -268,7 +265,7 @@ class CoristasManager:
             # Valida ranges
             #librosa.note_to_midi(range_min)
             #librosa.note_to_midi(range_max)
-            if  librosa.note_to_midi(range_min) >  librosa.note_to_midi(range_max):
+            if note_to_midi(range_min) > note_to_midi(range_max):
                 raise ValueError(f"Range inválido: {range_min} > {range_max}")
 
             # Calcula vozes compatíveis
@@ -292,6 +289,110 @@ class CoristasManager:
         except Exception as e:
             return False, str(e)
 
+    def import_coristas(self,
+                        rows, overwrite: bool = False, dry_run: bool = False) -> list:
+        """
+        Importa vários coristas para o grupo atual com uma única gravação.
+
+        Cada linha é validada como em add_corista (nome, notas A-G seguidas de
+        2-7, mínimo <= máximo) e normalizada com _note_to_sharp; as válidas são
+        classificadas em lote (VoiceClassifier.classify_arrays) e gravadas juntas
+        num storage.batch(). Linhas com erro não impedem as outras.
+
+        Args:
+            rows: [(linha, {'nome', 'range_min', 'range_max', 'voz_atribuida', 'sexo'}), ...]
+                  (voz e sexo opcionais; ver CoristasImport.read_rows)
+            overwrite: Substitui coristas que já existem no grupo (senão, a linha é erro)
+            dry_run: Só valida e classifica, sem alterar nada
+
+        Returns:
+            Relatório por linha [{'linha', 'nome', 'status', 'mensagem'}, ...], com
+            status 'novo', 'atualizado' ou 'erro'
+        """
+        if not self.grupo:
+            raise ValueError("Grupo não definido para importar coristas.")
+
+        NOTA_PATTERN = re.compile(r"^[A-G](?:#|B)?[2-7]$")
+        voices = {v.lower(): v for v in VOICES}
+
+        report = []
+        valid = []  # (entrada do relatório, range_min, range_max, voz, sexo)
+        seen = {}
+        for linha, row in rows:
+            nome = (row.get('nome') or '').strip()
+            entry = {'linha': linha, 'nome': nome, 'status': 'erro', 'mensagem': ''}
+            report.append(entry)
+
+            if not nome:
+                entry['mensagem'] = "Nome vazio"
+                continue
+            if nome in seen:
+                entry['mensagem'] = f"Nome repetido (linha {seen[nome]})"
+                continue
+            seen[nome] = linha
+            if nome in self.coristas and not overwrite:
+                entry['mensagem'] = "Corista já existe no grupo"
+                continue
+
+            notas = [(row.get(campo) or '').strip().upper() for campo in ('range_min', 'range_max')]
+            invalids = [n for n in notas if not NOTA_PATTERN.fullmatch(n)]
+            if invalids:
+                entry['mensagem'] = (f"Nota inválida: '{' e '.join(invalids)}' "
+                                     "(esperado: uma letra A-G seguida de um número 2-7)")
+                continue
+            range_min, range_max = (self._note_to_sharp(n) for n in notas)
+            if note_to_midi(range_min) > note_to_midi(range_max):
+                entry['mensagem'] = f"Range inválido: {range_min} > {range_max}"
+                continue
+
+            voz = (row.get('voz_atribuida') or '').strip()
+            if voz and voz.lower() not in voices:
+                entry['mensagem'] = f"Voz desconhecida: '{voz}'"
+                continue
+            sexo = (row.get('sexo') or '').strip().upper()[:1]
+            if sexo and sexo not in ('F', 'M'):
+                entry['mensagem'] = f"Sexo inválido: '{row.get('sexo')}' (esperado F ou M)"
+                continue
+            valid.append((entry, range_min, range_max, voices.get(voz.lower()), sexo))
+
+        # Classificação em lote (uma consulta à tabela por par distinto)
+        results = get_classifier(self.base_ranges).classify_arrays(
+            [note_to_midi(v[1]) for v in valid], [note_to_midi(v[2]) for v in valid])
+
+        imported = {}
+        for (entry, range_min, range_max, voz, sexo), (vozes_recomendadas, vozes_possiveis) in zip(valid, results):
+            voz_calculada = vozes_recomendadas[0] if vozes_recomendadas else (
+                vozes_possiveis[0] if vozes_possiveis else VOICES[0])
+            existing = self.coristas.get(entry['nome']) or {}
+            corista = {
+                'range_min': range_min,
+                'range_max': range_max,
+                'voz_calculada': voz_calculada,
+                'voz_atribuida': voz or existing.get('voz_atribuida') or voz_calculada,
+                'vozes_recomendadas': vozes_recomendadas,
+                'vozes_possiveis': vozes_possiveis
+            }
+            sexo = sexo or existing.get('sexo')
+            if sexo:
+                corista['sexo'] = sexo
+            imported[entry['nome']] = corista
+            entry['status'] = 'atualizado' if existing else 'novo'
+            entry['mensagem'] = f"{range_min} - {range_max}: {voz_calculada}" + (
+                f" (atribuída: {corista['voz_atribuida']})" if corista['voz_atribuida'] != voz_calculada else "")
+
+        if dry_run or not imported:
+            return report
+
+        # Uma única gravação para todos os coristas importados
+        with self.storage.batch():
+            for nome, corista in imported.items():
+                self.storage.save_corista(self.grupo, nome, corista)
+        self.coristas.update(imported)
+        for nome, corista in imported.items():
+            self._group_ranges.update(nome, corista)
+        self._notify_change(self.grupo)
+        return report
+
     def remove_corista(self,
                        corista_nome):
         # Verifica se o corista existe no grupo atual
@@ -300,78 +401,37 @@ class CoristasManager:
 
         # Remove o corista do grupo na memória (já usaremos self.grupo apenas para referência)
         self.coristas.pop(corista_nome, None)
+        self._group_ranges.remove(corista_nome)
         grupo = self.grupo
 
         try:
-            with open(self.data_file, 'r+', encoding='utf-8') as f:
-                data = json.load(f)
-
-                # 1) Construir todas_vozes a partir das informações do corista antes da remoção
-                groups = data.setdefault("grupos", {})
-                grupo_dict = groups.setdefault(grupo, {})
-
-                corista_info = grupo_dict.get(corista_nome, {})
-                todas_vozes = set()
-
-                if corista_info:
-                    voz_atribuida = corista_info.get("voz_atribuida")
-                    if voz_atribuida:
-                        todas_vozes.add(voz_atribuida)
-
-                    todas_vozes.update(corista_info.get("vozes_recomendadas", []))
-                    todas_vozes.update(corista_info.get("vozes_possiveis", []))
-
-                # 2) Remover o corista do grupo
-                grupo_dict.pop(corista_nome, None)
-
-                # 3) Atualizar músicas do mesmo grupo
-                musics = data.get("musicas", {})
-                solista = []
-                corista = []
-                vozes = {}
-                for music, value in musics.items():
-                    if value.get("grupo") != grupo:
-                        continue
-
-                    # 3a) Remover do mapeamento de voices
-                    voices_map = value.setdefault("voices", {})
-                    for voice_name, members in list(voices_map.items()):
-                        if voice_name in todas_vozes and isinstance(members, list) and corista_nome in members:
-                            corista.append(music)
-                            members.remove(corista_nome)
-                            # Se a lista ficou vazia, remova a voz por completo
-                            if len(members) == 0:
-                                vozes[music] =  voice_name
-                                del voices_map[voice_name]
-
-                    # 3b) Remover do campo solistas, se estiver presente
-                    solistas_map = value.get("solistas", {})
-                    if corista_nome in solistas_map:
-                        solista.append(music)
-                        del solistas_map[corista_nome]
-
-                # 4) Gravação atômica de volta no arquivo (ou simples overwrite com truncate)
-                msg = f"Tem certeza que quer remover '{corista_nome}'?"
-                if solista or corista or vozes:
-                    msg += " Isso afetará:\n"
-                    if corista:
-                        msg += " - a lista de coristas de '" + {rreplace("', '".join(corista), ", ", " e ")} + "'\n"
-                    if vozes:
-                        for key in vozes:
-                            msg += f"     - removerá '{vozes[key]}' da música: '{key}'\n"
-                    if solista:
-                        msg += " - a lista de solistas de '" + {rreplace("', '".join(solista), ", ", ' e ')} +"'"
-                remover = messagebox.askyesno(
-                    "Aviso",
-                    msg
-                )
-                if remover:
-                    f.seek(0)
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                    f.truncate()
-
-                    return data
-                return False
+            # 1) Músicas do grupo afetadas pela remoção (naipes e solistas)
+            refs = self.storage.corista_references(grupo, corista_nome)
+            corista = refs["voices"]
+            vozes = refs["emptied"]
+            solista = refs["solistas"]
+
+            # 2) Confirmação e gravação (o armazenamento atualiza grupo e músicas)
+            msg = f"Tem certeza que quer remover '{corista_nome}'?"
+            if solista or corista or vozes:
+                msg += " Isso afetará:\n"
+                if corista:
+                    msg += " - a lista de coristas de '" + rreplace("', '".join(corista), ", ", " e ") + "'\n"
+                if vozes:
+                    for key in vozes:
+                        msg += f"     - removerá '{vozes[key]}' da música: '{key}'\n"
+                if solista:
+                    msg += " - a lista de solistas de '" + rreplace("', '".join(solista), ", ", ' e ') +"'"
+            remover = messagebox.askyesno(
+                "Aviso",
+                msg
+            )
+            if remover:
+                self.storage.remove_corista(grupo, corista_nome)
+
+                self._notify_change(grupo)
+                return True
+            return False
         except Exception as e:
             # Opcional: loga o erro
             print(f"Erro ao atualizar dados: {e}")
@@ -397,159 +457,121 @@ class CoristasManager:
         - vozes_possiveis:
             - observations=False: list[str]
             - observations=True : list[tuple[str, float, str]] -> (voz, score, obs)
-        """
-        TOL = 5
-
-        def fmt_poss(scored: list[tuple]):
-            # scored: (voice, score) ou (voice, score, obs)
-            if observations:
-                return scored  # type: ignore[return-value]
-            return [x[0] for x in scored]  # só vozes
 
+        O resultado só depende do par (min, max) em MIDI e vem da tabela
+        memorizada de VoiceClassifier (calculado uma vez por par).
+        """
         try:
-            p_min = librosa.note_to_midi(range_min)
-            p_max = librosa.note_to_midi(range_max)
-            if p_min > p_max:
-                p_min, p_max = p_max, p_min
-
-            p_min_exp = p_min - TOL
-            p_max_exp = p_max + TOL
-
-            def fit_score(container_min: int, container_max: int, item_min: int, item_max: int) -> float | None:
-                allowed_span = container_max - container_min
-                required_span = item_max - item_min
-                if required_span > allowed_span:
-                    return None
-
-                d_min = item_min - container_min
-                d_max = container_max - item_max
-                m = (allowed_span - required_span) / 2.0
-
-                if m <= 0:
-                    return 1.0 if (d_min == 0 and d_max == 0) else 0.0
-
-                score = 1.0 - (abs(d_min - m) + abs(d_max - m)) / (2.0 * m)
-                return max(0.0, min(1.0, float(score)))
-
-            rec_scored = []  # (voice, score) | (voice, score, obs)
-            possA_scored = []  # (voice, score) | (voice, score, obs)
-            fallback = []  # (voice, violation) | (voice, violation, obs)
-
-            for voice in VOICES:
-                v_min_str, v_max_str = VOICE_BASE_RANGES[voice]
-                v_min = librosa.note_to_midi(v_min_str)
-                v_max = librosa.note_to_midi(v_max_str)
-
-                # 1) Recomendadas: VOZ dentro da PESSOA (exato)
-                if p_min <= v_min and p_max >= v_max:
-                    score = fit_score(p_min, p_max, v_min, v_max) or 0.0
-                    if observations:
-                        obs = f"Folga pessoa: {v_min - p_min} st grave, {p_max - v_max} st agudo"
-                        rec_scored.append((voice, score, obs))
-                    else:
-                        rec_scored.append((voice, score))
-
-                # 2) Possíveis: VOZ dentro da PESSOA EXPANDIDA (±5)
-                if v_min >= p_min_exp and v_max <= p_max_exp:
-                    missing_low = max(0, p_min - v_min)
-                    missing_high = max(0, v_max - p_max)
-                    max_missing = max(missing_low, missing_high)
-
-                    base = fit_score(p_min_exp, p_max_exp, v_min, v_max) or 0.0
-                    penalty = max(0.0, 1.0 - (max_missing / float(TOL))) if TOL > 0 else 0.0
-                    score = base * penalty
-
-                    is_rec = (p_min <= v_min and p_max >= v_max)
-                    if not is_rec:
-                        if observations:
-                            parts = []
-                            if missing_low:
-                                parts.append(f"falta {missing_low} st grave")
-                            if missing_high:
-                                parts.append(f"falta {missing_high} st agudo")
-                            obs = "Quase alcança: " + (" e ".join(parts) if parts else "ok")
-                            possA_scored.append((voice, score, obs))
-                        else:
-                            possA_scored.append((voice, score))
-
-                # fallback (garantir 1 voz), contra VOZ expandida
-                v_min_exp = v_min - TOL
-                v_max_exp = v_max + TOL
-                out_low = max(0, v_min_exp - p_min)
-                out_high = max(0, p_max - v_max_exp)
-                violation = max(out_low, out_high)
-                if observations:
-                    parts = []
-                    if out_low:
-                        parts.append(f"{out_low} st abaixo (mesmo com tolerância)")
-                    if out_high:
-                        parts.append(f"{out_high} st acima (mesmo com tolerância)")
-                    obs = "Mais próxima (violação): " + (" e ".join(parts) if parts else "ok")
-                    fallback.append((voice, violation, obs))
-                else:
-                    fallback.append((voice, violation))
-
-            # Ordena recomendadas (usa score)
-            if rec_scored:
-                rec_scored.sort(key=lambda x: (-x[1], VOICES.index(x[0]) if x[0] in VOICES else 9999))
-                vozes_recomendadas = [x[0] for x in rec_scored]
-
-                possA_scored.sort(key=lambda x: (-x[1], VOICES.index(x[0]) if x[0] in VOICES else 9999))
-                return vozes_recomendadas, fmt_poss(possA_scored)
-
-            # 3) Sem recomendadas: pessoa dentro da VOZ expandida ±5
-            possB_scored = []
-            for voice in VOICES:
-                v_min_str, v_max_str = VOICE_BASE_RANGES[voice]
-                v_min = librosa.note_to_midi(v_min_str)
-                v_max = librosa.note_to_midi(v_max_str)
-
-                v_min_exp = v_min - TOL
-                v_max_exp = v_max + TOL
-
-                if p_min >= v_min_exp and p_max <= v_max_exp:
-                    overflow_low = max(0, v_min - p_min)
-                    overflow_high = max(0, p_max - v_max)
-                    max_over = max(overflow_low, overflow_high)
-
-                    base = fit_score(v_min_exp, v_max_exp, p_min, p_max) or 0.0
-                    penalty = max(0.0, 1.0 - (max_over / float(TOL))) if TOL > 0 else 0.0
-                    score = base * penalty
-
-                    if observations:
-                        parts = []
-                        if overflow_low:
-                            parts.append(f"{overflow_low} st abaixo do mínimo real")
-                        if overflow_high:
-                            parts.append(f"{overflow_high} st acima do máximo real")
-                        obs = "Pessoa dentro (com tolerância). " + (
-                            "Excesso: " + " e ".join(parts) if parts else "Dentro do range real"
-                        )
-                        possB_scored.append((voice, score, obs))
-                    else:
-                        possB_scored.append((voice, score))
-
-            if possB_scored:
-                possB_scored.sort(key=lambda x: (-x[1], VOICES.index(x[0]) if x[0] in VOICES else 9999))
-                return [], fmt_poss(possB_scored)
-
-            # 4) Garantia: pelo menos 1 voz (mais próxima)
-            fallback.sort(key=lambda x: (x[1], VOICES.index(x[0]) if x[0] in VOICES else 9999))
-            closest = fallback[0]
-
-            if observations:
-                voice, violation, obs = closest
-                score = 1.0 / (1.0 + float(violation))
-                return [], [(voice, score, obs)]
-            else:
-                voice, violation = closest
-                return [], [voice]
+            p_min = note_to_midi(range_min)
+            p_max = note_to_midi(range_max)
+            return get_classifier(self.base_ranges).compatible_voices(p_min, p_max, observations)
 
         except Exception as e:
             print(f"Erro ao calcular vozes compatíveis: {e}")
             if observations:
                 return [], [(VOICES[0], 0.0, "Fallback por erro")]
             return [], [VOICES[0]]
+
+    def classify_coristas(self,
+                          nomes=None, observations: bool = False) -> dict:
+        """
+        Classifica vários coristas do grupo atual (uma consulta à tabela por corista).
+
+        Args:
+            nomes: Coristas a classificar (padrão: todos os que têm range)
+
+        Returns:
+            {nome: (vozes_recomendadas, vozes_possiveis)}, como calculate_compatible_voices
+        """
+        classifier = get_classifier(self.base_ranges)
+        result = {}
+        for nome in (self.coristas if nomes is None else nomes):
+            dados = self.coristas.get(nome) or {}
+            try:
+                p_min = note_to_midi(dados.get('range_min') or '')
+                p_max = note_to_midi(dados.get('range_max') or '')
+            except ValueError:
+                continue
+            result[nome] = classifier.compatible_voices(p_min, p_max, observations)
+        return result
+
+    def reclassify_coristas(self
+                            ) -> list:
+        """
+        Recalcula voz_calculada, vozes_recomendadas e vozes_possiveis de todos os
+        coristas do grupo atual pelos ranges base do grupo, numa única passada
+        sobre os arrays do Roster. A voz atribuída não muda. Não grava.
+
+        Returns:
+            Nomes dos coristas cuja classificação mudou
+        """
+        roster = Roster.from_coristas(self.coristas)
+        results = get_classifier(self.base_ranges).classify_arrays(roster.mins, roster.maxs)
+        changed = []
+        for nome, (vozes_recomendadas, vozes_possiveis) in zip(roster.names, results):
+            voz_calculada = vozes_recomendadas[0] if vozes_recomendadas else (
+                vozes_possiveis[0] if vozes_possiveis else VOICES[0])
+            corista = self.coristas[nome]
+            if (corista.get('voz_calculada') != voz_calculada
+                    or corista.get('vozes_recomendadas') != vozes_recomendadas
+                    or corista.get('vozes_possiveis') != vozes_possiveis):
+                corista['voz_calculada'] = voz_calculada
+                corista['vozes_recomendadas'] = vozes_recomendadas
+                corista['vozes_possiveis'] = vozes_possiveis
+                self._group_ranges.update(nome, corista)
+                changed.append(nome)
+        return changed
+
+    def set_voz_atribuida(self,
+                          nome, voz):
+        """
+        Altera a voz atribuída do corista na memória (não grava) e atualiza os
+        ranges do grupo. Use no lugar de coristas[nome]['voz_atribuida'] = voz.
+        """
+        corista = self.coristas[nome]
+        corista['voz_atribuida'] = voz
+        self._group_ranges.update(nome, corista)
+
+    def set_base_ranges(self,
+                        ranges=None) -> list:
+        """
+        Define os ranges base do grupo atual e reclassifica todos os coristas.
+
+        Args:
+            ranges: {voz: (nota_min, nota_max)}; vozes omitidas ficam com o range
+                    padrão. None ou {} volta aos VOICE_BASE_RANGES.
+
+        Returns:
+            Nomes dos coristas cuja classificação mudou
+
+        Raises:
+            ValueError: voz desconhecida, nota inválida ou mínimo acima do máximo
+        """
+        if not self.grupo:
+            raise ValueError("Grupo não definido para salvar os ranges base.")
+
+        custom = {}
+        for voz, notas in (ranges or {}).items():
+            if voz not in VOICES:
+                raise ValueError(f"Voz desconhecida: {voz!r}")
+            range_min, range_max = (str(n).strip().capitalize() for n in notas)
+            if note_to_midi(range_min) > note_to_midi(range_max):
+                raise ValueError(f"Range inválido para {voz}: {range_min} > {range_max}")
+            custom[voz] = [self._note_to_sharp(range_min), self._note_to_sharp(range_max)]
+        if all(tuple(custom[v]) == tuple(VOICE_BASE_RANGES.get(v, ())) for v in custom):
+            custom = {}
+
+        self.base_ranges = self._merge_base_ranges(custom)
+        changed = self.reclassify_coristas()
+
+        # ranges e coristas reclassificados numa única gravação
+        with self.storage.batch():
+            self.storage.save_base_ranges(self.grupo, custom or None)
+            if changed:
+                self.storage.save_group(self.grupo, self.coristas)
+        self._notify_change(self.grupo)
+        return changed
+
     def get_voice_group_ranges_old(self,
                                solistas=None) -> dict:
         """
@@ -560,8 +582,8 @@ class CoristasManager:
         # Agrupa coristas por voz atribuída
         for corista in self.coristas:
             voz = self.coristas[corista]['voz_atribuida']
-            min_midi =  librosa.note_to_midi(self.coristas[corista]['range_min'])
-            max_midi =  librosa.note_to_midi(self.coristas[corista]['range_max'])
+            min_midi = note_to_midi(self.coristas[corista]['range_min'])
+            max_midi = note_to_midi(self.coristas[corista]['range_max'])
             voice_groups[voz].append((min_midi, max_midi))
 
         # Calcula range do grupo: maior mínimo e menor máximo
@@ -576,8 +598,8 @@ class CoristasManager:
                 group_max = min(maxs)  # menor máximo
 
                 if group_min <= group_max:
-                    group_ranges[voz] = (librosa.midi_to_note(int(group_min)),  librosa.midi_to_note(int(group_max)))
-                    group_extension[voz] = (librosa.midi_to_note(int(min(mins))),  librosa.midi_to_note(int(max(maxs))))
+                    group_ranges[voz] = (midi_to_note(int(group_min)), midi_to_note(int(group_max)))
+                    group_extension[voz] = (midi_to_note(int(min(mins))), midi_to_note(int(max(maxs))))
 
         if solistas:
             # Atualiza os valores de solistas com os ranges de coristas quando disponíveis
@@ -621,8 +643,8 @@ class CoristasManager:
         # Agrupa coristas por voz atribuída
         for corista, data in self.coristas.items():
             voz = data['voz_atribuida']
-            min_midi = librosa.note_to_midi(data['range_min'])
-            max_midi = librosa.note_to_midi(data['range_max'])
+            min_midi = note_to_midi(data['range_min'])
+            max_midi = note_to_midi(data['range_max'])
 
             voice_groups_all[voz].append((min_midi, max_midi))
 
@@ -645,13 +667,13 @@ class CoristasManager:
 
                 if group_min <= group_max:
                     group_ranges[voz] = (
-                        librosa.midi_to_note(int(group_min)),
-                        librosa.midi_to_note(int(group_max)),
+                        midi_to_note(int(group_min)),
+                        midi_to_note(int(group_max)),
                     )
 
                 group_extension[voz] = (
-                    librosa.midi_to_note(int(min(mins))),
-                    librosa.midi_to_note(int(max(maxs))),
+                    midi_to_note(int(min(mins))),
+                    midi_to_note(int(max(maxs))),
                 )
 
             return group_ranges, group_extension
@@ -680,9 +702,50 @@ class CoristasManager:
     def get_voice_group_ranges(self,
                                solistas=None,
                                best_fit=None,
-                               not_fit=None) -> dict:
+                               not_fit=None,
+                               coverage: float = 1.0) -> dict:
         """
-        Calcula os ranges do grupo por voz.
+        Ranges do grupo por voz, lidos do índice mantido a cada alteração (GroupRanges).
+
+        Mesmo resultado de get_voice_group_ranges_full, sem percorrer os coristas:
+        - group_ranges: interseção (maior mínimo, menor máximo) dos coristas de cada voz
+          que têm vozes recomendadas. Com coverage < 1, o range que essa fração do
+          naipe alcança (ex.: 0.8 = 80%), para que um corista de range estreito
+          não encolha o naipe inteiro (ver coverage_range).
+        - group_extension: menor mínimo e maior máximo de todos os coristas da voz.
+
+        Alterações feitas direto em self.coristas (fora de save_corista, remove_corista,
+        set_voz_atribuida e reclassify_coristas) só aparecem depois de save_corista().
+        """
+        index = self._group_ranges
+        if index.source is not self.coristas:
+            # self.coristas foi trocado por outro dicionário
+            index.rebuild(self.coristas)
+
+        group_ranges = {v: vr.notes() for v, vr in index.ranges(coverage).items()}
+        group_extension = {v: vr.notes() for v, vr in index.extension().items()}
+
+        if solistas:
+            # Atualiza os valores de solistas com os ranges de coristas quando disponíveis
+            solistas_updated = {
+                k: (self.coristas[k]['range_min'], self.coristas[k]['range_max'])
+                if k in self.coristas else v
+                for k, v in solistas.items()
+            }
+
+            # Une com as ranges de grupo
+            group_ranges = solistas_updated | group_ranges
+
+        return group_ranges, group_extension
+
+    def get_voice_group_ranges_full(self,
+                                    solistas=None,
+                                    best_fit=None,
+                                    not_fit=None,
+                                    coverage: float = 1.0) -> dict:
+        """
+        Calcula os ranges do grupo por voz percorrendo todos os coristas
+        (referência de get_voice_group_ranges).
 
         - group_ranges: desconsidera (quando best_fit e not_fit são passados) coristas em `not_fit`
           que NÃO estão em nenhuma lista dos valores de `best_fit`.
@@ -698,12 +761,9 @@ class CoristasManager:
         voice_groups_for_range = {v: [] for v in VOICES}  # com filtro (group_ranges)
         voice_groups_for_extension = {v: [] for v in VOICES}  # sem filtro (group_extension)
 
-        # Agrupa coristas por voz atribuída
-        for corista, info in self.coristas.items():
-            voz = info['voz_atribuida']
-            min_midi = librosa.note_to_midi(info['range_min'])
-            max_midi = librosa.note_to_midi(info['range_max'])
-
+        # Agrupa coristas por voz atribuída (ranges já em MIDI no roster)
+        roster = Roster.from_coristas(self.coristas)
+        for corista, voz, min_midi, max_midi in zip(roster.names, roster.voices, roster.mins, roster.maxs):
             # Sempre entra na extensão
             voice_groups_for_extension[voz].append((min_midi, max_midi))
 
@@ -718,25 +778,21 @@ class CoristasManager:
         for voz in VOICES:
             # group_ranges (com filtro)
             if voice_groups_for_range[voz]:
-                mins = [r[0] for r in voice_groups_for_range[voz]]
-                maxs = [r[1] for r in voice_groups_for_range[voz]]
+                mins = np.sort([r[0] for r in voice_groups_for_range[voz]])
+                maxs = np.sort([r[1] for r in voice_groups_for_range[voz]])
 
-                group_min = max(mins)  # maior mínimo
-                group_max = min(maxs)  # menor máximo
-
-                if group_min <= group_max:
-                    group_ranges[voz] = (
-                        librosa.midi_to_note(int(group_min)),
-                        librosa.midi_to_note(int(group_max)),
-                    )
+                # maior mínimo e menor máximo (ou o range de `coverage` do naipe)
+                group_range = coverage_range(mins, maxs, coverage)
+                if group_range is not None:
+                    group_ranges[voz] = group_range.notes()
 
             # group_extension (sem filtro)
             if voice_groups_for_extension[voz]:
                 mins_all = [r[0] for r in voice_groups_for_extension[voz]]
                 maxs_all = [r[1] for r in voice_groups_for_extension[voz]]
                 group_extension[voz] = (
-                    librosa.midi_to_note(int(min(mins_all))),
-                    librosa.midi_to_note(int(max(maxs_all))),
+                    midi_to_note(min(mins_all)),
+                    midi_to_note(max(maxs_all)),
                 )
 
         if solistas:
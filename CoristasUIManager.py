@@ -5,15 +5,17 @@ Responsabilidades:
 - Ordenar coristas por coluna
 - Adicionar/remover/editar coristas via UI
 - Gerenciar grupos de coristas
+- Importar coristas de planilhas (CSV/.xlsx) com relatório por linha
 - Sincronizar UI com dados do CoristasManager
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import re
-import librosa
 from Constants import VOICES, VOICE_BASE_RANGES
+from CoristasImport import read_rows, summarize, write_report
 from KeyboardVisualizer import KeyboardVisualizer
+from RangeModel import note_to_midi
 
 
 class CoristasUIManager:
@@ -103,6 +105,20 @@ class CoristasUIManager:
             command=self.add_group
         ).pack(pady=2)
 
+        # Botão ranges base do grupo
+        ttk.Button(
+            group_frame,
+            text="Ranges Base do Grupo",
+            command=lambda: self.edit_base_ranges(group_frame.winfo_toplevel())
+        ).pack(pady=2)
+
+        # Botão importar coristas de planilha
+        ttk.Button(
+            group_frame,
+            text="Importar Planilha",
+            command=lambda: self.import_coristas(group_frame.winfo_toplevel())
+        ).pack(pady=2)
+
     def reload_table(self
                      ):
         if self.tree_coristas is None:
@@ -170,6 +186,175 @@ class CoristasUIManager:
             self.coristas_mgr.coristas.clear()
             self._on_group_selected()
 
+    def edit_base_ranges(self,
+                         master):
+        """
+        Abre a janela de ranges base do grupo atual.
+
+        Salvar grava os ranges e reclassifica todos os coristas do grupo de uma vez.
+
+        Args:
+            master: Janela principal (para criar Toplevel)
+        """
+        if not self.coristas_mgr.grupo:
+            messagebox.showwarning("Aviso", "Selecione um grupo")
+            return
+
+        dialog = tk.Toplevel(master)
+        dialog.title(f"Ranges Base - {self.coristas_mgr.grupo}")
+
+        ranges_frame = ttk.LabelFrame(dialog, text="Range de referência de cada voz", padding=10)
+        ranges_frame.pack(fill="x", padx=10, pady=10)
+
+        ttk.Label(ranges_frame, text="Mínimo", font=("Arial", 10, "bold")).grid(row=0, column=1, padx=5, pady=5)
+        ttk.Label(ranges_frame, text="Máximo", font=("Arial", 10, "bold")).grid(row=0, column=2, padx=5, pady=5)
+
+        entries = {}
+        for row, voz in enumerate(VOICES, start=1):
+            range_min, range_max = self.coristas_mgr.base_ranges.get(voz, VOICE_BASE_RANGES[voz])
+            ttk.Label(ranges_frame, text=f"{voz}:", font=("Arial", 10, "bold")).grid(
+                row=row, column=0, sticky="w", padx=5, pady=3
+            )
+            var_min = tk.StringVar(value=range_min)
+            var_max = tk.StringVar(value=range_max)
+            ttk.Entry(ranges_frame, textvariable=var_min, width=8).grid(row=row, column=1, padx=5, pady=3)
+            ttk.Entry(ranges_frame, textvariable=var_max, width=8).grid(row=row, column=2, padx=5, pady=3)
+            ttk.Label(ranges_frame, text=f"(padrão: {VOICE_BASE_RANGES[voz][0]} - {VOICE_BASE_RANGES[voz][1]})",
+                      font=("Arial", 8), foreground="#666").grid(row=row, column=3, sticky="w", padx=5)
+            entries[voz] = (var_min, var_max)
+
+        def apply(ranges):
+            try:
+                changed = self.coristas_mgr.set_base_ranges(ranges)
+            except ValueError as e:
+                messagebox.showerror("Erro", f"Erro ao validar ranges: {str(e)}")
+                return
+            except Exception as e:
+                messagebox.showerror("Erro ao salvar", f"Erro ao salvar ranges base: {str(e)}")
+                return
+
+            self.reload_table()
+            if self.on_reload_callback:
+                self.on_reload_callback()
+
+            messagebox.showinfo("Sucesso", f"Ranges base salvos. {len(changed)} corista(s) reclassificado(s).")
+            dialog.destroy()
+
+        def confirm():
+            apply({voz: (var_min.get(), var_max.get()) for voz, (var_min, var_max) in entries.items()})
+
+        # Botões
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(pady=10)
+
+        ttk.Button(button_frame, text="Salvar", command=confirm).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="Restaurar Padrão", command=lambda: apply(None)).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="Cancelar", command=dialog.destroy).pack(side="left", padx=10)
+
+    def import_coristas(self,
+                        master):
+        """
+        Importa coristas de um CSV/.xlsx para o grupo atual.
+
+        Mostra antes o relatório por linha (validação e voz calculada); Importar
+        grava todas as linhas válidas de uma vez.
+
+        Args:
+            master: Janela principal (para criar Toplevel)
+        """
+        if not self.coristas_mgr.grupo:
+            messagebox.showwarning("Aviso", "Selecione um grupo")
+            return
+
+        path = filedialog.askopenfilename(
+            parent=master,
+            title="Importar Coristas",
+            filetypes=[("Planilhas", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx"), ("Todos", "*.*")]
+        )
+        if not path:
+            return
+
+        try:
+            rows = read_rows(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Erro ao ler planilha: {str(e)}")
+            return
+
+        dialog = tk.Toplevel(master)
+        dialog.title(f"Importar Coristas - {self.coristas_mgr.grupo}")
+        dialog.geometry("800x500")
+
+        label_resumo = ttk.Label(dialog, font=("Arial", 10, "bold"))
+        label_resumo.pack(anchor="w", padx=10, pady=(10, 5))
+
+        columns = ("Linha", "Nome", "Situação", "Detalhes")
+        tree_frame = ttk.Frame(dialog)
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
+        for col, width in zip(columns, (60, 180, 90, 420)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width, anchor="w")
+        tree.tag_configure("erro", foreground="red")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        var_substituir = tk.BooleanVar(value=False)
+        state = {'report': [], 'done': False}
+
+        def show(report, prefix):
+            state['report'] = report
+            tree.delete(*tree.get_children())
+            for entry in report:
+                tree.insert("", "end", values=(entry['linha'], entry['nome'], entry['status'], entry['mensagem']),
+                            tags=(entry['status'],))
+            label_resumo.config(text=f"{prefix}{summarize(report)}")
+            valid = sum(1 for entry in report if entry['status'] != 'erro')
+            btn_importar.config(text=f"Importar {valid} corista(s)",
+                                state="normal" if valid and not state['done'] else "disabled")
+
+        def preview():
+            show(self.coristas_mgr.import_coristas(rows, overwrite=var_substituir.get(), dry_run=True),
+                 f"{len(rows)} linha(s) em {path}: ")
+
+        def confirm():
+            try:
+                report = self.coristas_mgr.import_coristas(rows, overwrite=var_substituir.get())
+            except Exception as e:
+                messagebox.showerror("Erro ao salvar", f"Erro ao importar coristas: {str(e)}")
+                return
+            state['done'] = True
+            check_substituir.config(state="disabled")
+            show(report, "Importação concluída: ")
+
+            self.reload_table()
+            if self.on_reload_callback:
+                self.on_reload_callback()
+
+            messagebox.showinfo("Sucesso", f"Importação concluída: {summarize(report)}.", parent=dialog)
+
+        def save_report():
+            report_path = filedialog.asksaveasfilename(parent=dialog, defaultextension=".csv",
+                                                       filetypes=[("CSV", "*.csv")])
+            if report_path:
+                write_report(state['report'], report_path)
+
+        check_substituir = ttk.Checkbutton(dialog, text="Substituir coristas que já existem no grupo",
+                                           variable=var_substituir, command=preview)
+        check_substituir.pack(anchor="w", padx=10)
+
+        # Botões
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(pady=10)
+
+        btn_importar = ttk.Button(button_frame, command=confirm)
+        btn_importar.pack(side="left", padx=10)
+        ttk.Button(button_frame, text="Salvar Relatório", command=save_report).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="Fechar", command=dialog.destroy).pack(side="left", padx=10)
+
+        preview()
+
     def get_selected_corista(self
                              ):
         """
@@ -310,7 +495,7 @@ class CoristasUIManager:
             try:
                 #librosa.note_to_midi(range_min)
                 #librosa.note_to_midi(range_max)
-                if librosa.note_to_midi(range_min) > librosa.note_to_midi(range_max):
+                if note_to_midi(range_min) > note_to_midi(range_max):
                     return False
             except:
                 return False
@@ -350,7 +535,7 @@ class CoristasUIManager:
                 for v in vozes_recomendadas:
                     def on_select_recomendada(voice=v):
                         var_voz.set(voice)
-                        voice_min_str, voice_max_str = VOICE_BASE_RANGES[voice]
+                        voice_min_str, voice_max_str = self.coristas_mgr.base_ranges[voice]
                         keyboard.update(range_min, range_max, voice_min_str, voice_max_str)
 
                     ttk.Radiobutton(
@@ -373,7 +558,7 @@ class CoristasUIManager:
 
                     def on_select_possivel(voice=v):
                         var_voz.set(voice)
-                        voice_min_str, voice_max_str = VOICE_BASE_RANGES[voice]
+                        voice_min_str, voice_max_str = self.coristas_mgr.base_ranges[voice]
                         keyboard.update(range_min, range_max, voice_min_str, voice_max_str)
 
                     ttk.Radiobutton(
@@ -388,7 +573,7 @@ class CoristasUIManager:
             # Atualiza teclado
             voz_selecionada = var_voz.get()
             if voz_selecionada:
-                voice_min_str, voice_max_str = VOICE_BASE_RANGES[voz_selecionada]
+                voice_min_str, voice_max_str = self.coristas_mgr.base_ranges[voz_selecionada]
                 keyboard.update(range_min, range_max, voice_min_str, voice_max_str)
 
             return True
@@ -441,7 +626,7 @@ class CoristasUIManager:
 
             # Validar ranges
             try:
-                if librosa.note_to_midi(novo_range_min) > librosa.note_to_midi(novo_range_max):
+                if note_to_midi(novo_range_min) > note_to_midi(novo_range_max):
                     raise ValueError(f"Range inválido: {novo_range_min} > {novo_range_max}")
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao validar range: {str(e)}")
@@ -514,9 +699,9 @@ class CoristasUIManager:
 
         if col_name == "Range":
             if not self.sort_reverse:
-                items.sort(key=lambda x: librosa.note_to_midi(x[1][1].split("⟷")[0].strip()))
+                items.sort(key=lambda x: note_to_midi(x[1][1].split("⟷")[0].strip()))
             else:
-                items.sort(key=lambda x: librosa.note_to_midi(x[1][1].split("⟷")[1].strip()), reverse=True)
+                items.sort(key=lambda x: note_to_midi(x[1][1].split("⟷")[1].strip()), reverse=True)
         elif col_name == "Voz Atribuída":
             rank = {k: i for i, k in enumerate(VOICE_BASE_RANGES)}
 
@@ -568,10 +753,7 @@ class CoristasUIManager:
         """Callback quando grupo é selecionado."""
         grupo = self.grupo_combo.get()
         self.grupo_nome_var.set(grupo)
-        self.coristas_mgr.grupo = grupo
-
-        data = self.coristas_mgr.read_data()
-        self.coristas_mgr.coristas = data["grupos"][grupo]
+        self.coristas_mgr.set_group(grupo)
 
         self.reload_table()
 
@@ -1,10 +1,12 @@
-import json
 import os
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+from Serializers import dump_file, load_file, serializer_for_path
 
 class DataStore:
     """
-    Gerencia toda a persistência em um único arquivo JSON unificado.
+    Gerencia toda a persistência em um único arquivo JSON unificado
+    (ou msgpack, se o arquivo tiver extensão .msgpack; ver Serializers).
     Estrutura:
     {
         "coristas": [
@@ -40,16 +42,89 @@ class DataStore:
     }
     """
 
-    def __init__(self, filepath: str = "music_unified.json"):
+    def __init__(self, filepath: str = "music_unified.json", serializer=None):
         self.filepath = filepath
+        self.serializer = serializer or serializer_for_path(filepath)
         self.data = self._load()
+        self._batch_depth = 0
+        self._dirty = False
+        self.reindex()
+
+    @staticmethod
+    def _normalize(name) -> str:
+        return (name or "").strip().lower()
+
+    # ========== ÍNDICES ==========
+    # nome normalizado -> posição na lista (vale a primeira ocorrência), mantidos
+    # pelos métodos abaixo. Listas trocadas ou com tamanho diferente (itens
+    # incluídos/removidos direto nelas) e posições que não conferem remontam o
+    # índice na consulta; quem renomear itens direto nas listas chama reindex().
+    def reindex(self) -> None:
+        """Remonta os índices de músicas e coristas (após editar as listas diretamente)."""
+        self._indexes = {
+            "musicas": self._build_index(self.get_musicas(), "name"),
+            "coristas": self._build_index(self.get_coristas(), "nome"),
+        }
+
+    def _build_index(self, items: list, key: str) -> dict:
+        index = {}
+        for i, item in enumerate(items):
+            index.setdefault(self._normalize(item.get(key)), i)
+        return {"positions": index, "size": len(items), "items": items}
+
+    def _current_index(self, kind: str) -> dict:
+        """Índice de `kind`, remontado se a lista foi trocada ou mudou de tamanho por fora."""
+        items = self.data.setdefault(kind, [])
+        index = self._indexes[kind]
+        if index["items"] is not items or index["size"] != len(items):
+            self.reindex()
+            index = self._indexes[kind]
+        return index
+
+    def _lookup(self, kind: str, key: str, name) -> Optional[int]:
+        """Posição do item pelo nome (case-insensitive), ou None."""
+        index = self._current_index(kind)
+        items = index["items"]
+        name_normalized = self._normalize(name)
+        pos = index["positions"].get(name_normalized)
+        if pos is None or self._normalize(items[pos].get(key)) == name_normalized:
+            return pos
+        # posição que não confere: item renomeado ou reordenado direto na lista
+        self.reindex()
+        return self._indexes[kind]["positions"].get(name_normalized)
+
+    def _indexed_append(self, kind: str, key: str, item: dict) -> None:
+        index = self._current_index(kind)
+        items = index["items"]
+        items.append(item)
+        index["positions"].setdefault(self._normalize(item.get(key)), len(items) - 1)
+        index["size"] = len(items)
+
+    # ========== GRAVAÇÃO EM LOTE ==========
+    def _changed(self) -> bool:
+        """Marca alteração; salva na hora, ou no fim do batch() em andamento."""
+        if self._batch_depth:
+            self._dirty = True
+            return True
+        return self.save()
+
+    @contextmanager
+    def batch(self):
+        """Agrupa várias alterações em um único save() no final."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._dirty:
+                self._dirty = False
+                self.save()
 
     def _load(self) -> dict:
         """Carrega dados do arquivo ou cria estrutura vazia."""
         if os.path.exists(self.filepath):
             try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return load_file(self.filepath, self.serializer)
             except Exception as e:
                 print(f"Erro ao carregar {self.filepath}: {e}")
                 return self._empty_structure()
@@ -60,10 +135,9 @@ class DataStore:
         return {"coristas": [], "musicas": []}
 
     def save(self) -> bool:
-        """Salva dados no arquivo JSON."""
+        """Salva dados no arquivo (JSON indentado ou msgpack)."""
         try:
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            dump_file(self.filepath, self.data, self.serializer)
             return True
         except Exception as e:
             print(f"Erro ao salvar {self.filepath}: {e}")
@@ -73,23 +147,38 @@ class DataStore:
     def get_coristas(self) -> List[dict]:
         return self.data.setdefault("coristas", [])
 
+    def find_corista_by_name(self, name: str) -> Optional[dict]:
+        """Busca corista por nome (case-insensitive)."""
+        pos = self._lookup("coristas", "nome", name)
+        return self.get_coristas()[pos] if pos is not None else None
+
     def add_corista(self, corista: dict) -> None:
-        self.get_coristas().append(corista)
-        self.save()
+        self._indexed_append("coristas", "nome", corista)
+        self._changed()
+
+    def add_coristas(self, coristas: Iterable[dict]) -> None:
+        """Adiciona vários coristas com um único save()."""
+        with self.batch():
+            for corista in coristas:
+                self.add_corista(corista)
 
     def remove_corista(self, index: int) -> bool:
         coristas = self.get_coristas()
         if 0 <= index < len(coristas):
             coristas.pop(index)
-            self.save()
+            self.reindex()
+            self._changed()
             return True
         return False
 
     def update_corista(self, index: int, corista: dict) -> bool:
         coristas = self.get_coristas()
         if 0 <= index < len(coristas):
+            renamed = self._normalize(coristas[index].get("nome")) != self._normalize(corista.get("nome"))
             coristas[index] = corista
-            self.save()
+            if renamed:
+                self.reindex()
+            self._changed()
             return True
         return False
 
@@ -99,29 +188,51 @@ class DataStore:
 
     def find_music_by_name(self, name: str) -> Optional[dict]:
         """Busca música por nome (case-insensitive)."""
-        name_normalized = (name or "").strip().lower()
-        for m in self.get_musicas():
-            if (m.get("name") or "").strip().lower() == name_normalized:
-                return m
-        return None
+        pos = self._lookup("musicas", "name", name)
+        return self.get_musicas()[pos] if pos is not None else None
 
     def add_or_update_music(self, music: dict) -> None:
         """Adiciona ou atualiza música pelo nome."""
-        existing = self.find_music_by_name(music.get("name", ""))
-        if existing:
-            idx = self.get_musicas().index(existing)
-            self.get_musicas()[idx] = music
+        pos = self._lookup("musicas", "name", music.get("name", ""))
+        if pos is not None:
+            self.get_musicas()[pos] = music
         else:
-            self.get_musicas().append(music)
-        self.save()
+            self._indexed_append("musicas", "name", music)
+        self._changed()
+
+    def add_or_update_musics(self, musics: Iterable[dict]) -> None:
+        """Adiciona ou atualiza várias músicas com um único save()."""
+        with self.batch():
+            for music in musics:
+                self.add_or_update_music(music)
 
     def remove_music(self, name: str) -> bool:
-        music = self.find_music_by_name(name)
-        if music:
-            self.get_musicas().remove(music)
-            self.save()
+        pos = self._lookup("musicas", "name", name)
+        if pos is not None:
+            self.get_musicas().pop(pos)
+            self.reindex()
+            self._changed()
             return True
         return False
 
+    def remove_musics(self, names: Iterable[str]) -> int:
+        """
+        Remove as músicas com esses nomes com um único save(); retorna quantas foram removidas.
+        Como remove_music, tira só a primeira ocorrência de cada nome.
+        """
+        targets = {self._normalize(n) for n in names}
+        musicas = self.get_musicas()
+        first = {}
+        for i, music in enumerate(musicas):
+            name = self._normalize(music.get("name"))
+            if name in targets:
+                first.setdefault(name, i)
+        if first:
+            drop = set(first.values())
+            musicas[:] = [m for i, m in enumerate(musicas) if i not in drop]
+            self.reindex()
+            self._changed()
+        return len(first)
+
     def get_music_names(self) -> List[str]:
         return [m.get("name", "") for m in self.get_musicas()]
\ No newline at end of file
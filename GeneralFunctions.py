@@ -2,7 +2,7 @@ from Constants import SEMITONE_TO_SHARP, SEMITONE_TO_BEMOL, NOTE_TO_SEMITONE
 import numpy as np
 import sounddevice as sd
 import threading
-import librosa
+from NoteMath import note_to_midi, midi_to_note, midi_to_hz, hz_to_midi
 
 
 def rreplace(s, old, new):
@@ -88,22 +88,10 @@ def generate_note_range(start_note,
     Returns:
         list: Lista de notas no formato string (ex: ['C2', 'C#2', 'D2', ...])
     """
-    notes = []
+    start_midi = note_to_midi(start_note)
+    end_midi = note_to_midi(end_note)
 
-    # Encontra índices de início e fim
-    start_parts = parse_note(start_note)
-    end_parts = parse_note(end_note)
-
-    for octave in range(start_parts[1], end_parts[1] + 1):
-        for note_name in SEMITONE_TO_SHARP:
-            note = f"{note_name}{octave}"
-
-            # Verifica se está no range
-            if librosa.note_to_midi(note) >= librosa.note_to_midi(start_note) and \
-                    librosa.note_to_midi(note) <= librosa.note_to_midi(end_note):
-                notes.append(note)
-
-    return notes
+    return [midi_to_note(m) for m in range(start_midi, end_midi + 1)]
 
 
 # ===== FUNÇÕES DE ÁUDIO =====
@@ -122,13 +110,13 @@ def play_note(note,
         try:
             if isinstance(note, float):
                 frequency = note
-                midi = librosa.hz_to_midi(note)
+                midi = hz_to_midi(note)
             elif isinstance(note, int):
                 midi = note
-                frequency = librosa.midi_to_hz(midi)
+                frequency = midi_to_hz(midi)
             elif isinstance(note, str):
-                midi = librosa.note_to_midi(note)
-                frequency = librosa.midi_to_hz(midi)
+                midi = note_to_midi(note)
+                frequency = midi_to_hz(midi)
 
             # Parâmetros de áudio
             sample_rate = 44100
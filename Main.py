@@ -4,7 +4,7 @@ Responsabilidade única: Orquestração e inicialização da aplicação
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import webbrowser
 from pathlib import Path
 
@@ -30,6 +30,15 @@ class VoiceRangeApp:
     Responsabilidade: Orquestração e coordenação entre os componentes.
     """
 
+    # Opções de cobertura do range do grupo (fração de cada naipe)
+    GROUP_RANGE_COVERAGES = {
+        "100% (interseção)": 1.0,
+        "90% do naipe": 0.9,
+        "80% do naipe": 0.8,
+        "70% do naipe": 0.7,
+        "50% do naipe": 0.5,
+    }
+
     def __init__(self, master):
         self.master = master
         self.master.title("Gerenciamento do Grupo Vocal - By Eduardo Lutzer")
@@ -62,6 +71,10 @@ class VoiceRangeApp:
         # Labels
         self.sugest_label = ttk.Label(self.buttons_frame, text="Sugestão de Formação:", font=("Arial, 10"), padding=10)
 
+        # Painel de depuração: tempos das etapas da análise (Ctrl+Shift+P)
+        self.profiler_window = None
+        self.master.bind("<Control-P>", lambda e: self.show_profiler_panel())
+
     # ============================================================
     # ABA 1: GERENCIAR CORISTAS
     # ============================================================
@@ -252,6 +265,19 @@ class VoiceRangeApp:
         self.calculate_voices_button = ttk.Button(self.buttons_frame, text="Aplicar Vozes", command=self.apply_best_voices)
         self.calculate_voices_button.pack(padx=5)
 
+        # ===== BUSCA CONJUNTA (TOM + FORMAÇÃO) =====
+        self.joint_search_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.buttons_frame, text="Tom + Vozes", variable=self.joint_search_var,
+                        command=self.toggle_joint_search).pack(padx=5)
+
+        # ===== COBERTURA DO RANGE DO GRUPO =====
+        ttk.Label(self.buttons_frame, text="Range do grupo:").pack(padx=5)
+        self.coverage_combo = ttk.Combobox(self.buttons_frame, values=list(self.GROUP_RANGE_COVERAGES),
+                                           state="readonly", width=16)
+        self.coverage_combo.current(0)
+        self.coverage_combo.bind("<<ComboboxSelected>>", self._on_coverage_selected)
+        self.coverage_combo.pack(padx=5)
+
         # Slider de conforto
         self.confort_slider = tk.Scale(
             self.buttons_frame,
@@ -283,7 +309,9 @@ class VoiceRangeApp:
 
     def apply_best_voices(self):
         try:
-            best_voices = self.analysis_mgr.analysis_all['possible_fit'].get(int(self.t_slider.get()), None)
+            T = int(self.t_slider.get())
+            self.analysis_mgr.ensure_formation(T)
+            best_voices = self.analysis_mgr.analysis_all['possible_fit'].get(T, None)
 
             # Coletar todas as mudanças propostas
             changes = []
@@ -310,7 +338,7 @@ class VoiceRangeApp:
             if selected_changes:
                 applied_msg = ''
                 for change in selected_changes:
-                    self.coristas_mgr.coristas[change['name']]['voz_atribuida'] = change['to']
+                    self.coristas_mgr.set_voz_atribuida(change['name'], change['to'])
                     applied_msg += f"- {change['name']} foi alterado de {change['from']} para {change['to']}\n"
 
                 applied_msg += '\nPara salvar as alterações, salve a música'
@@ -401,6 +429,61 @@ class VoiceRangeApp:
         dialog.wait_window()
 
         return result
+
+    def show_profiler_panel(self):
+        """
+        Painel de depuração com o tempo de cada etapa da análise.
+
+        Enquanto o painel está aberto o AnalysisManager mede as etapas;
+        ao fechar, a medição é desligada.
+        """
+        if self.profiler_window is not None and self.profiler_window.winfo_exists():
+            self.profiler_window.lift()
+            return
+
+        profiler = self.analysis_mgr.enable_profiling(True)
+
+        dialog = tk.Toplevel(self.master)
+        dialog.title('Perfil da Análise')
+        dialog.geometry('560x420')
+        self.profiler_window = dialog
+
+        main_frame = ttk.Frame(dialog, padding="10")
+        main_frame.pack(fill='both', expand=True)
+
+        text = tk.Text(main_frame, font=('Courier', 9), wrap='none')
+        text.pack(fill='both', expand=True)
+
+        def refresh():
+            text.config(state='normal')
+            text.delete('1.0', tk.END)
+            text.insert(tk.END, profiler.format_report())
+            text.config(state='disabled')
+
+        def save_json():
+            path = filedialog.asksaveasfilename(parent=dialog, defaultextension='.json',
+                                                filetypes=[('JSON', '*.json')])
+            if path:
+                profiler.dump(path)
+
+        def clear():
+            profiler.reset()
+            refresh()
+
+        def close():
+            self.analysis_mgr.enable_profiling(False)
+            self.profiler_window = None
+            dialog.destroy()
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill='x', pady=(10, 0))
+        ttk.Button(button_frame, text='Atualizar', command=refresh).pack(side='left', padx=5)
+        ttk.Button(button_frame, text='Salvar JSON...', command=save_json).pack(side='left', padx=5)
+        ttk.Button(button_frame, text='Limpar', command=clear).pack(side='left', padx=5)
+
+        dialog.protocol('WM_DELETE_WINDOW', close)
+        refresh()
+
     # ============================================================
     # CALLBACKS - CORISTAS
     # ============================================================
@@ -804,7 +887,7 @@ class VoiceRangeApp:
         for voice, coristas in voices.items():
             for corista_nome in coristas:
                 if corista_nome in self.coristas_mgr.coristas:
-                    self.coristas_mgr.coristas[corista_nome]['voz_atribuida'] = voice
+                    self.coristas_mgr.set_voz_atribuida(corista_nome, voice)
 
         # Atualisa lista de vozes de coristas
         self.coristas_ui_mgr.reload_table()
@@ -892,6 +975,27 @@ class VoiceRangeApp:
             self.dynamic_ranges_button.config(text="Vozes do Grupo")
         self.run_analysis()
 
+    def _on_coverage_selected(self,
+                              event):
+        """Callback quando a cobertura do range do grupo é escolhida."""
+        coverage = self.GROUP_RANGE_COVERAGES[self.coverage_combo.get()]
+        ranges = self.analysis_mgr.set_group_range_coverage(coverage)
+        if not self.analysis_mgr._use_group_ranges:
+            return
+        if hasattr(self.visualizer, "set_group_ranges"):
+            self.visualizer.set_group_ranges(ranges)
+        self.run_analysis()
+        if self.analysis_mgr.analysis_all.get('best_T') is not None:
+            self.t_slider.set(self.analysis_mgr.analysis_all['best_T'])
+
+    def toggle_joint_search(self):
+        """Alterna a escolha do melhor T entre só conforto e tom + formação."""
+        mode = "conjunta" if self.joint_search_var.get() else "conforto"
+        self.analysis_mgr.set_search_mode(mode)
+        self.run_analysis()
+        if self.analysis_mgr.analysis_all.get('best_T') is not None:
+            self.t_slider.set(self.analysis_mgr.analysis_all['best_T'])
+
     def run_analysis(self,
                      confort=None):
         """Executa análise de transposição."""
@@ -903,7 +1007,9 @@ class VoiceRangeApp:
 
         # Executa análise
         viz_data = self.analysis_mgr.get_visualization_data(int(self.t_slider.get()))
-        analysis_result = self.analysis_mgr.run_analysis(piece_ranges, root, mode, viz_data, confort)
+        music_name = self.music_ui_mgr.music_name_var.get()
+        analysis_result = self.analysis_mgr.run_analysis(piece_ranges, root, mode, viz_data, confort,
+                                                         music_name=music_name)
 
         if analysis_result:
             # Atualiza exibição
@@ -927,6 +1033,7 @@ class VoiceRangeApp:
 
             # Atualiza visualização
             viz_data = self.analysis_mgr.get_visualization_data(T)
+            self.visualizer.base_ranges = self.coristas_mgr.base_ranges
             self.visualizer.update(
                 piece_ranges, T, per_voice_Os,
                 group_ranges=viz_data['group_ranges'],
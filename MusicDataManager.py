@@ -68,20 +68,13 @@ class MusicDataManager:
         self.music_library.clear()
         self.music_names = []
 
-        data, musicas, groups = self.coristas_mgr.read_data(
-            extract='musicas',
-            all_in=True,
-            group_list=True
-        )
-
-        if grupo:
-            self.music_library = {
-                nome: info
-                for nome, info in musicas.items()
-                if info.get("grupo") == grupo
-            }
-        else:
-            self.music_library = musicas
+        storage = self.coristas_mgr.storage
+        try:
+            self.music_library = storage.list_musics(grupo or None)
+            groups = storage.list_groups()
+        except Exception as e:
+            print(f"Erro ao ler dados: {e}")
+            groups = []
 
         self.music_names = list(self.music_library.keys())
 
@@ -0,0 +1,221 @@
+"""
+NoteMath - Conversões entre nota, MIDI, frequência (Hz) e cents
+Responsabilidades:
+- Tabelas pré-calculadas nota <-> MIDI (sem interpretar texto a cada chamada)
+- Fórmulas fechadas e vetorizadas (NumPy) para MIDI <-> Hz e cents
+- Referência do Lá 4 (A4) configurável
+- Gerar a tabela de frequências das notas usada pelo teste vocal
+
+Escalares retornam tipos do Python (int, float, str); listas e arrays retornam np.ndarray.
+"""
+import math
+import re
+import numpy as np
+
+# Referência padrão do Lá 4 (pode ser alterada com set_a4)
+A4_HZ = 440.0
+A4_MIDI = 69
+
+NOTE_NAMES_SHARP = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+NOTE_NAMES_UNICODE = ('C', 'C♯', 'D', 'D♯', 'E', 'F', 'F♯', 'G', 'G♯', 'A', 'A♯', 'B')
+
+# Faixa coberta pelas tabelas (C-1 = 0 ... G9 = 127)
+MIDI_MIN = 0
+MIDI_MAX = 127
+
+_LETTER_SEMITONE = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+_ACCIDENTALS = {'': 0, '#': 1, '♯': 1, 'b': -1, '♭': -1, '##': 2, '𝄪': 2, 'bb': -2, '𝄫': -2}
+
+_NOTE_PATTERN = re.compile(r"^\s*([A-Ga-g])(#{1,2}|b{1,2}|♯|♭|𝄪|𝄫|!{1,2})?(-?\d+)\s*$")
+
+
+def _build_note_table() -> dict:
+    table = {}
+    for octave in range(-1, 10):
+        for letter, semitone in _LETTER_SEMITONE.items():
+            for acc, delta in _ACCIDENTALS.items():
+                midi = 12 * (octave + 1) + semitone + delta
+                table[f"{letter}{acc}{octave}"] = midi
+    return table
+
+
+# Todas as grafias usuais (C#4, Db4, C♯4, D♭4, ...) -> MIDI
+NOTE_TO_MIDI_TABLE = _build_note_table()
+# MIDI -> nome (sustenidos em ASCII, como no JSON, e em Unicode, como o librosa)
+MIDI_TO_NOTE_TABLE = tuple(f"{NOTE_NAMES_SHARP[m % 12]}{m // 12 - 1}" for m in range(MIDI_MIN, MIDI_MAX + 1))
+MIDI_TO_NOTE_TABLE_UNICODE = tuple(f"{NOTE_NAMES_UNICODE[m % 12]}{m // 12 - 1}" for m in range(MIDI_MIN, MIDI_MAX + 1))
+
+
+def set_a4(hz: float):
+    """Altera a referência padrão do Lá 4 (ex: 442.0) usada quando a4 não é informado."""
+    global A4_HZ
+    if hz <= 0:
+        raise ValueError(f"Referência inválida para A4: {hz}")
+    A4_HZ = float(hz)
+
+
+def _a4(a4):
+    return A4_HZ if a4 is None else float(a4)
+
+
+def _scalar(x) -> bool:
+    return isinstance(x, (int, float, np.number)) or np.ndim(x) == 0
+
+
+# ===== NOTA <-> MIDI =====
+
+def note_to_midi(note: str) -> int:
+    """
+    Converte uma nota em número MIDI (ex: "C4" -> 60, "Db4" -> 61).
+
+    Aceita sustenidos/bemóis em ASCII ou Unicode e letras minúsculas.
+    """
+    midi = NOTE_TO_MIDI_TABLE.get(note)
+    if midi is not None:
+        return midi
+
+    m = _NOTE_PATTERN.match(note) if isinstance(note, str) else None
+    if not m:
+        raise ValueError(f"Nota inválida: {note!r}")
+    letter, acc, octave = m.groups()
+    acc = (acc or '').replace('!', 'b')
+    return 12 * (int(octave) + 1) + _LETTER_SEMITONE[letter.upper()] + _ACCIDENTALS[acc]
+
+
+def notes_to_midi(notes) -> np.ndarray:
+    """Versão vetorizada de note_to_midi para uma lista de notas."""
+    return np.fromiter((note_to_midi(n) for n in notes), dtype=int, count=len(notes))
+
+
+def midi_to_note(midi, unicode: bool = False):
+    """
+    Converte número(s) MIDI em nota(s), arredondando para o semitom mais próximo.
+
+    Args:
+        midi: int/float ou array de números MIDI
+        unicode: True para usar '♯' (mesmo formato de librosa.midi_to_note)
+
+    Returns:
+        str (escalar) ou np.ndarray de str
+    """
+    names = MIDI_TO_NOTE_TABLE_UNICODE if unicode else MIDI_TO_NOTE_TABLE
+    if _scalar(midi):
+        m = int(round(midi))  # round() do Python também arredonda .5 para o par, como np.round
+        if MIDI_MIN <= m <= MIDI_MAX:
+            return names[m]
+        pc_names = NOTE_NAMES_UNICODE if unicode else NOTE_NAMES_SHARP
+        return f"{pc_names[m % 12]}{m // 12 - 1}"
+    return np.array([midi_to_note(m, unicode) for m in np.ravel(midi)]).reshape(np.shape(midi))
+
+
+# ===== MIDI <-> Hz =====
+
+def midi_to_hz(midi, a4=None):
+    """Frequência (Hz) de número(s) MIDI: a4 · 2^((m − 69) / 12)."""
+    if _scalar(midi):
+        return _a4(a4) * 2.0 ** ((float(midi) - A4_MIDI) / 12.0)
+    return _a4(a4) * np.exp2((np.asarray(midi, dtype=float) - A4_MIDI) / 12.0)
+
+
+def hz_to_midi(hz, a4=None):
+    """Número MIDI (fracionário) de frequência(s): 69 + 12 · log2(hz / a4)."""
+    if _scalar(hz):
+        return A4_MIDI + 12.0 * math.log2(float(hz) / _a4(a4))
+    return A4_MIDI + 12.0 * np.log2(np.asarray(hz, dtype=float) / _a4(a4))
+
+
+def note_to_hz(note: str, a4=None) -> float:
+    """Frequência (Hz) de uma nota."""
+    return midi_to_hz(note_to_midi(note), a4)
+
+
+def hz_to_note(hz, a4=None, unicode: bool = False):
+    """Nota mais próxima (em semitons) de frequência(s)."""
+    midi = hz_to_midi(hz, a4)
+    return midi_to_note(midi if _scalar(midi) else np.round(midi), unicode)
+
+
+# ===== CENTS =====
+
+def hz_to_cents(hz, ref_hz):
+    """Distância em cents de hz até ref_hz: 1200 · log2(hz / ref_hz)."""
+    if _scalar(hz) and _scalar(ref_hz):
+        return 1200.0 * math.log2(float(hz) / float(ref_hz))
+    return 1200.0 * np.log2(np.asarray(hz, dtype=float) / np.asarray(ref_hz, dtype=float))
+
+
+def hz_to_midi_cents(hz, a4=None):
+    """
+    Separa frequência(s) em (MIDI mais próximo, desvio em cents).
+
+    Returns:
+        (int, float) para escalar, ou (np.ndarray[int], np.ndarray[float])
+    """
+    midi = hz_to_midi(hz, a4)
+    if _scalar(hz):
+        nearest = int(round(midi))
+        return nearest, (midi - nearest) * 100.0
+    nearest = np.round(midi)
+    return nearest.astype(int), (midi - nearest) * 100.0
+
+
+# ===== TABELAS DE FREQUÊNCIA =====
+
+def note_frequency_table(lowest: str = "C0", highest: str = "B8", a4=None, decimals: int = 2) -> dict:
+    """
+    Gera {nota: frequência_em_Hz} de lowest até highest (sustenidos em ASCII).
+
+    Args:
+        lowest, highest: Notas dos extremos da tabela
+        a4: Referência do Lá 4 (padrão: A4_HZ)
+        decimals: Casas decimais das frequências (None = sem arredondar)
+    """
+    lo, hi = note_to_midi(lowest), note_to_midi(highest)
+    freqs = midi_to_hz(np.arange(lo, hi + 1), a4)
+    if decimals is not None:
+        freqs = np.round(freqs, decimals)
+    return {MIDI_TO_NOTE_TABLE[m]: float(f) for m, f in zip(range(lo, hi + 1), freqs)}
+
+
+_TABLE_INDEX = {}
+
+
+def _table_index(table: dict):
+    """(nomes em ordem, MIDI da primeira nota) de uma tabela, calculado uma vez por tabela."""
+    entry = _TABLE_INDEX.get(id(table))
+    if entry is None or entry[0] is not table or len(entry[1]) != len(table):
+        names = list(table)
+        entry = (table, names, note_to_midi(names[0]))
+        _TABLE_INDEX[id(table)] = entry
+    return entry[1], entry[2]
+
+
+def nearest_table_note(hz: float, table: dict):
+    """
+    Nota da tabela cuja frequência está mais próxima de hz (menor diferença em Hz).
+
+    Equivale a percorrer toda a tabela, mas só compara os dois semitons
+    vizinhos de hz. A tabela deve ter notas consecutivas (como note_frequency_table).
+
+    Returns:
+        (nota, diferença_em_Hz), ou (None, None) se hz for inválido
+    """
+    if hz is None or hz <= 0 or not table:
+        return None, None
+
+    names, lo = _table_index(table)
+    hi = lo + len(names) - 1
+
+    below = math.floor(hz_to_midi(hz))
+    best_note, best_diff = None, float('inf')
+    for m in (below - 1, below, below + 1, below + 2):  # margem para tabelas arredondadas
+        if lo <= m <= hi:
+            note = names[m - lo]
+            diff = abs(hz - table[note])
+            if diff < best_diff:
+                best_note, best_diff = note, diff
+
+    if best_note is None:  # fora da tabela: extremo mais próximo
+        best_note = names[0] if below < lo else names[-1]
+        best_diff = abs(hz - table[best_note])
+    return best_note, best_diff
@@ -0,0 +1,127 @@
+"""
+Profiler - Instrumentação opcional das etapas da análise
+Responsabilidades:
+- Medir o tempo de cada etapa (aninhadas: "run_analysis/formations/allocation")
+- Contar eventos (transposições avaliadas, estados da DP, acertos de cache...)
+- Gerar um relatório estruturado (dict), em texto ou gravado em JSON
+
+Desligado, o AnalysisManager usa NULL_PROFILER: stage() devolve sempre o mesmo
+contexto vazio e count() não faz nada, então não há medição nem alocação.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """Profiler desligado: todas as operações são vazias."""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def count(self, name, n=1):
+        pass
+
+    def reset(self):
+        pass
+
+    def report(self):
+        return {}
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class AnalysisProfiler:
+    """
+    Acumula tempos por etapa e contadores entre chamadas, até reset().
+
+    Uso:
+        prof = AnalysisProfiler()
+        with prof.stage("formations"):
+            ...
+        prof.count("T_evaluated", 23)
+        prof.dump("perfil.json")
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}     # caminho -> {"seconds": float, "calls": int}
+        self.counters = {}   # nome -> int
+        self._stack = []
+
+    @contextmanager
+    def stage(self,
+              name):
+        """Mede o bloco como uma etapa, aninhada na etapa em andamento."""
+        self._stack.append(name)
+        path = "/".join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            entry = self.stages.setdefault(path, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += elapsed
+            entry["calls"] += 1
+
+    def count(self,
+              name, n=1):
+        """Soma n ao contador `name`."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        """Zera etapas e contadores."""
+        self.stages.clear()
+        self.counters.clear()
+
+    def report(self):
+        """
+        Relatório estruturado.
+
+        Returns:
+            {"stages": {caminho: {"seconds", "calls"}}, "counters": {nome: int}}
+        """
+        return {
+            "stages": {path: dict(data) for path, data in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+    def format_report(self):
+        """Relatório em texto, com as etapas indentadas pela hierarquia."""
+        lines = ["Etapas (tempo acumulado / chamadas):"]
+        for path in sorted(self.stages):
+            data = self.stages[path]
+            depth = path.count("/")
+            name = path.rsplit("/", 1)[-1]
+            lines.append(f"{'  ' * depth}  {name:<{34 - 2 * depth}} "
+                         f"{data['seconds'] * 1000:10.2f} ms  x{data['calls']}")
+        if self.counters:
+            lines.append("")
+            lines.append("Contadores:")
+            for name in sorted(self.counters):
+                lines.append(f"  {name:<34} {self.counters[name]}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self,
+             path):
+        """Grava o relatório em JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,408 @@
+"""
+RangeModel - Modelo compacto de ranges vocais em números MIDI
+Responsabilidades:
+- Converter nota <-> MIDI pelas tabelas de NoteMath (sem interpretar texto a cada chamada)
+- Representar um range como um par de inteiros MIDI (VoiceRange)
+- Guardar os ranges de todos os coristas em arrays de inteiros (Roster)
+- Representar uma formação (voz -> coristas) de forma imutável e compartilhável (Formation)
+- Manter os ranges do grupo por voz a cada alteração de corista (GroupRanges)
+
+As notas em texto ficam só nas bordas (JSON e interface); a análise e os
+visualizadores trabalham com os inteiros.
+"""
+import math
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional
+import NoteMath
+
+
+def note_to_midi(note: str) -> int:
+    """Converte uma nota (ex: "C#4") em número MIDI, pela tabela de NoteMath."""
+    return NoteMath.note_to_midi(note)
+
+
+def midi_to_note(midi: int) -> str:
+    """Converte um número MIDI em nota, no mesmo formato de librosa.midi_to_note (C♯4)."""
+    return NoteMath.midi_to_note(midi, unicode=True)
+
+
+class VoiceRange:
+    """Range vocal (grave, agudo) em números MIDI."""
+
+    __slots__ = ("min", "max")
+
+    def __init__(self,
+                 min_midi: int, max_midi: int):
+        self.min = int(min_midi)
+        self.max = int(max_midi)
+
+    @classmethod
+    def from_notes(cls,
+                   min_note, max_note) -> Optional["VoiceRange"]:
+        """
+        Cria o range a partir das notas em texto.
+
+        Returns:
+            VoiceRange, ou None se alguma das notas estiver vazia
+        """
+        if not min_note or not max_note:
+            return None
+        return cls(note_to_midi(min_note), note_to_midi(max_note))
+
+    def ordered(self) -> "VoiceRange":
+        """Retorna o range com grave <= agudo."""
+        return self if self.min <= self.max else VoiceRange(self.max, self.min)
+
+    def shifted(self,
+                semitones: int) -> "VoiceRange":
+        """Retorna o range transposto em `semitones`."""
+        return VoiceRange(self.min + semitones, self.max + semitones)
+
+    def notes(self) -> tuple[str, str]:
+        """Retorna (nota_grave, nota_aguda) em texto."""
+        return midi_to_note(self.min), midi_to_note(self.max)
+
+    @property
+    def span(self) -> int:
+        return self.max - self.min
+
+    def __iter__(self) -> Iterator[int]:
+        yield self.min
+        yield self.max
+
+    def __eq__(self, other):
+        if isinstance(other, VoiceRange):
+            return self.min == other.min and self.max == other.max
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.min, self.max))
+
+    def __repr__(self):
+        return f"VoiceRange({self.min}, {self.max})"
+
+
+def parse_ranges(ranges) -> Dict[str, VoiceRange]:
+    """
+    Converte {voz: (min, max)} em {voz: VoiceRange}, ignorando vozes sem range.
+
+    Args:
+        ranges: Ranges em texto (piece_ranges, group_ranges, VOICE_BASE_RANGES...)
+
+    Returns:
+        Dicionário {voz: VoiceRange}
+    """
+    parsed = {}
+    for v, r in (ranges or {}).items():
+        if not r or len(r) < 2:
+            continue
+        vr = VoiceRange.from_notes(r[0], r[1])
+        if vr is not None:
+            parsed[v] = vr
+    return parsed
+
+
+class Roster:
+    """
+    Ranges dos coristas de um grupo em arrays paralelos.
+
+    names[i] é o corista i; mins[i] e maxs[i] são seu range em MIDI (grave <= agudo)
+    e voices[i] a voz atribuída. Coristas sem range ficam de fora.
+    """
+
+    __slots__ = ("names", "index", "mins", "maxs", "voices")
+
+    def __init__(self):
+        self.names = []
+        self.index = {}
+        self.mins = array('h')
+        self.maxs = array('h')
+        self.voices = []
+
+    @classmethod
+    def from_coristas(cls,
+                      coristas: dict) -> "Roster":
+        """
+        Monta o roster a partir do dicionário de coristas do JSON.
+
+        Args:
+            coristas: {nome: {'range_min': nota, 'range_max': nota, 'voz_atribuida': voz, ...}}
+        """
+        roster = cls()
+        for name, c in coristas.items():
+            vr = VoiceRange.from_notes(c.get("range_min") or "", c.get("range_max") or "")
+            if vr is None:
+                continue
+            vr = vr.ordered()
+            roster.index[name] = len(roster.names)
+            roster.names.append(name)
+            roster.mins.append(vr.min)
+            roster.maxs.append(vr.max)
+            roster.voices.append(c.get("voz_atribuida"))
+        return roster
+
+    def range_of(self,
+                 name: str) -> Optional[VoiceRange]:
+        """Range MIDI do corista, ou None se ele não tiver range."""
+        i = self.index.get(name)
+        if i is None:
+            return None
+        return VoiceRange(self.mins[i], self.maxs[i])
+
+    def members(self,
+                voice: str) -> list[int]:
+        """Índices dos coristas atribuídos à voz, na ordem do grupo."""
+        return [i for i, v in enumerate(self.voices) if v == voice]
+
+    def extremes(self,
+                 voice: str) -> tuple[Optional[str], Optional[str]]:
+        """
+        Retorna (corista mais grave, corista mais agudo) da voz.
+
+        Em empate fica o primeiro na ordem do grupo.
+        """
+        lowest = highest = None
+        for i in self.members(voice):
+            if lowest is None or self.mins[i] < self.mins[lowest]:
+                lowest = i
+            if highest is None or self.maxs[i] > self.maxs[highest]:
+                highest = i
+        return (self.names[lowest] if lowest is not None else None,
+                self.names[highest] if highest is not None else None)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+
+def coverage_range(sorted_mins, sorted_maxs, coverage: float = 1.0) -> Optional[VoiceRange]:
+    """
+    Range alcançado por uma fração dos coristas de um naipe.
+
+    Com coverage=0.8, o mínimo é a nota mais grave que 80% dos coristas alcançam
+    e o máximo a mais aguda que 80% alcançam; coverage=1.0 é a interseção
+    estrita (maior mínimo, menor máximo). Com os valores já ordenados, são só
+    duas leituras por índice.
+
+    Args:
+        sorted_mins, sorted_maxs: Mínimos e máximos em ordem crescente (listas ou arrays NumPy)
+        coverage: Fração do naipe, em (0, 1]
+
+    Returns:
+        VoiceRange, ou None se o naipe estiver vazio ou o range resultante for vazio
+    """
+    n = len(sorted_mins)
+    if not n:
+        return None
+    # coristas que precisam alcançar cada extremo (a folga absorve 0.7 * 10 = 7.000000000000001)
+    k = max(1, math.ceil(coverage * n - 1e-9))
+    lo = int(sorted_mins[k - 1])
+    hi = int(sorted_maxs[n - k])
+    return VoiceRange(lo, hi) if lo <= hi else None
+
+
+class SortedRanges:
+    """
+    Multiconjuntos ordenados dos mínimos e dos máximos (MIDI) de um naipe.
+
+    Inserir e remover localizam a posição por bisect; a interseção (maior
+    mínimo, menor máximo) e a extensão (menor mínimo, maior máximo) são lidas
+    nas pontas das listas, em O(1).
+    """
+
+    __slots__ = ("mins", "maxs")
+
+    def __init__(self):
+        self.mins = []
+        self.maxs = []
+
+    def add(self,
+            lo: int, hi: int):
+        insort(self.mins, lo)
+        insort(self.maxs, hi)
+
+    def remove(self,
+               lo: int, hi: int):
+        del self.mins[bisect_left(self.mins, lo)]
+        del self.maxs[bisect_left(self.maxs, hi)]
+
+    def intersection(self,
+                     coverage: float = 1.0) -> Optional[VoiceRange]:
+        """Maior mínimo e menor máximo (ou o range de uma fração do naipe, ver coverage_range)."""
+        return coverage_range(self.mins, self.maxs, coverage)
+
+    def extension(self) -> Optional[VoiceRange]:
+        """Menor mínimo e maior máximo, ou None se vazio."""
+        if not self.mins:
+            return None
+        return VoiceRange(self.mins[0], self.maxs[-1])
+
+    def __len__(self):
+        return len(self.mins)
+
+
+class GroupRanges:
+    """
+    Ranges do grupo por voz atribuída, mantidos a cada alteração de corista.
+
+    Cada voz tem dois SortedRanges: a extensão, com todos os coristas que têm
+    range, e o range do grupo, só com os que têm vozes recomendadas (como em
+    CoristasManager.get_voice_group_ranges). update()/remove() mexem apenas nas
+    entradas do corista; ranges() e extension() não percorrem os coristas.
+
+    `source` é o dicionário de coristas que o índice espelha (ver rebuild).
+    """
+
+    __slots__ = ("source", "_entries", "_range", "_extension")
+
+    def __init__(self,
+                 voices, coristas=None):
+        self._range = {v: SortedRanges() for v in voices}
+        self._extension = {v: SortedRanges() for v in voices}
+        self._entries = {}
+        self.source = None
+        if coristas is not None:
+            self.rebuild(coristas)
+
+    @staticmethod
+    def _entry(dados) -> tuple:
+        """(chave em texto, (voz, min, max, entra no range) ou None) dos dados do corista."""
+        key = (dados.get("voz_atribuida"), dados.get("range_min") or "", dados.get("range_max") or "",
+               bool(dados.get("vozes_recomendadas")))
+        try:
+            vr = VoiceRange.from_notes(key[1], key[2])
+        except ValueError:
+            vr = None
+        if vr is None:
+            return key, None
+        vr = vr.ordered()
+        return key, (key[0], vr.min, vr.max, key[3])
+
+    def rebuild(self,
+                coristas: dict):
+        """Remonta o índice a partir de {nome: dados}."""
+        for sorted_ranges in (*self._range.values(), *self._extension.values()):
+            sorted_ranges.mins.clear()
+            sorted_ranges.maxs.clear()
+        self._entries = {}
+        self.source = coristas
+        for nome, dados in coristas.items():
+            self.update(nome, dados)
+
+    def _add(self,
+             entry):
+        voice, lo, hi, in_range = entry
+        if voice in self._extension:
+            self._extension[voice].add(lo, hi)
+            if in_range:
+                self._range[voice].add(lo, hi)
+
+    def _remove(self,
+                entry):
+        voice, lo, hi, in_range = entry
+        if voice in self._extension:
+            self._extension[voice].remove(lo, hi)
+            if in_range:
+                self._range[voice].remove(lo, hi)
+
+    def update(self,
+               nome, dados):
+        """Atualiza o corista (novo ou alterado); sem mudança de voz/range/recomendadas, nada muda."""
+        old = self._entries.get(nome)
+        key, entry = self._entry(dados)
+        if old is not None:
+            if old[0] == key:
+                return
+            if old[1] is not None:
+                self._remove(old[1])
+        self._entries[nome] = (key, entry)
+        if entry is not None:
+            self._add(entry)
+
+    def remove(self,
+               nome):
+        old = self._entries.pop(nome, None)
+        if old is not None and old[1] is not None:
+            self._remove(old[1])
+
+    def sync(self,
+             coristas: dict):
+        """Aplica as diferenças entre o índice e {nome: dados} (após alterações em bloco)."""
+        if coristas is not self.source:
+            self.rebuild(coristas)
+            return
+        for nome in [n for n in self._entries if n not in coristas]:
+            self.remove(nome)
+        for nome, dados in coristas.items():
+            self.update(nome, dados)
+
+    def ranges(self,
+               coverage: float = 1.0) -> Dict[str, VoiceRange]:
+        """{voz: range do grupo} das vozes com interseção (ou range de cobertura) não vazia."""
+        result = {}
+        for voice, sorted_ranges in self._range.items():
+            vr = sorted_ranges.intersection(coverage)
+            if vr is not None:
+                result[voice] = vr
+        return result
+
+    def extension(self) -> Dict[str, VoiceRange]:
+        """{voz: extensão do grupo} das vozes com algum corista."""
+        result = {}
+        for voice, sorted_ranges in self._extension.items():
+            vr = sorted_ranges.extension()
+            if vr is not None:
+                result[voice] = vr
+        return result
+
+
+class Formation(Mapping):
+    """
+    Formação imutável {voz: (nomes...)}.
+
+    Como não pode ser alterada, a mesma instância é compartilhada entre
+    transposições (T e T±12, ou quaisquer T com a mesma formação) sem cópias.
+    Para alterar, monte um dict novo: dict(formation) ou
+    {v: list(nomes) for v, nomes in formation.items()}.
+    """
+
+    __slots__ = ("_voices", "_hash")
+
+    def __init__(self,
+                 voices=()):
+        self._voices = {v: tuple(names) for v, names in dict(voices).items()}
+        self._hash = None
+
+    def __getitem__(self, voice):
+        return self._voices[voice]
+
+    def __iter__(self):
+        return iter(self._voices)
+
+    def __len__(self):
+        return len(self._voices)
+
+    def __hash__(self):
+        if self._hash is None:
+            # sem depender da ordem das vozes, como a igualdade (dict ==)
+            self._hash = hash(frozenset(self._voices.items()))
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, Formation):
+            return self._voices == other._voices
+        return Mapping.__eq__(self, other)
+
+    def __reduce__(self):
+        return Formation, (self._voices,)
+
+    def names(self) -> set:
+        """Todos os coristas da formação."""
+        return {nm for members in self._voices.values() for nm in members}
+
+    def __repr__(self):
+        return f"Formation({self._voices!r})"
@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk
 from Constants import VOICES, VOICE_BASE_RANGES
 from CoristasManager import CoristasManager
-import librosa
+from RangeModel import Roster, parse_ranges, midi_to_note
 
 # ===== VISUALIZADOR DE RANGES =====
 class RangeVisualizer:
@@ -71,7 +71,7 @@ class RangeVisualizer:
             x = int(self.LEFT_PAD + (s - self.MIDI_MIN) * self.scale) + 100
             self.canvas.create_line(x, 0, x, self.CANVAS_HEIGHT, fill="#e6e6e6", dash=(2, 4))
             try:
-                note = librosa.midi_to_note(s)
+                note = midi_to_note(s)
                 self.canvas.create_text(x + 2, 8, anchor="nw", text=note, fill="#888888", font=("Arial", 8))
             except Exception:
                 pass
@@ -140,25 +140,29 @@ class RangeVisualizer:
         self._hide_tooltip()  # Limpar tooltip ao atualizar
         self.draw_grid(group_ranges)
 
+        # Converte as notas uma única vez para MIDI
+        base_midi = parse_ranges(self.base_ranges)
+        group_midi = parse_ranges(group_ranges)
+        extension_midi = parse_ranges(group_extension)
+        piece_midi = parse_ranges(piece_ranges)
+        roster = Roster.from_coristas(self.coristas) if self.coristas else Roster()
+
         for idx, v in enumerate(group_ranges if group_ranges else self.voices):
             y = 30 + idx * self.ROW_HEIGHT
             bar_y = y - 10 + (self.ROW_HEIGHT - self.BAR_HEIGHT) / 2
 
             # Determinar o range base para validação de transposição
             if group_ranges:
-                g_min_m = librosa.note_to_midi(group_ranges[v][0])
-                g_max_m = librosa.note_to_midi(group_ranges[v][1])
+                g_min_m, g_max_m = group_midi[v]
             else:
-                g_min_m = librosa.note_to_midi(VOICE_BASE_RANGES[v][0])
-                g_max_m = librosa.note_to_midi(VOICE_BASE_RANGES[v][1])
+                g_min_m, g_max_m = base_midi[v]
 
             # Desenhar barras de grupo se existirem
             if group_ranges is not None and group_extension is not None:
                 # Desenhar barra de group_extension (com opacidade 50%) se aplicável
                 if v in group_extension and v in group_ranges:
                     if group_extension[v] != group_ranges[v]:
-                        ext_min_m = librosa.note_to_midi(group_extension[v][0])
-                        ext_max_m = librosa.note_to_midi(group_extension[v][1])
+                        ext_min_m, ext_max_m = extension_midi[v]
                         ext_x1 = self._x(ext_min_m)
                         ext_x2 = self._x(ext_max_m)
 
@@ -167,11 +171,7 @@ class RangeVisualizer:
                             ext_x1, bar_y, ext_x2, bar_y + self.BAR_HEIGHT,
                             fill="#56BAF6", outline="#000080", stipple="gray50",
                             tags=f"ext_{v}")
-                        ext_grave = min((nome for nome, dados in self.coristas.items() if dados['voz_atribuida'] == v),
-                                        key=lambda n: librosa.note_to_midi(self.coristas[n]['range_min']))
-
-                        ext_agudo = max((nome for nome, dados in self.coristas.items() if dados['voz_atribuida'] == v),
-                                        key=lambda n: librosa.note_to_midi(self.coristas[n]['range_max']))
+                        ext_grave, ext_agudo = roster.extremes(v)
 
                         ext_text = f"{v} mais grave: {ext_grave} ({self.coristas[ext_grave]['range_min']}) | {v} mais agudo: {ext_agudo} ({self.coristas[ext_agudo]['range_max']})"
 
@@ -183,8 +183,7 @@ class RangeVisualizer:
 
                 # Desenhar barra de group_ranges (sólida)
                 if v in group_ranges:
-                    gr_min_m = librosa.note_to_midi(group_ranges[v][0])
-                    gr_max_m = librosa.note_to_midi(group_ranges[v][1])
+                    gr_min_m, gr_max_m = group_midi[v]
                     gr_x1 = self._x(gr_min_m)
                     gr_x2 = self._x(gr_max_m)
 
@@ -202,8 +201,7 @@ class RangeVisualizer:
                         self.canvas.tag_bind(f"group_{v}", "<Motion>", self._move_tooltip)
             else:
                 # Comportamento padrão quando não há group_ranges/group_extension
-                base_min_m = librosa.note_to_midi(VOICE_BASE_RANGES[v][0])
-                base_max_m = librosa.note_to_midi(VOICE_BASE_RANGES[v][1])
+                base_min_m, base_max_m = base_midi[v]
                 x1 = self._x(base_min_m)
                 x2 = self._x(base_max_m)
 
@@ -213,10 +211,8 @@ class RangeVisualizer:
                     tags=f"base_{v}")
 
             # Resto da lógica (piece_ranges e transposição)
-            if v in {k: y for k, y in piece_ranges.items() if y != ('', '')}:
-                piece_min_str, piece_max_str = piece_ranges[v]
-                piece_min_m = librosa.note_to_midi(piece_min_str)
-                piece_max_m = librosa.note_to_midi(piece_max_str)
+            if v in piece_midi:
+                piece_min_m, piece_max_m = piece_midi[v]
 
                 O = Os.get(v, 0)
                 trans_min = piece_min_m + T + 12 * O
@@ -265,7 +261,7 @@ class RangeVisualizer:
                     fill="#f7a40a", outline="#6e4b0b", tags=f"range_lvl_{v}")
 
                 # Criar o texto do tooltip antes da lambda
-                tooltip_text = f"Alcance exigido para {v}: {librosa.midi_to_note(piece_min_m + T)} → {librosa.midi_to_note(piece_max_m + T)}"
+                tooltip_text = f"Alcance exigido para {v}: {midi_to_note(piece_min_m + T)} → {midi_to_note(piece_max_m + T)}"
 
                 self.canvas.tag_bind(f"range_lvl_{v}", "<Enter>",
                                      lambda e, txt=tooltip_text: self._show_tooltip(e, txt))
@@ -0,0 +1,229 @@
+"""
+Serializers - Conversão dos dados de/para bytes, com a biblioteca mais rápida disponível
+Responsabilidades:
+- JSON legível (indentado, UTF-8) pelo json da biblioteca padrão ou pelo orjson, se instalado
+- JSON compacto (uma linha) para diário, colunas do SQLite e cópias internas
+- Formato binário compacto (msgpack), opcional, escolhido pela extensão do arquivo
+- Gravação atômica (arquivo temporário + os.replace)
+
+orjson e msgpack são opcionais: sem eles tudo funciona com o json da biblioteca
+padrão, só mais devagar; pedir "msgpack" sem o pacote instalado gera erro.
+
+Uso:
+    from Serializers import load_file, dump_file
+    data = load_file("coristas_music_data.json")      # orjson se disponível
+    dump_file("coristas_music_data.msgpack", data)    # binário, pela extensão
+"""
+import gc
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_EXTENSIONS = (".msgpack", ".mpk")
+
+# umask do processo, lido uma vez: os.umask só lê trocando o valor, o que não é
+# seguro com a consolidação do diário gravando arquivos em outra thread
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class JsonSerializer:
+    """JSON pelo módulo json da biblioteca padrão (sempre disponível)."""
+
+    name = "json"
+    binary = False
+
+    def dumps(self,
+              data, readable=True) -> bytes:
+        """Serializa; readable=True indenta como os arquivos do projeto (indent=2)."""
+        if readable:
+            return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+    def loads(self,
+              payload):
+        return json.loads(payload)
+
+
+class OrjsonSerializer(JsonSerializer):
+    """JSON pelo orjson: mesmo formato, serializado em C."""
+
+    name = "orjson"
+
+    def dumps(self,
+              data, readable=True) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if readable:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+
+    def loads(self,
+              payload):
+        return orjson.loads(payload)
+
+
+class MsgpackSerializer:
+    """Formato binário compacto (msgpack); não é legível, use export_json para inspecionar."""
+
+    name = "msgpack"
+    binary = True
+
+    def dumps(self,
+              data, readable=True) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self,
+              payload):
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+_SERIALIZERS = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+_AVAILABLE = {"json": True, "orjson": orjson is not None, "msgpack": msgpack is not None}
+_instances = {}
+_default_json = None  # None = orjson se disponível (ver set_default_serializer)
+
+
+def available() -> list:
+    """Nomes dos serializadores que podem ser usados neste ambiente."""
+    return [name for name, ok in _AVAILABLE.items() if ok]
+
+
+def set_default_serializer(name=None):
+    """Escolhe o JSON padrão ("json" ou "orjson"); None volta à escolha automática."""
+    global _default_json
+    if name is not None and (name not in ("json", "orjson") or not _AVAILABLE[name]):
+        raise ValueError(f"Serializador JSON inválido ou indisponível: {name!r}")
+    _default_json = name
+
+
+def get_serializer(name=None):
+    """
+    Serializador pelo nome.
+
+    Args:
+        name: "json", "orjson", "msgpack" ou None (JSON mais rápido disponível)
+
+    Raises:
+        ValueError: nome desconhecido ou pacote não instalado
+    """
+    if name is None:
+        name = _default_json or ("orjson" if _AVAILABLE["orjson"] else "json")
+    if name not in _SERIALIZERS:
+        raise ValueError(f"Serializador desconhecido: {name!r} (opções: {', '.join(_SERIALIZERS)})")
+    if not _AVAILABLE[name]:
+        raise ValueError(f"Serializador {name!r} indisponível: instale com pip install {name}")
+    serializer = _instances.get(name)
+    if serializer is None:
+        serializer = _instances[name] = _SERIALIZERS[name]()
+    return serializer
+
+
+def serializer_for_path(path):
+    """Serializador adequado à extensão do arquivo (.msgpack/.mpk = binário; o resto, JSON)."""
+    if os.path.splitext(str(path))[1].lower() in MSGPACK_EXTENSIONS:
+        return get_serializer("msgpack")
+    return get_serializer()
+
+
+# ===== JSON COMPACTO (texto) =====
+
+def dumps_compact(data) -> str:
+    """JSON numa linha só, como texto (diário, colunas do SQLite)."""
+    return get_serializer().dumps(data, readable=False).decode('utf-8')
+
+
+def loads_text(payload):
+    """Lê JSON de str ou bytes."""
+    return get_serializer().loads(payload)
+
+
+# ===== ARQUIVOS =====
+
+@contextmanager
+def paused_gc():
+    """
+    Suspende o coletor de ciclos durante uma carga grande.
+
+    Ler o arquivo cria centenas de milhares de dicts/listas de uma vez, o que
+    dispara várias coletas sem nada para coletar; elas chegam a dobrar o tempo.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _file_mode(path) -> int:
+    """Permissões do arquivo: as do original ou, se ele ainda não existe, as padrão sob o umask."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def write_atomic(path, payload: bytes):
+    """
+    Grava os bytes num arquivo temporário ao lado e troca pelo original (os.replace).
+
+    O temporário do mkstemp nasce com modo 0600; antes da troca ele recebe as
+    permissões do original, para que salvar não feche o arquivo de dados.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_file(path, serializer=None):
+    """Lê um arquivo inteiro com o serializador informado ou o da extensão."""
+    serializer = serializer or serializer_for_path(path)
+    with open(path, 'rb') as f:
+        payload = f.read()
+    with paused_gc():
+        return serializer.loads(payload)
+
+
+def dump_file(path, data, serializer=None, readable=True, atomic=True):
+    """
+    Grava um arquivo inteiro.
+
+    Args:
+        serializer: Serializador (padrão: o da extensão do arquivo)
+        readable: JSON indentado (ignorado pelo msgpack)
+        atomic: Grava num temporário e troca pelo original
+    """
+    serializer = serializer or serializer_for_path(path)
+    payload = serializer.dumps(data, readable=readable)
+    if atomic:
+        write_atomic(path, payload)
+    else:
+        with open(path, 'wb') as f:
+            f.write(payload)
@@ -0,0 +1,1439 @@
+"""
+StorageBackend - Persistência de grupos, coristas e músicas
+Responsabilidades:
+- Interface comum de leitura e gravação usada pelo CoristasManager (StorageBackend)
+- JsonStorage: o arquivo JSON de sempre, lido uma vez e mantido em memória enquanto
+  o arquivo não mudar (mtime/tamanho); cada gravação acrescenta um registro a um
+  diário (.journal), consolidado no JSON em segundo plano com troca atômica
+  (com extensão .msgpack o mesmo documento é gravado em binário, ver Serializers)
+- SQLiteStorage: banco SQLite indexado, em que cada gravação altera só as linhas envolvidas
+- ShardedStorage: diretório com um catálogo e um arquivo JSON por grupo, lido só
+  quando o grupo é usado
+- Índice reverso corista -> músicas/naipes/solos (ReferenceIndex), para que renomear
+  ou remover um corista só toque nas músicas em que ele aparece, e o verificador
+  de consistência desse índice (check_references)
+- Importar/exportar entre os formatos, sempre no esquema do JSON:
+  {"grupos": {grupo: {nome: dados}}, "musicas": {nome: dados}}
+  e, se algum grupo tiver ranges base próprios, "ranges_base": {grupo: {voz: [min, max]}}
+
+O formato é escolhido pelo caminho (open_storage): um diretório (ou terminado em
+.grupos) usa ShardedStorage; .db/.sqlite/.sqlite3 usam SQLite; o resto, JSON.
+
+Uso (conversão):
+    python StorageBackend.py importar coristas_music_data.json coristas_music_data.db
+    python StorageBackend.py exportar coristas_music_data.db copia.json
+    python StorageBackend.py fragmentar coristas_music_data.json coristas_music_data.grupos
+    python StorageBackend.py verificar coristas_music_data.json
+"""
+import argparse
+import atexit
+import os
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import ExitStack, contextmanager, nullcontext
+from Serializers import (dump_file, dumps_compact, get_serializer, load_file, loads_text, paused_gc,
+                         serializer_for_path, write_atomic)
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+SHARDED_SUFFIX = ".grupos"
+JOURNAL_SUFFIX = ".journal"
+
+
+def empty_data() -> dict:
+    """Documento vazio no esquema do JSON."""
+    return {"grupos": {}, "musicas": {}}
+
+
+def json_copy(value):
+    """Cópia profunda de dados no formato do JSON (tuplas viram listas, como no arquivo)."""
+    if isinstance(value, dict):
+        return {k: json_copy(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_copy(v) for v in value]
+    return value
+
+
+# ===== CASCATAS NAS MÚSICAS =====
+# Funções sobre {nome_musica: dados} no esquema do JSON, usadas pelos dois formatos.
+
+def rename_in_musics(musicas, grupo, old, new) -> list:
+    """
+    Troca `old` por `new` nos solistas e naipes das músicas do grupo.
+
+    Returns:
+        Nomes das músicas alteradas
+    """
+    changed = []
+    for music_name, musica in musicas.items():
+        if musica.get('grupo') != grupo:
+            continue
+        touched = False
+
+        # Solistas: renomeia chave mantendo valor
+        if 'solistas' in musica and old in musica['solistas']:
+            musica['solistas'][new] = musica['solistas'].pop(old)
+            touched = True
+
+        # Voices: substitui nome em listas de naipes
+        if 'voices' in musica and isinstance(musica['voices'], dict):
+            for naipe in musica['voices'].values():
+                if isinstance(naipe, list) and old in naipe:
+                    naipe[naipe.index(old)] = new
+                    touched = True
+
+        if touched:
+            changed.append(music_name)
+    return changed
+
+
+def corista_voices(corista_info) -> set:
+    """Vozes em que o corista pode aparecer nas músicas (atribuída, recomendadas e possíveis)."""
+    todas_vozes = set()
+    if corista_info:
+        voz_atribuida = corista_info.get("voz_atribuida")
+        if voz_atribuida:
+            todas_vozes.add(voz_atribuida)
+        todas_vozes.update(corista_info.get("vozes_recomendadas", []))
+        todas_vozes.update(corista_info.get("vozes_possiveis", []))
+    return todas_vozes
+
+
+def corista_references(musicas, grupo, nome, todas_vozes) -> dict:
+    """
+    Lista onde o corista aparece nas músicas do grupo, sem alterar nada.
+
+    Returns:
+        {"voices": [músicas em que está num naipe],
+         "emptied": {música: naipe que ficaria vazio},
+         "solistas": [músicas em que é solista]}
+    """
+    refs = {"voices": [], "emptied": {}, "solistas": []}
+    for music_name, musica in musicas.items():
+        if musica.get("grupo") != grupo:
+            continue
+        for voice_name, members in musica.get("voices", {}).items():
+            if voice_name in todas_vozes and isinstance(members, list) and nome in members:
+                refs["voices"].append(music_name)
+                if len(members) == 1:
+                    refs["emptied"][music_name] = voice_name
+        if nome in musica.get("solistas", {}):
+            refs["solistas"].append(music_name)
+    return refs
+
+
+def remove_from_musics(musicas, grupo, nome, todas_vozes) -> list:
+    """
+    Tira o corista dos naipes (apagando naipes vazios) e dos solistas das músicas do grupo.
+
+    Returns:
+        Nomes das músicas alteradas
+    """
+    changed = []
+    for music_name, musica in musicas.items():
+        if musica.get("grupo") != grupo:
+            continue
+        touched = False
+
+        voices_map = musica.setdefault("voices", {})
+        for voice_name, members in list(voices_map.items()):
+            if voice_name in todas_vozes and isinstance(members, list) and nome in members:
+                members.remove(nome)
+                touched = True
+                # Se a lista ficou vazia, remova a voz por completo
+                if len(members) == 0:
+                    del voices_map[voice_name]
+
+        solistas_map = musica.get("solistas", {})
+        if nome in solistas_map:
+            del solistas_map[nome]
+            touched = True
+
+        if touched:
+            changed.append(music_name)
+    return changed
+
+
+# ===== ÍNDICE REVERSO =====
+# Uma referência é (grupo, corista, música, naipe); naipe None = solista.
+
+def music_references(music_name, musica) -> set:
+    """Referências a coristas nos naipes e solistas de uma música."""
+    grupo = musica.get("grupo")
+    refs = set()
+    voices = musica.get("voices")
+    if isinstance(voices, dict):
+        for naipe, members in voices.items():
+            if isinstance(members, list):
+                refs.update((grupo, nome, music_name, naipe) for nome in members)
+    for nome in musica.get("solistas") or {}:
+        refs.add((grupo, nome, music_name, None))
+    return refs
+
+
+def _reference_sort_key(ref):
+    return tuple("" if x is None else str(x) for x in ref)
+
+
+class ReferenceIndex:
+    """
+    Índice reverso (grupo, corista) -> músicas em que o corista aparece.
+
+    Derivado das músicas: é montado quando o documento é carregado e atualizado
+    a cada música gravada (set_music), então renomear/remover um corista só
+    precisa abrir as músicas listadas aqui.
+    """
+
+    def __init__(self,
+                 musicas=None):
+        self.reset(musicas)
+
+    def reset(self,
+              musicas=None):
+        """Monta o índice do zero a partir de {nome: música}."""
+        self._by_music = {}    # música -> referências
+        self._by_corista = {}  # (grupo, corista) -> {música: {naipes}}
+        self._pos = {}         # música -> ordem no documento
+        for name, musica in (musicas or {}).items():
+            self.set_music(name, musica)
+
+    def set_music(self,
+                  name, musica):
+        """Troca as referências da música pelas da versão nova."""
+        self._unindex(name)
+        refs = music_references(name, musica)
+        self._pos.setdefault(name, len(self._pos))
+        self._by_music[name] = refs
+        for grupo, nome, _, naipe in refs:
+            self._by_corista.setdefault((grupo, nome), {}).setdefault(name, set()).add(naipe)
+
+    def remove_music(self,
+                     name):
+        self._unindex(name)
+        self._pos.pop(name, None)
+
+    def _unindex(self,
+                 name):
+        for grupo, nome, _, _ in self._by_music.pop(name, ()):
+            musics = self._by_corista.get((grupo, nome))
+            if musics is not None:
+                musics.pop(name, None)
+                if not musics:
+                    del self._by_corista[(grupo, nome)]
+
+    def musics_of(self,
+                  grupo, nome) -> list:
+        """Músicas do grupo que citam o corista, na ordem do documento."""
+        return sorted(self._by_corista.get((grupo, nome), ()), key=self._pos.__getitem__)
+
+    def slots_of(self,
+                 grupo, nome) -> dict:
+        """{música: {naipes}} do corista; None no conjunto = solista."""
+        return {m: set(naipes) for m, naipes in self._by_corista.get((grupo, nome), {}).items()}
+
+    def rows(self) -> set:
+        """Todas as referências indexadas."""
+        return set().union(*self._by_music.values())
+
+
+# ===== DIÁRIO =====
+# Cada alteração vira um ou mais registros de ESTADO (grava o valor final, não
+# um delta). Reaplicar registros que já estão no snapshot não muda o resultado,
+# então uma queda entre a troca do snapshot e a limpeza do diário é inofensiva.
+
+def apply_record(data, record, references=None):
+    """Aplica um registro do diário ao documento (e ao índice reverso, se informado)."""
+    op = record["op"]
+    if op == "set_group":
+        data["grupos"][record["grupo"]] = record["coristas"]
+    elif op == "set_corista":
+        data["grupos"].setdefault(record["grupo"], {})[record["nome"]] = record["dados"]
+    elif op == "del_corista":
+        data["grupos"].get(record["grupo"], {}).pop(record["nome"], None)
+    elif op == "set_music":
+        data["musicas"][record["nome"]] = record["dados"]
+        if references is not None:
+            references.set_music(record["nome"], record["dados"])
+    elif op == "del_music":
+        data["musicas"].pop(record["nome"], None)
+        if references is not None:
+            references.remove_music(record["nome"])
+    elif op == "set_base_ranges":
+        ranges_base = data.setdefault("ranges_base", {})
+        if record["ranges"]:
+            ranges_base[record["grupo"]] = record["ranges"]
+        else:
+            ranges_base.pop(record["grupo"], None)
+        if not ranges_base:
+            del data["ranges_base"]
+    elif op == "replace_all":
+        data["grupos"] = record["dados"].get("grupos", {})
+        data["musicas"] = record["dados"].get("musicas", {})
+        if record["dados"].get("ranges_base"):
+            data["ranges_base"] = record["dados"]["ranges_base"]
+        else:
+            data.pop("ranges_base", None)
+        if references is not None:
+            references.reset(data["musicas"])
+    else:
+        raise ValueError(f"Registro desconhecido no diário: {op!r}")
+
+
+def write_json_atomic(path, data):
+    """Grava JSON legível (indentado) num arquivo temporário e troca pelo original."""
+    write_atomic(path, get_serializer().dumps(data, readable=True))
+
+
+# ===== INTERFACE =====
+
+class StorageBackend:
+    """
+    Interface de persistência, implementada sobre um documento em memória.
+
+    Cada alteração vira registros de estado (ver apply_record): _persist grava
+    os registros e depois eles são aplicados ao documento devolvido por _read
+    (que deve ser sempre o mesmo objeto, até _discard). Dentro de batch() os
+    registros são gravados juntos no final. Formatos com acesso por registro
+    (SQLiteStorage) sobrescrevem os métodos.
+
+    _out/_in passam os dados que saem para quem chamou e os que entram no
+    documento; como o documento fica em memória, são cópias, para que
+    alterações não salvas dos coristas não vazem para o documento.
+    """
+
+    def __init__(self,
+                 path):
+        self.path = path
+        self._batch_depth = 0
+        self._batch_records = []
+
+    # --- documento ---
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _read(self) -> dict:
+        raise NotImplementedError
+
+    def _references(self) -> ReferenceIndex:
+        """Índice reverso do documento devolvido por _read."""
+        raise NotImplementedError
+
+    def _built_references(self):
+        """Índice reverso a manter nas alterações, ou None se ainda não foi montado."""
+        return self._references()
+
+    def _persist(self,
+                 records: list):
+        raise NotImplementedError
+
+    def _discard(self):
+        """Descarta o documento em memória (alterações que não chegaram ao disco)."""
+        pass
+
+    def _locked(self):
+        """Trava usada nas alterações (o JSON é consolidado numa thread separada)."""
+        return nullcontext()
+
+    def _doc(self) -> dict:
+        data = self._read()
+        data.setdefault("grupos", {})
+        data.setdefault("musicas", {})
+        return data
+
+    def _out(self,
+             value):
+        return json_copy(value)
+
+    def _in(self,
+            value):
+        return json_copy(value)
+
+    def _apply(self,
+               records: list):
+        with self._locked():
+            data = self._doc()
+            if self._batch_depth:
+                self._batch_records.extend(records)
+            else:
+                self._persist(records)
+            references = self._built_references()
+            for record in records:
+                apply_record(data, record, references)
+
+    @contextmanager
+    def batch(self):
+        """Agrupa várias alterações em uma única gravação."""
+        with self._locked():
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._batch_records = []
+                    self._discard()
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                records, self._batch_records = self._batch_records, []
+                if records:
+                    try:
+                        self._persist(records)
+                    except BaseException:
+                        self._discard()
+                        raise
+
+    def close(self):
+        pass
+
+    def _referencing_musics(self,
+                            data, grupo, nome) -> dict:
+        """Cópias das músicas que citam o corista, para calcular cascatas sem tocar no documento."""
+        return {m: json_copy(data["musicas"][m]) for m in self._references().musics_of(grupo, nome)}
+
+    # --- documento inteiro (importar/exportar, read_data) ---
+    def load_all(self) -> dict:
+        """Documento completo no esquema do JSON."""
+        return self._out(self._doc())
+
+    def replace_all(self,
+                    data: dict):
+        """Substitui todo o conteúdo pelo documento informado."""
+        dados = {"grupos": data.get("grupos", {}), "musicas": data.get("musicas", {})}
+        if data.get("ranges_base"):
+            dados["ranges_base"] = data["ranges_base"]
+        self._apply([{"op": "replace_all", "dados": self._in(dados)}])
+
+    # --- grupos e coristas ---
+    def list_groups(self) -> list:
+        return list(self._doc()["grupos"].keys())
+
+    def add_group(self,
+                  grupo):
+        self._apply([{"op": "set_group", "grupo": grupo, "coristas": {}}])
+
+    def load_group(self,
+                   grupo) -> dict:
+        """Coristas do grupo {nome: dados}; KeyError se o grupo não existir."""
+        return self._out(self._doc()["grupos"][grupo])
+
+    def get_corista(self,
+                    grupo, nome):
+        return self._out(self._doc()["grupos"].get(grupo, {}).get(nome))
+
+    def save_corista(self,
+                     grupo, nome, dados, replace=None):
+        """
+        Grava um corista (cria o grupo se preciso).
+
+        Args:
+            replace: Nome antigo, quando o corista foi renomeado; as referências
+                     nas músicas do grupo passam para o nome novo.
+        """
+        with self._locked():
+            data = self._doc()
+            records = []
+            if replace:
+                if replace not in data["grupos"].get(grupo, {}):
+                    raise KeyError(replace)
+                records.append({"op": "del_corista", "grupo": grupo, "nome": replace})
+                musicas = self._referencing_musics(data, grupo, replace)
+                records.extend({"op": "set_music", "nome": m, "dados": musicas[m]}
+                               for m in rename_in_musics(musicas, grupo, replace, nome))
+            records.append({"op": "set_corista", "grupo": grupo, "nome": nome, "dados": self._in(dados)})
+            self._apply(records)
+
+    def save_group(self,
+                   grupo, coristas):
+        """Substitui todos os coristas do grupo."""
+        self._apply([{"op": "set_group", "grupo": grupo, "coristas": self._in(coristas)}])
+
+    def get_base_ranges(self,
+                        grupo):
+        """Ranges base próprios do grupo {voz: [min, max]}, ou None se ele usa os padrão."""
+        return self._out(self._doc().get("ranges_base", {}).get(grupo))
+
+    def save_base_ranges(self,
+                         grupo, ranges):
+        """Grava os ranges base do grupo; None (ou vazio) volta aos padrão."""
+        self._apply([{"op": "set_base_ranges", "grupo": grupo, "ranges": self._in(ranges or None)}])
+
+    def corista_references(self,
+                           grupo, nome) -> dict:
+        """Onde o corista aparece nas músicas do grupo (ver corista_references)."""
+        data = self._doc()
+        todas_vozes = corista_voices(data["grupos"].get(grupo, {}).get(nome))
+        musicas = {m: data["musicas"][m] for m in self._references().musics_of(grupo, nome)}
+        return corista_references(musicas, grupo, nome, todas_vozes)
+
+    def musics_of_corista(self,
+                          grupo, nome) -> dict:
+        """
+        Onde o corista é citado, pelo índice reverso.
+
+        Returns:
+            {música: {naipes}}; None no conjunto indica solista
+        """
+        self._doc()
+        return self._references().slots_of(grupo, nome)
+
+    def _reference_rows(self) -> set:
+        """Referências registradas no índice reverso."""
+        self._doc()
+        return self._references().rows()
+
+    def check_references(self) -> dict:
+        """
+        Confere o índice reverso contra as músicas gravadas.
+
+        Returns:
+            {"missing": [referências que faltam no índice],
+             "stale": [referências do índice que não existem nas músicas]};
+            as duas listas vazias quando o índice está consistente
+        """
+        expected = set()
+        for music_name, musica in self.load_all()["musicas"].items():
+            expected |= music_references(music_name, musica)
+        indexed = self._reference_rows()
+        return {"missing": sorted(expected - indexed, key=_reference_sort_key),
+                "stale": sorted(indexed - expected, key=_reference_sort_key)}
+
+    def remove_corista(self,
+                       grupo, nome):
+        """Remove o corista do grupo e dos naipes/solistas das músicas do grupo."""
+        with self._locked():
+            data = self._doc()
+            records = []
+            if grupo not in data["grupos"]:
+                records.append({"op": "set_group", "grupo": grupo, "coristas": {}})
+            todas_vozes = corista_voices(data["grupos"].get(grupo, {}).get(nome))
+            records.append({"op": "del_corista", "grupo": grupo, "nome": nome})
+            musicas = self._referencing_musics(data, grupo, nome)
+            records.extend({"op": "set_music", "nome": m, "dados": musicas[m]}
+                           for m in remove_from_musics(musicas, grupo, nome, todas_vozes))
+            self._apply(records)
+
+    # --- músicas ---
+    def list_musics(self,
+                    grupo=None) -> dict:
+        """Músicas {nome: dados}, todas ou só as do grupo."""
+        musicas = self._doc()["musicas"]
+        return {nome: self._out(m) for nome, m in musicas.items() if grupo is None or m.get("grupo") == grupo}
+
+    def music_exists(self,
+                     name) -> bool:
+        return name in self._doc()["musicas"]
+
+    def get_music(self,
+                  name):
+        return self._out(self._doc()["musicas"].get(name))
+
+    def save_music(self,
+                   name, musica):
+        self._apply([{"op": "set_music", "nome": name, "dados": self._in(musica)}])
+
+    def delete_music(self,
+                     name):
+        self._apply([{"op": "del_music", "nome": name}])
+
+
+# ===== JSON =====
+
+class _JsonDocument:
+    """
+    Estado compartilhado de um arquivo JSON: documento, diário e consolidação.
+
+    O documento em memória é snapshot (o arquivo .json) + diário (.journal, um
+    registro JSON por linha). Alterações são acrescentadas ao diário com fsync;
+    uma thread em segundo plano consolida o diário num snapshot novo (arquivo
+    temporário + os.replace) e tira do diário o que já foi consolidado.
+    """
+
+    def __init__(self,
+                 path, compact_delay, compact_records):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.serializer = serializer_for_path(path)
+        self.compact_delay = compact_delay
+        self.compact_records = compact_records
+        self.lock = threading.RLock()
+        self.doc = None
+        self.references = None
+        self.stamp = None
+        self.pending = 0          # registros no diário ainda fora do snapshot
+        self.compacting = False
+        self.timer = None
+        atexit.register(self.compact)
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _current_stamp(self) -> tuple:
+        return self._stat(self.path), self._stat(self.journal_path)
+
+    def _replay_journal(self,
+                        data) -> int:
+        """Reaplica o diário; um registro final incompleto (queda no meio da gravação) é cortado."""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return 0
+
+        count = good = 0
+        for line in raw.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = loads_text(line)
+            except ValueError:
+                break
+            apply_record(data, record)
+            count += 1
+            good += len(line)
+
+        if good < len(raw):
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(good)
+        return count
+
+    def load(self) -> dict:
+        with self.lock:
+            if self.doc is not None and (self.compacting or self._current_stamp() == self.stamp):
+                return self.doc
+
+            data = empty_data()
+            if os.path.exists(self.path):
+                loaded = load_file(self.path, self.serializer)
+                if isinstance(loaded, dict):
+                    data = loaded
+            data.setdefault("grupos", {})
+            data.setdefault("musicas", {})
+            with paused_gc():
+                self.pending = self._replay_journal(data)
+            self.doc = data
+            self.references = None  # montado na primeira consulta (get_references)
+            self.stamp = self._current_stamp()
+            if self.pending:
+                self._schedule()
+            return data
+
+    def get_references(self) -> ReferenceIndex:
+        with self.lock:
+            data = self.load()
+            if self.references is None:
+                with paused_gc():
+                    self.references = ReferenceIndex(data["musicas"])
+            return self.references
+
+    def discard(self):
+        with self.lock:
+            self.doc = None
+            self.references = None
+            self.stamp = None
+
+    def append(self,
+               records: list):
+        payload = "".join(dumps_compact(r) + "\n" for r in records)
+        with self.lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self.pending += len(records)
+            self.stamp = self._current_stamp()
+            self._schedule()
+
+    def _schedule(self):
+        if self.timer is not None:
+            if self.pending < self.compact_records:
+                return
+            self.timer.cancel()
+        delay = 0 if self.pending >= self.compact_records else self.compact_delay
+        self.timer = threading.Timer(delay, self.compact)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def compact(self):
+        """Consolida o diário no snapshot (chamado pela thread, por close() e na saída)."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.doc is None or self.pending == 0 or self.compacting:
+                return
+            snapshot = json_copy(self.doc)
+            consolidated = self.pending
+            offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            self.compacting = True
+
+        try:
+            dump_file(self.path, snapshot, self.serializer)
+        except Exception as e:
+            print(f"Erro ao consolidar {self.path}: {e}")
+            with self.lock:
+                self.compacting = False
+            return
+
+        with self.lock:
+            try:
+                # o que foi acrescentado durante a consolidação continua no diário
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(offset)
+                    tail = f.read()
+                if tail:
+                    write_atomic(self.journal_path, tail)
+                else:
+                    os.remove(self.journal_path)
+                self.pending -= consolidated
+            except FileNotFoundError:
+                self.pending = 0
+            finally:
+                self.compacting = False
+                self.stamp = self._current_stamp()
+            if self.pending:
+                self._schedule()
+
+
+class JsonStorage(StorageBackend):
+    """
+    Arquivo JSON único (formato original do projeto), com diário de alterações.
+
+    O documento é lido uma vez e compartilhado por todas as instâncias que
+    abrem o mesmo arquivo; só é lido de novo quando o arquivo ou o diário mudam
+    de data de modificação/tamanho (alteração feita por outro programa).
+    Cada alteração só acrescenta uma linha ao diário; o arquivo JSON é
+    regravado em segundo plano (ver _JsonDocument).
+
+    Arquivos .msgpack/.mpk guardam o snapshot em binário (Serializers); o
+    diário continua sendo JSON, um registro por linha.
+    """
+
+    # Consolida o diário este tempo (s) após a última alteração, ou logo ao juntar tantos registros
+    COMPACT_DELAY = 5.0
+    COMPACT_RECORDS = 200
+
+    # caminho absoluto -> _JsonDocument
+    _documents = {}
+    _documents_lock = threading.Lock()
+
+    def __init__(self,
+                 path):
+        super().__init__(path)
+        key = os.path.abspath(path)
+        with self._documents_lock:
+            document = self._documents.get(key)
+            if document is None:
+                document = _JsonDocument(key, self.COMPACT_DELAY, self.COMPACT_RECORDS)
+                self._documents[key] = document
+        self._document = document
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self._document.journal_path)
+
+    def _read(self) -> dict:
+        return self._document.load()
+
+    def _references(self) -> ReferenceIndex:
+        return self._document.get_references()
+
+    def _built_references(self):
+        return self._document.references
+
+    def _persist(self,
+                 records: list):
+        self._document.append(records)
+
+    def _discard(self):
+        self._document.discard()
+
+    def _locked(self):
+        return self._document.lock
+
+    def compact(self):
+        """Consolida agora o diário no arquivo JSON."""
+        self._document.compact()
+
+    def close(self):
+        self.compact()
+
+
+# ===== SQLITE =====
+
+class SQLiteStorage(StorageBackend):
+    """
+    Banco SQLite com uma linha por grupo, corista e música.
+
+    Os dados de cada corista/música ficam em JSON numa coluna; a coluna `pos`
+    preserva a ordem de inserção, para que load_all() devolva o mesmo documento
+    que o arquivo JSON teria. Gravar um corista é um único UPSERT indexado,
+    independente do tamanho do grupo.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS grupos (
+            nome TEXT PRIMARY KEY,
+            pos INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS coristas (
+            grupo TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            pos INTEGER NOT NULL,
+            dados TEXT NOT NULL,
+            PRIMARY KEY (grupo, nome)
+        );
+        CREATE INDEX IF NOT EXISTS coristas_pos ON coristas (grupo, pos);
+        CREATE TABLE IF NOT EXISTS musicas (
+            nome TEXT PRIMARY KEY,
+            grupo TEXT,
+            pos INTEGER NOT NULL,
+            dados TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS musicas_grupo ON musicas (grupo, pos);
+        CREATE TABLE IF NOT EXISTS referencias (
+            grupo TEXT,
+            corista TEXT NOT NULL,
+            musica TEXT NOT NULL,
+            naipe TEXT
+        );
+        CREATE INDEX IF NOT EXISTS referencias_corista ON referencias (grupo, corista);
+        CREATE INDEX IF NOT EXISTS referencias_musica ON referencias (musica);
+        CREATE TABLE IF NOT EXISTS ranges_base (
+            grupo TEXT PRIMARY KEY,
+            dados TEXT NOT NULL
+        );
+    """
+
+    def __init__(self,
+                 path):
+        super().__init__(path)
+        self.conn = sqlite3.connect(path)
+        has_references = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'referencias'").fetchone()
+        self.conn.executescript(self.SCHEMA)
+        if not has_references:
+            # banco criado antes do índice reverso
+            with self.conn:
+                self.rebuild_references(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+    @contextmanager
+    def _tx(self):
+        """Transação própria, ou a do batch() em andamento."""
+        if self._batch_depth:
+            yield self.conn
+        else:
+            with self.conn:
+                yield self.conn
+
+    @contextmanager
+    def batch(self):
+        """Agrupa várias alterações em uma única transação."""
+        if self._batch_depth == 0:
+            self.conn.execute("BEGIN")
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.rollback()
+            raise
+        else:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.commit()
+
+    @staticmethod
+    def _dumps(value) -> str:
+        return dumps_compact(value)
+
+    @staticmethod
+    def _next_pos(conn, table, where="", args=()) -> int:
+        row = conn.execute(f"SELECT COALESCE(MAX(pos), -1) + 1 FROM {table} {where}", args).fetchone()
+        return row[0]
+
+    def _ensure_group(self,
+                      conn, grupo):
+        if conn.execute("SELECT 1 FROM grupos WHERE nome = ?", (grupo,)).fetchone() is None:
+            conn.execute("INSERT INTO grupos (nome, pos) VALUES (?, ?)",
+                         (grupo, self._next_pos(conn, "grupos")))
+
+    def _upsert_corista(self,
+                        conn, grupo, nome, dados):
+        pos = self._next_pos(conn, "coristas", "WHERE grupo = ?", (grupo,))
+        conn.execute(
+            "INSERT INTO coristas (grupo, nome, pos, dados) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (grupo, nome) DO UPDATE SET dados = excluded.dados",
+            (grupo, nome, pos, self._dumps(dados)))
+
+    def _upsert_music(self,
+                      conn, name, musica):
+        pos = self._next_pos(conn, "musicas")
+        conn.execute(
+            "INSERT INTO musicas (nome, grupo, pos, dados) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (nome) DO UPDATE SET grupo = excluded.grupo, dados = excluded.dados",
+            (name, musica.get("grupo"), pos, self._dumps(musica)))
+        self._index_music(conn, name, musica)
+
+    @staticmethod
+    def _index_music(conn, name, musica):
+        conn.execute("DELETE FROM referencias WHERE musica = ?", (name,))
+        conn.executemany("INSERT INTO referencias (grupo, corista, musica, naipe) VALUES (?, ?, ?, ?)",
+                         music_references(name, musica))
+
+    def rebuild_references(self,
+                           conn=None):
+        """Remonta a tabela de referências a partir das músicas."""
+        with (nullcontext(conn) if conn is not None else self._tx()) as conn:
+            conn.execute("DELETE FROM referencias")
+            for name, dados in conn.execute("SELECT nome, dados FROM musicas").fetchall():
+                self._index_music(conn, name, loads_text(dados))
+
+    def _referencing_musics(self,
+                            conn, grupo, nome) -> dict:
+        rows = conn.execute(
+            "SELECT nome, dados FROM musicas WHERE nome IN "
+            "(SELECT musica FROM referencias WHERE grupo = ? AND corista = ?) ORDER BY pos",
+            (grupo, nome))
+        return {music_name: loads_text(dados) for music_name, dados in rows}
+
+    def _update_music(self,
+                      conn, name, musica):
+        conn.execute("UPDATE musicas SET dados = ? WHERE nome = ?", (self._dumps(musica), name))
+        self._index_music(conn, name, musica)
+
+    # --- documento inteiro ---
+    def load_all(self) -> dict:
+        data = empty_data()
+        for (grupo,) in self.conn.execute("SELECT nome FROM grupos ORDER BY pos"):
+            data["grupos"][grupo] = {}
+        for grupo, nome, dados in self.conn.execute("SELECT grupo, nome, dados FROM coristas ORDER BY grupo, pos"):
+            data["grupos"].setdefault(grupo, {})[nome] = loads_text(dados)
+        data["musicas"] = self.list_musics()
+        ranges_base = {grupo: loads_text(dados)
+                       for grupo, dados in self.conn.execute("SELECT grupo, dados FROM ranges_base ORDER BY rowid")}
+        if ranges_base:
+            data["ranges_base"] = ranges_base
+        return data
+
+    def replace_all(self,
+                    data: dict):
+        with self._tx() as conn:
+            conn.execute("DELETE FROM coristas")
+            conn.execute("DELETE FROM musicas")
+            conn.execute("DELETE FROM grupos")
+            conn.execute("DELETE FROM referencias")
+            conn.execute("DELETE FROM ranges_base")
+            conn.executemany("INSERT INTO ranges_base (grupo, dados) VALUES (?, ?)",
+                             [(g, self._dumps(r)) for g, r in (data.get("ranges_base") or {}).items() if r])
+            conn.executemany("INSERT INTO grupos (nome, pos) VALUES (?, ?)",
+                             [(g, i) for i, g in enumerate(data.get("grupos", {}))])
+            conn.executemany(
+                "INSERT INTO coristas (grupo, nome, pos, dados) VALUES (?, ?, ?, ?)",
+                [(g, nome, i, self._dumps(dados))
+                 for g, coristas in data.get("grupos", {}).items()
+                 for i, (nome, dados) in enumerate(coristas.items())])
+            conn.executemany(
+                "INSERT INTO musicas (nome, grupo, pos, dados) VALUES (?, ?, ?, ?)",
+                [(nome, musica.get("grupo"), i, self._dumps(musica))
+                 for i, (nome, musica) in enumerate(data.get("musicas", {}).items())])
+            for nome, musica in data.get("musicas", {}).items():
+                self._index_music(conn, nome, musica)
+
+    # --- grupos e coristas ---
+    def list_groups(self) -> list:
+        return [g for (g,) in self.conn.execute("SELECT nome FROM grupos ORDER BY pos")]
+
+    def add_group(self,
+                  grupo):
+        with self._tx() as conn:
+            conn.execute("DELETE FROM coristas WHERE grupo = ?", (grupo,))
+            self._ensure_group(conn, grupo)
+
+    def load_group(self,
+                   grupo) -> dict:
+        if self.conn.execute("SELECT 1 FROM grupos WHERE nome = ?", (grupo,)).fetchone() is None:
+            raise KeyError(grupo)
+        rows = self.conn.execute("SELECT nome, dados FROM coristas WHERE grupo = ? ORDER BY pos", (grupo,))
+        return {nome: loads_text(dados) for nome, dados in rows}
+
+    def get_corista(self,
+                    grupo, nome):
+        row = self.conn.execute("SELECT dados FROM coristas WHERE grupo = ? AND nome = ?", (grupo, nome)).fetchone()
+        return loads_text(row[0]) if row else None
+
+    def get_base_ranges(self,
+                        grupo):
+        row = self.conn.execute("SELECT dados FROM ranges_base WHERE grupo = ?", (grupo,)).fetchone()
+        return loads_text(row[0]) if row else None
+
+    def save_base_ranges(self,
+                         grupo, ranges):
+        with self._tx() as conn:
+            if ranges:
+                conn.execute("INSERT INTO ranges_base (grupo, dados) VALUES (?, ?) "
+                             "ON CONFLICT (grupo) DO UPDATE SET dados = excluded.dados",
+                             (grupo, self._dumps(ranges)))
+            else:
+                conn.execute("DELETE FROM ranges_base WHERE grupo = ?", (grupo,))
+
+    def save_corista(self,
+                     grupo, nome, dados, replace=None):
+        with self._tx() as conn:
+            self._ensure_group(conn, grupo)
+            if replace and replace != nome:
+                if conn.execute("SELECT 1 FROM coristas WHERE grupo = ? AND nome = ?",
+                                (grupo, nome)).fetchone() is None:
+                    # como no JSON: o nome novo vai para o fim do grupo
+                    conn.execute("UPDATE coristas SET nome = ?, pos = ? WHERE grupo = ? AND nome = ?",
+                                 (nome, self._next_pos(conn, "coristas", "WHERE grupo = ?", (grupo,)),
+                                  grupo, replace))
+                else:
+                    conn.execute("DELETE FROM coristas WHERE grupo = ? AND nome = ?", (grupo, replace))
+
+                musicas = self._referencing_musics(conn, grupo, replace)
+                for music_name in rename_in_musics(musicas, grupo, replace, nome):
+                    self._update_music(conn, music_name, musicas[music_name])
+            self._upsert_corista(conn, grupo, nome, dados)
+
+    def save_group(self,
+                   grupo, coristas):
+        with self._tx() as conn:
+            self._ensure_group(conn, grupo)
+            conn.execute("DELETE FROM coristas WHERE grupo = ?", (grupo,))
+            conn.executemany(
+                "INSERT INTO coristas (grupo, nome, pos, dados) VALUES (?, ?, ?, ?)",
+                [(grupo, nome, i, self._dumps(dados)) for i, (nome, dados) in enumerate(coristas.items())])
+
+    def corista_references(self,
+                           grupo, nome) -> dict:
+        todas_vozes = corista_voices(self.get_corista(grupo, nome))
+        return corista_references(self._referencing_musics(self.conn, grupo, nome), grupo, nome, todas_vozes)
+
+    def musics_of_corista(self,
+                          grupo, nome) -> dict:
+        slots = {}
+        rows = self.conn.execute(
+            "SELECT r.musica, r.naipe FROM referencias r JOIN musicas m ON m.nome = r.musica "
+            "WHERE r.grupo = ? AND r.corista = ? ORDER BY m.pos", (grupo, nome))
+        for music_name, naipe in rows:
+            slots.setdefault(music_name, set()).add(naipe)
+        return slots
+
+    def _reference_rows(self) -> set:
+        return set(self.conn.execute("SELECT grupo, corista, musica, naipe FROM referencias"))
+
+    def remove_corista(self,
+                       grupo, nome):
+        with self._tx() as conn:
+            todas_vozes = corista_voices(self.get_corista(grupo, nome))
+            conn.execute("DELETE FROM coristas WHERE grupo = ? AND nome = ?", (grupo, nome))
+            musicas = self._referencing_musics(conn, grupo, nome)
+            for music_name in remove_from_musics(musicas, grupo, nome, todas_vozes):
+                self._update_music(conn, music_name, musicas[music_name])
+
+    # --- músicas ---
+    def list_musics(self,
+                    grupo=None) -> dict:
+        if grupo is None:
+            rows = self.conn.execute("SELECT nome, dados FROM musicas ORDER BY pos")
+        else:
+            rows = self.conn.execute("SELECT nome, dados FROM musicas WHERE grupo = ? ORDER BY pos", (grupo,))
+        return {nome: loads_text(dados) for nome, dados in rows}
+
+    def music_exists(self,
+                     name) -> bool:
+        return self.conn.execute("SELECT 1 FROM musicas WHERE nome = ?", (name,)).fetchone() is not None
+
+    def get_music(self,
+                  name):
+        row = self.conn.execute("SELECT dados FROM musicas WHERE nome = ?", (name,)).fetchone()
+        return loads_text(row[0]) if row else None
+
+    def save_music(self,
+                   name, musica):
+        with self._tx() as conn:
+            self._upsert_music(conn, name, musica)
+
+    def delete_music(self,
+                     name):
+        with self._tx() as conn:
+            conn.execute("DELETE FROM musicas WHERE nome = ?", (name,))
+            conn.execute("DELETE FROM referencias WHERE musica = ?", (name,))
+
+
+# ===== FRAGMENTADO POR GRUPO =====
+
+class ShardedStorage(StorageBackend):
+    """
+    Diretório com um catálogo pequeno e um arquivo JSON por grupo.
+
+    catalogo.json guarda a ordem dos grupos, o arquivo de cada grupo e em que
+    arquivo está cada música: {"grupos": {grupo: arquivo}, "musicas": {nome: arquivo}}.
+    O arquivo de um grupo tem o esquema do JSON único, só com os coristas e as
+    músicas daquele grupo; músicas sem grupo conhecido vão para _sem_grupo.json.
+
+    Cada arquivo é aberto como JsonStorage (com diário e índice reverso) só na
+    primeira vez que é usado, então trocar de grupo lê apenas o arquivo dele.
+    """
+
+    CATALOG_FILE = "catalogo.json"
+    UNGROUPED_FILE = "_sem_grupo.json"
+
+    def __init__(self,
+                 path):
+        super().__init__(path)
+        self.catalog_path = os.path.join(path, self.CATALOG_FILE)
+        self._catalog = None
+        self._catalog_stamp = None
+        self._catalog_dirty = False
+        self._shards = {}           # arquivo -> JsonStorage
+        self._batch_stack = None
+
+    # --- catálogo ---
+    def exists(self) -> bool:
+        return os.path.exists(self.catalog_path)
+
+    def _catalog_data(self) -> dict:
+        stamp = _JsonDocument._stat(self.catalog_path)
+        if self._catalog is None or (stamp != self._catalog_stamp and not self._catalog_dirty):
+            catalog = {"grupos": {}, "musicas": {}}
+            if stamp is not None:
+                catalog.update(load_file(self.catalog_path, get_serializer()))
+            self._catalog = catalog
+            self._catalog_stamp = stamp
+        return self._catalog
+
+    def _catalog_changed(self):
+        """Grava o catálogo (no fim do batch, se houver um em andamento)."""
+        self._catalog_dirty = True
+        if not self._batch_depth:
+            self._flush_catalog()
+
+    def _flush_catalog(self):
+        if self._catalog_dirty:
+            os.makedirs(self.path, exist_ok=True)
+            write_json_atomic(self.catalog_path, self._catalog)
+            self._catalog_dirty = False
+            self._catalog_stamp = _JsonDocument._stat(self.catalog_path)
+
+    def _shard(self,
+               filename) -> "JsonStorage":
+        shard = self._shards.get(filename)
+        if shard is None:
+            os.makedirs(self.path, exist_ok=True)
+            shard = JsonStorage(os.path.join(self.path, filename))
+            self._shards[filename] = shard
+        if self._batch_stack is not None and filename not in self._batch_shards:
+            self._batch_stack.enter_context(shard.batch())
+            self._batch_shards.add(filename)
+        return shard
+
+    def _group_file(self,
+                    grupo) -> str:
+        """Arquivo do grupo, criando a entrada no catálogo se preciso."""
+        catalog = self._catalog_data()
+        filename = catalog["grupos"].get(grupo)
+        if filename is not None:
+            return filename
+
+        slug = re.sub(r"[^\w-]+", "_", str(grupo)).strip("_") or "grupo"
+        used = set(catalog["grupos"].values()) | {self.UNGROUPED_FILE}
+        filename, n = f"{slug}.json", 2
+        while filename in used:
+            filename, n = f"{slug}_{n}.json", n + 1
+        catalog["grupos"][grupo] = filename
+        self._catalog_changed()
+
+        # músicas gravadas antes de o grupo existir passam para o arquivo dele
+        orphans = [m for m, f in catalog["musicas"].items() if f == self.UNGROUPED_FILE]
+        if orphans:
+            ungrouped = self._shard(self.UNGROUPED_FILE)
+            moved = ungrouped.list_musics(grupo)
+            for name, musica in moved.items():
+                self._shard(filename).save_music(name, musica)
+                ungrouped.delete_music(name)
+                catalog["musicas"][name] = filename
+        return filename
+
+    def _music_file(self,
+                    grupo) -> str:
+        return self._catalog_data()["grupos"].get(grupo, self.UNGROUPED_FILE)
+
+    @contextmanager
+    def batch(self):
+        """Agrupa as alterações: uma gravação por arquivo de grupo e uma do catálogo."""
+        outer = self._batch_depth == 0
+        if outer:
+            self._batch_stack = ExitStack()
+            self._batch_shards = set()
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            if outer:
+                stack, self._batch_stack = self._batch_stack, None
+                self._catalog = None
+                self._catalog_dirty = False
+                if not stack.__exit__(*sys.exc_info()):
+                    raise
+            else:
+                raise
+        self._batch_depth -= 1
+        if outer:
+            stack, self._batch_stack = self._batch_stack, None
+            stack.close()
+            self._flush_catalog()
+
+    def close(self):
+        for shard in self._shards.values():
+            shard.close()
+        self._shards.clear()
+
+    # --- documento inteiro ---
+    def load_all(self) -> dict:
+        catalog = self._catalog_data()
+        data = empty_data()
+        for grupo, filename in catalog["grupos"].items():
+            data["grupos"][grupo] = self._shard(filename).load_group(grupo)
+            ranges = self._shard(filename).get_base_ranges(grupo)
+            if ranges:
+                data.setdefault("ranges_base", {})[grupo] = ranges
+        data["musicas"] = self.list_musics()
+        return data
+
+    def replace_all(self,
+                    data: dict):
+        grupos = data.get("grupos", {})
+        musicas = data.get("musicas", {})
+        ranges_base = data.get("ranges_base") or {}
+        catalog = self._catalog_data()
+        old_files = set(catalog["grupos"].values()) | set(catalog["musicas"].values())
+        with self.batch():
+            self._catalog = {"grupos": {}, "musicas": {}}
+            self._catalog_changed()
+
+            shards = {}
+            for grupo, coristas in grupos.items():
+                shards[self._group_file(grupo)] = {"grupos": {grupo: coristas}, "musicas": {}}
+                if ranges_base.get(grupo):
+                    shards[self._group_file(grupo)]["ranges_base"] = {grupo: ranges_base[grupo]}
+            for name, musica in musicas.items():
+                filename = self._music_file(musica.get("grupo"))
+                shards.setdefault(filename, empty_data())["musicas"][name] = musica
+                self._catalog["musicas"][name] = filename
+            for filename, shard_data in shards.items():
+                self._shard(filename).replace_all(shard_data)
+
+        # arquivos de grupos que deixaram de existir
+        for filename in old_files - set(shards):
+            shard = self._shards.pop(filename, None)
+            if shard is not None:
+                shard.close()
+            for stale in (filename, filename + JOURNAL_SUFFIX):
+                stale_path = os.path.join(self.path, stale)
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+
+    # --- grupos e coristas ---
+    def list_groups(self) -> list:
+        return list(self._catalog_data()["grupos"])
+
+    def add_group(self,
+                  grupo):
+        self._shard(self._group_file(grupo)).add_group(grupo)
+
+    def load_group(self,
+                   grupo) -> dict:
+        filename = self._catalog_data()["grupos"].get(grupo)
+        if filename is None:
+            raise KeyError(grupo)
+        return self._shard(filename).load_group(grupo)
+
+    def get_corista(self,
+                    grupo, nome):
+        filename = self._catalog_data()["grupos"].get(grupo)
+        return self._shard(filename).get_corista(grupo, nome) if filename else None
+
+    def save_corista(self,
+                     grupo, nome, dados, replace=None):
+        self._shard(self._group_file(grupo)).save_corista(grupo, nome, dados, replace=replace)
+
+    def save_group(self,
+                   grupo, coristas):
+        self._shard(self._group_file(grupo)).save_group(grupo, coristas)
+
+    def get_base_ranges(self,
+                        grupo):
+        filename = self._catalog_data()["grupos"].get(grupo)
+        return self._shard(filename).get_base_ranges(grupo) if filename else None
+
+    def save_base_ranges(self,
+                         grupo, ranges):
+        self._shard(self._group_file(grupo)).save_base_ranges(grupo, ranges)
+
+    def corista_references(self,
+                           grupo, nome) -> dict:
+        return self._shard(self._music_file(grupo)).corista_references(grupo, nome)
+
+    def musics_of_corista(self,
+                          grupo, nome) -> dict:
+        return self._shard(self._music_file(grupo)).musics_of_corista(grupo, nome)
+
+    def _reference_rows(self) -> set:
+        files = set(self._catalog_data()["grupos"].values()) | set(self._catalog_data()["musicas"].values())
+        return set().union(*(self._shard(f)._reference_rows() for f in files))
+
+    def remove_corista(self,
+                       grupo, nome):
+        self._shard(self._group_file(grupo)).remove_corista(grupo, nome)
+
+    # --- músicas ---
+    def list_musics(self,
+                    grupo=None) -> dict:
+        catalog = self._catalog_data()
+        if grupo is None:
+            files = set(catalog["musicas"].values())
+        else:
+            files = {self._music_file(grupo)}
+        found = {}
+        for filename in files:
+            found.update(self._shard(filename).list_musics(grupo))
+        return {name: found[name] for name in catalog["musicas"] if name in found}
+
+    def music_exists(self,
+                     name) -> bool:
+        return name in self._catalog_data()["musicas"]
+
+    def get_music(self,
+                  name):
+        filename = self._catalog_data()["musicas"].get(name)
+        return self._shard(filename).get_music(name) if filename else None
+
+    def save_music(self,
+                   name, musica):
+        catalog = self._catalog_data()
+        filename = self._music_file(musica.get("grupo"))
+        old_file = catalog["musicas"].get(name)
+        with self.batch():
+            if old_file is not None and old_file != filename:
+                self._shard(old_file).delete_music(name)
+            self._shard(filename).save_music(name, musica)
+            if old_file != filename:
+                catalog["musicas"][name] = filename
+                self._catalog_changed()
+
+    def delete_music(self,
+                     name):
+        catalog = self._catalog_data()
+        filename = catalog["musicas"].pop(name, None)
+        if filename is not None:
+            with self.batch():
+                self._shard(filename).delete_music(name)
+                self._catalog_changed()
+
+
+# ===== ABERTURA E CONVERSÃO =====
+
+def open_storage(path) -> StorageBackend:
+    """Abre o armazenamento adequado ao caminho (diretório/.grupos, extensão do SQLite ou JSON)."""
+    path = str(path)
+    if os.path.isdir(path) or path.rstrip("/\\").lower().endswith(SHARDED_SUFFIX):
+        return ShardedStorage(path)
+    if os.path.splitext(path)[1].lower() in SQLITE_EXTENSIONS:
+        return SQLiteStorage(path)
+    return JsonStorage(path)
+
+
+def export_json(storage: StorageBackend, path):
+    """Grava todo o conteúdo do armazenamento num arquivo JSON (esquema atual)."""
+    write_json_atomic(path, storage.load_all())
+
+
+def import_json(storage: StorageBackend, path):
+    """Substitui o conteúdo do armazenamento pelo de um arquivo JSON ou msgpack (esquema atual)."""
+    storage.replace_all(load_file(path))
+
+
+def migrate_to_shards(source, target) -> dict:
+    """
+    Converte um arquivo único (JSON ou SQLite) num diretório fragmentado por grupo.
+
+    O arquivo de origem não é alterado; depois da conversão basta apontar
+    DATA_FILE para o diretório.
+
+    Returns:
+        Catálogo gravado ({"grupos": {grupo: arquivo}, "musicas": {nome: arquivo}})
+    """
+    if os.path.exists(os.path.join(target, ShardedStorage.CATALOG_FILE)):
+        raise FileExistsError(f"já existe um catálogo em {target}")
+    origem = open_storage(source)
+    destino = ShardedStorage(target)
+    try:
+        destino.replace_all(origem.load_all())
+        return json_copy(destino._catalog_data())
+    finally:
+        origem.close()
+        destino.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte os dados entre JSON, SQLite e diretório por grupo.")
+    parser.add_argument("acao", choices=["importar", "exportar", "fragmentar", "verificar"],
+                        help="importar: JSON -> banco; exportar: banco -> JSON; "
+                             "fragmentar: arquivo único -> um arquivo por grupo; "
+                             "verificar: confere o índice de referências dos coristas")
+    parser.add_argument("origem")
+    parser.add_argument("destino", nargs="?")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.origem):
+        parser.error(f"arquivo não encontrado: {args.origem}")
+    if args.acao != "verificar" and not args.destino:
+        parser.error("informe o destino")
+
+    if args.acao == "verificar":
+        storage = open_storage(args.origem)
+        try:
+            problems = storage.check_references()
+        finally:
+            storage.close()
+        for kind, label in (("missing", "faltando no índice"), ("stale", "sobrando no índice")):
+            for grupo, corista, musica, naipe in problems[kind]:
+                print(f"{label}: {grupo} / {corista} em {musica} ({naipe or 'solista'})")
+        ok = not problems["missing"] and not problems["stale"]
+        print("Índice consistente." if ok else "Índice inconsistente.")
+        return 0 if ok else 1
+
+    if args.acao == "fragmentar":
+        catalog = migrate_to_shards(args.origem, args.destino)
+        for grupo, filename in catalog["grupos"].items():
+            print(f"{grupo}: {filename}")
+    elif args.acao == "importar":
+        storage = open_storage(args.destino)
+        try:
+            import_json(storage, args.origem)
+        finally:
+            storage.close()
+    else:
+        storage = open_storage(args.origem)
+        try:
+            export_json(storage, args.destino)
+        finally:
+            storage.close()
+    print(f"{args.origem} -> {args.destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,7 @@ import time
 from collections import deque
 import math
 from Constants import NOTES_FREQUENCY_HZ, SEMITONE_TO_SHARP
-import pretty_midi
+from NoteMath import hz_to_midi, nearest_table_note
 import tkinter as tk
 import threading
 import json
@@ -411,16 +411,8 @@ class VocalTestCore:
         if frequency is None or frequency <= 0:
             return None, None
 
-        min_diff = float('inf')
-        closest_note = None
-
-        for note, freq in self.notes.items():
-            diff = abs(frequency - freq)
-            if diff < min_diff:
-                min_diff = diff
-                closest_note = note
-
-        return closest_note, min_diff
+        # Só compara os semitons vizinhos (mesmo resultado de percorrer a tabela toda)
+        return nearest_table_note(frequency, self.notes)
 
     def frequency_to_cents(self,
                            freq1, freq2):
@@ -491,8 +483,8 @@ class VocalTestCore:
 
             # Filtro 2: Variação >20 semitons
             if filtered:
-                prev_midi = pretty_midi.hz_to_note_number(filtered[-1]['freq'])
-                curr_midi = pretty_midi.hz_to_note_number(freq)
+                prev_midi = hz_to_midi(filtered[-1]['freq'])
+                curr_midi = hz_to_midi(freq)
                 if abs(curr_midi - prev_midi) > MAX_SEMITONE_JUMP:
                     continue
 
@@ -516,8 +508,8 @@ class VocalTestCore:
 
             # Se nota atual difere de ambos vizinhos iguais, é pico
             if prev_note == next_note and curr_note != prev_note:
-                prev_midi = pretty_midi.hz_to_note_number(filtered[i - 1]['freq'])
-                curr_midi = pretty_midi.hz_to_note_number(filtered[i]['freq'])
+                prev_midi = hz_to_midi(filtered[i - 1]['freq'])
+                curr_midi = hz_to_midi(filtered[i]['freq'])
 
                 # Apenas remove se for variação de 1 semitom
                 if abs(curr_midi - prev_midi) <= 1:
@@ -550,8 +542,8 @@ class VocalTestCore:
                 if i > 0:
                     prev_note = cleaned[i - 1]['note']
                     if prev_note != curr_note:
-                        prev_midi = pretty_midi.hz_to_note_number(cleaned[i - 1]['freq'])
-                        curr_midi = pretty_midi.hz_to_note_number(cleaned[i]['freq'])
+                        prev_midi = hz_to_midi(cleaned[i - 1]['freq'])
+                        curr_midi = hz_to_midi(cleaned[i]['freq'])
                         # Se é pico pequeno isolado, remove retrospectivamente
                         if abs(curr_midi - prev_midi) <= 3 and len(final) > 0:
                             final.pop()  # Remove o pico que já adicionamos
@@ -564,8 +556,8 @@ class VocalTestCore:
                 if j < len(cleaned):
                     next_note = cleaned[j]['note']
                     if next_note != curr_note:
-                        next_midi = pretty_midi.hz_to_note_number(cleaned[j]['freq'])
-                        curr_midi = pretty_midi.hz_to_note_number(cleaned[j - 1]['freq'])
+                        next_midi = hz_to_midi(cleaned[j]['freq'])
+                        curr_midi = hz_to_midi(cleaned[j - 1]['freq'])
                         # Se próxima é pico pequeno, pula ela
                         if abs(next_midi - curr_midi) <= 3:
                             i = j + 1
@@ -587,8 +579,8 @@ class VocalTestCore:
             time_diff = final[i]['time'] - smoothed[-1]['time']
 
             if time_diff < RAPID_CHANGE_TIME:
-                curr_midi = pretty_midi.hz_to_note_number(final[i]['freq'])
-                prev_midi = pretty_midi.hz_to_note_number(smoothed[-1]['freq'])
+                curr_midi = hz_to_midi(final[i]['freq'])
+                prev_midi = hz_to_midi(smoothed[-1]['freq'])
 
                 if abs(curr_midi - prev_midi) > RAPID_CHANGE_SEMITONES:
                     # Variação rápida detectada
@@ -616,7 +608,7 @@ class VocalTestCore:
                             'time': final[i]['time'],
                             'freq': smoothed[-1]['freq'],
                             'note': long_before,
-                            'pitch_midi': int(round(librosa.hz_to_midi(smoothed[-1]['freq'])))
+                            'pitch_midi': int(round(hz_to_midi(smoothed[-1]['freq'])))
                         })
                     elif long_after:
                         # Usa nota longa posterior
@@ -625,7 +617,7 @@ class VocalTestCore:
                         # Calcula média entre as duas
                         avg_freq = (smoothed[-1]['freq'] + final[i]['freq']) / 2.0
                         avg_note, _ = self.frequency_to_note(avg_freq)
-                        pitch_midi = int(round(librosa.hz_to_midi((avg_freq))))
+                        pitch_midi = int(round(hz_to_midi((avg_freq))))
                         smoothed.append({
                             'time': final[i]['time'],
                             'freq': avg_freq,
@@ -815,7 +807,7 @@ class VocalTestCore:
                         average_freq = np.mean(list(self.frequency_buffer))
                         average_note, _ = self.frequency_to_note(average_freq)
 
-                        self._update_ui(current_note=round(pretty_midi.hz_to_note_number(average_freq)))
+                        self._update_ui(current_note=round(hz_to_midi(average_freq)))
 
                         # Atualiza piano gamificado
                         if self.piano_window and self.piano_window.is_active:
@@ -957,7 +949,7 @@ class VocalTestCore:
                     if len(self.frequency_buffer) > 0:
                         average_freq = np.mean(list(self.frequency_buffer))
                         average_note, _ = self.frequency_to_note(average_freq)
-                        self._update_ui(current_note=round(pretty_midi.hz_to_note_number(average_freq)))
+                        self._update_ui(current_note=round(hz_to_midi(average_freq)))
 
                         # Atualiza piano gamificado (calibração grave)
                         if self.piano_window and self.piano_window.is_active:
@@ -1184,7 +1176,7 @@ class VocalTestCore:
                 t = time.time() - self._pitch_log_start_time
                 freq = float(kwargs['pitch_hz'])
                 note_tmp, _ = self.frequency_to_note(freq)
-                self._pitch_log.append({'time': t, 'freq': freq, 'note': note_tmp, 'pitch_midi': int(round(librosa.hz_to_midi(freq)))})
+                self._pitch_log.append({'time': t, 'freq': freq, 'note': note_tmp, 'pitch_midi': int(round(hz_to_midi(freq)))})
 
         # aplica wrapper
         self.on_update_ui = recording_update_ui
@@ -1420,7 +1412,7 @@ class VocalTestCore:
                         note_tmp, _ = self.frequency_to_note(detected_freq)
 
                         self._pitch_log.append({'time': t, 'freq': detected_freq, 'note': note_tmp,
-                                                'pitch_midi': int(round(librosa.hz_to_midi(detected_freq)))})
+                                                'pitch_midi': int(round(hz_to_midi(detected_freq)))})
 
                     # Novo: calcular offset em cents e enviar para a UI
                     detected_note_tmp, _ = self.frequency_to_note(detected_freq)
@@ -1623,7 +1615,7 @@ class VocalTestCore:
 
                         t = time.time() - self._pitch_log_start_time
                         note_tmp, _ = self.frequency_to_note(detected_freq)
-                        self._pitch_log.append({'time': t, 'freq': detected_freq, 'note': note_tmp, 'pitch_midi': int(round(librosa.hz_to_midi(detected_freq)))})
+                        self._pitch_log.append({'time': t, 'freq': detected_freq, 'note': note_tmp, 'pitch_midi': int(round(hz_to_midi(detected_freq)))})
 
                         # Atualiza UI com nota detectada
                         self._update_ui(
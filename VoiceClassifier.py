@@ -0,0 +1,239 @@
+"""
+VoiceClassifier - Classificação de vozes por range, memorizada por par (grave, agudo)
+Responsabilidades:
+- Classificar um range em vozes recomendadas e possíveis a partir das vozes base
+- Guardar o resultado de cada par MIDI numa tabela, calculado uma única vez
+- Uma tabela por conjunto de vozes base: se os ranges base mudarem, outra tabela é usada
+- Reclassificar muitos coristas de uma vez (uma consulta à tabela por corista)
+- Reclassificar um grupo inteiro a partir dos arrays do Roster (uma consulta por par distinto)
+
+O resultado só depende do par (min, max) em MIDI e dos ranges base, então a
+tabela vale para qualquer corista e qualquer grupo com as mesmas vozes base.
+"""
+import numpy as np
+from Constants import VOICES, VOICE_BASE_RANGES
+from NoteMath import note_to_midi
+
+# Tolerância (semitons) das vozes "possíveis"
+TOL = 5
+
+# Faixa de pares pré-calculados por fill() (E1 ... C7, com folga para qualquer voz)
+PLAUSIBLE_MIN = 28
+PLAUSIBLE_MAX = 96
+
+# Multiplicador que junta (grave, extensão) num inteiro em classify_arrays
+PAIR_STRIDE = 1024
+
+# Tabelas guardadas por get_classifier (conjuntos de vozes base diferentes)
+MAX_CLASSIFIERS = 8
+
+
+def _fit_score(container_min: int, container_max: int, item_min: int, item_max: int):
+    allowed_span = container_max - container_min
+    required_span = item_max - item_min
+    if required_span > allowed_span:
+        return None
+
+    d_min = item_min - container_min
+    d_max = container_max - item_max
+    m = (allowed_span - required_span) / 2.0
+
+    if m <= 0:
+        return 1.0 if (d_min == 0 and d_max == 0) else 0.0
+
+    score = 1.0 - (abs(d_min - m) + abs(d_max - m)) / (2.0 * m)
+    return max(0.0, min(1.0, float(score)))
+
+
+def classify(p_min: int, p_max: int, base: tuple) -> tuple:
+    """
+    Classifica um range (MIDI) contra as vozes base.
+
+    Args:
+        p_min, p_max: Range do corista em MIDI (grave <= agudo)
+        base: ((voz, v_min, v_max), ...) na ordem de VOICES
+
+    Returns:
+        (vozes_recomendadas, vozes_possiveis), tuplas; cada possível é (voz, score, obs)
+    """
+    order = {voice: i for i, (voice, _, _) in enumerate(base)}
+
+    def rank(x):
+        return -x[1], order.get(x[0], 9999)
+
+    p_min_exp = p_min - TOL
+    p_max_exp = p_max + TOL
+
+    rec_scored = []    # (voz, score, obs)
+    possA_scored = []  # (voz, score, obs)
+    fallback = []      # (voz, violação, obs)
+
+    for voice, v_min, v_max in base:
+        # 1) Recomendadas: VOZ dentro da PESSOA (exato)
+        is_rec = p_min <= v_min and p_max >= v_max
+        if is_rec:
+            score = _fit_score(p_min, p_max, v_min, v_max) or 0.0
+            obs = f"Folga pessoa: {v_min - p_min} st grave, {p_max - v_max} st agudo"
+            rec_scored.append((voice, score, obs))
+
+        # 2) Possíveis: VOZ dentro da PESSOA EXPANDIDA (±TOL)
+        if v_min >= p_min_exp and v_max <= p_max_exp and not is_rec:
+            missing_low = max(0, p_min - v_min)
+            missing_high = max(0, v_max - p_max)
+            max_missing = max(missing_low, missing_high)
+
+            base_score = _fit_score(p_min_exp, p_max_exp, v_min, v_max) or 0.0
+            penalty = max(0.0, 1.0 - (max_missing / float(TOL))) if TOL > 0 else 0.0
+            parts = []
+            if missing_low:
+                parts.append(f"falta {missing_low} st grave")
+            if missing_high:
+                parts.append(f"falta {missing_high} st agudo")
+            obs = "Quase alcança: " + (" e ".join(parts) if parts else "ok")
+            possA_scored.append((voice, base_score * penalty, obs))
+
+        # fallback (garantir 1 voz), contra VOZ expandida
+        out_low = max(0, (v_min - TOL) - p_min)
+        out_high = max(0, p_max - (v_max + TOL))
+        parts = []
+        if out_low:
+            parts.append(f"{out_low} st abaixo (mesmo com tolerância)")
+        if out_high:
+            parts.append(f"{out_high} st acima (mesmo com tolerância)")
+        obs = "Mais próxima (violação): " + (" e ".join(parts) if parts else "ok")
+        fallback.append((voice, max(out_low, out_high), obs))
+
+    if rec_scored:
+        rec_scored.sort(key=rank)
+        possA_scored.sort(key=rank)
+        return tuple(x[0] for x in rec_scored), tuple(possA_scored)
+
+    # 3) Sem recomendadas: pessoa dentro da VOZ expandida ±TOL
+    possB_scored = []
+    for voice, v_min, v_max in base:
+        v_min_exp = v_min - TOL
+        v_max_exp = v_max + TOL
+        if p_min >= v_min_exp and p_max <= v_max_exp:
+            overflow_low = max(0, v_min - p_min)
+            overflow_high = max(0, p_max - v_max)
+            max_over = max(overflow_low, overflow_high)
+
+            base_score = _fit_score(v_min_exp, v_max_exp, p_min, p_max) or 0.0
+            penalty = max(0.0, 1.0 - (max_over / float(TOL))) if TOL > 0 else 0.0
+            parts = []
+            if overflow_low:
+                parts.append(f"{overflow_low} st abaixo do mínimo real")
+            if overflow_high:
+                parts.append(f"{overflow_high} st acima do máximo real")
+            obs = "Pessoa dentro (com tolerância). " + (
+                "Excesso: " + " e ".join(parts) if parts else "Dentro do range real"
+            )
+            possB_scored.append((voice, base_score * penalty, obs))
+
+    if possB_scored:
+        possB_scored.sort(key=rank)
+        return (), tuple(possB_scored)
+
+    # 4) Garantia: pelo menos 1 voz (mais próxima)
+    fallback.sort(key=lambda x: (x[1], order.get(x[0], 9999)))
+    voice, violation, obs = fallback[0]
+    return (), ((voice, 1.0 / (1.0 + float(violation)), obs),)
+
+
+class VoiceClassifier:
+    """
+    Tabela {(min, max): classificação} para um conjunto de ranges base.
+
+    Cada par é calculado na primeira consulta (ou por fill()); as consultas
+    seguintes só copiam as listas guardadas.
+    """
+
+    def __init__(self,
+                 base_ranges=None):
+        base_ranges = base_ranges or VOICE_BASE_RANGES
+        self.base = tuple((voice, note_to_midi(base_ranges[voice][0]), note_to_midi(base_ranges[voice][1]))
+                          for voice in VOICES if voice in base_ranges)
+        self._table = {}
+
+    def lookup(self,
+               p_min: int, p_max: int) -> tuple:
+        """Classificação memorizada do par (ordem dos extremos indiferente)."""
+        if p_min > p_max:
+            p_min, p_max = p_max, p_min
+        key = (p_min, p_max)
+        entry = self._table.get(key)
+        if entry is None:
+            entry = self._table[key] = classify(p_min, p_max, self.base)
+        return entry
+
+    def compatible_voices(self,
+                          p_min: int, p_max: int, observations: bool = False) -> tuple:
+        """
+        Mesmo resultado de CoristasManager.calculate_compatible_voices, em MIDI.
+
+        Returns:
+            (vozes_recomendadas, vozes_possiveis) como listas novas; vozes_possiveis
+            traz (voz, score, obs) quando observations=True
+        """
+        recomendadas, possiveis = self.lookup(p_min, p_max)
+        if observations:
+            return list(recomendadas), list(possiveis)
+        return list(recomendadas), [x[0] for x in possiveis]
+
+    def classify_many(self,
+                      pairs, observations: bool = False) -> list:
+        """Classifica vários pares (min, max) de uma vez."""
+        return [self.compatible_voices(p_min, p_max, observations) for p_min, p_max in pairs]
+
+    def classify_arrays(self,
+                        mins, maxs, observations: bool = False) -> list:
+        """
+        Classifica arrays paralelos de ranges (ex.: Roster.mins/Roster.maxs).
+
+        Os pares repetidos são agrupados com numpy.unique, então a tabela é
+        consultada uma vez por par distinto, não uma vez por corista.
+
+        Returns:
+            [(vozes_recomendadas, vozes_possiveis), ...] na ordem dos arrays, com listas novas
+        """
+        mins = np.asarray(mins, dtype=np.int64)
+        maxs = np.asarray(maxs, dtype=np.int64)
+        lows = np.minimum(mins, maxs)
+        # um inteiro por par (grave, extensão), para agrupar num array 1-D
+        keys, inverse = np.unique(lows * PAIR_STRIDE + (np.maximum(mins, maxs) - lows), return_inverse=True)
+        entries = []
+        for key in keys.tolist():
+            p_min, span = divmod(key, PAIR_STRIDE)
+            recomendadas, possiveis = self.lookup(p_min, p_min + span)
+            entries.append((recomendadas, possiveis if observations else tuple(x[0] for x in possiveis)))
+        return [(list(entries[k][0]), list(entries[k][1])) for k in inverse.reshape(-1).tolist()]
+
+    def fill(self,
+             lo: int = PLAUSIBLE_MIN, hi: int = PLAUSIBLE_MAX):
+        """Pré-calcula todos os pares lo <= min <= max <= hi."""
+        for p_min in range(lo, hi + 1):
+            for p_max in range(p_min, hi + 1):
+                self.lookup(p_min, p_max)
+
+    def __len__(self):
+        return len(self._table)
+
+
+_classifiers = {}
+
+
+def get_classifier(base_ranges=None) -> VoiceClassifier:
+    """
+    Tabela compartilhada para os ranges base informados (padrão: VOICE_BASE_RANGES).
+
+    A chave é o conteúdo dos ranges, então alterar os ranges base (ou usar os de
+    outro grupo) passa a usar outra tabela, sem resultados antigos.
+    """
+    base_ranges = base_ranges or VOICE_BASE_RANGES
+    key = tuple((voice, tuple(base_ranges[voice])) for voice in VOICES if voice in base_ranges)
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        if len(_classifiers) >= MAX_CLASSIFIERS:
+            _classifiers.pop(next(iter(_classifiers)))
+        classifier = _classifiers[key] = VoiceClassifier(base_ranges)
+    return classifier
@@ -0,0 +1,230 @@
+"""
+Benchmark da análise de transposição com coros e repertórios sintéticos.
+
+Gera coristas com ranges realistas (sexo, vozes recomendadas/possíveis) e peças
+com 2 a 12 vozes (naipes + solistas), mede o tempo e o pico de memória de
+run_analysis, calculate_best_fit_voices, get_voice_group_ranges e
+calculate_compatible_voices e grava tudo num JSON de referência.
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_analysis.py --saida benchmarks/baseline.json
+    python benchmarks/bench_analysis.py --comparar benchmarks/baseline.json
+    python benchmarks/bench_analysis.py --rapido
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AnalysisManager import AnalysisManager
+from Constants import VOICES, VOICE_BASE_RANGES, FEMALE_VOICES
+from CoristasManager import CoristasManager
+from NoteMath import note_to_midi, midi_to_note
+
+ROSTER_SIZES = [10, 50, 200, 1000]
+PIECE_VOICES = [2, 4, 8, 12]
+QUICK_ROSTER_SIZES = [10, 50]
+QUICK_PIECE_VOICES = [2, 4]
+DEFAULT_REPEAT = 3
+REGRESSION_TOLERANCE = 0.20  # 20% mais lento que a referência = regressão
+
+
+# ===== DADOS SINTÉTICOS =====
+
+def synthetic_roster(size, seed=0):
+    """
+    Gera {nome: dados} no formato do JSON, com ranges em torno das vozes base.
+
+    Cada corista sorteia uma voz "natural" e estende/encolhe o range dela alguns
+    semitons; as vozes recomendadas e possíveis vêm de calculate_compatible_voices.
+    """
+    rng = random.Random(seed)
+    mgr = CoristasManager()
+    coristas = {}
+    for i in range(size):
+        voz = rng.choice(VOICES)
+        base_min, base_max = (note_to_midi(n) for n in VOICE_BASE_RANGES[voz])
+        p_min = base_min + rng.randint(-4, 4)
+        p_max = base_max + rng.randint(-4, 4)
+        if p_max - p_min < 10:
+            p_max = p_min + 10
+        range_min, range_max = midi_to_note(p_min), midi_to_note(p_max)
+
+        recomendadas, possiveis = mgr.calculate_compatible_voices(range_min, range_max)
+        calculada = recomendadas[0] if recomendadas else (possiveis[0] if possiveis else voz)
+        coristas[f"Corista {i:04d}"] = {
+            'range_min': range_min,
+            'range_max': range_max,
+            'sexo': 'F' if voz in FEMALE_VOICES else 'M',
+            'voz_calculada': calculada,
+            'voz_atribuida': calculada,
+            'vozes_recomendadas': recomendadas,
+            'vozes_possiveis': possiveis,
+        }
+    return coristas
+
+
+def synthetic_piece(n_voices, coristas, seed=0):
+    """
+    Gera (piece_ranges, solistas) com n_voices vozes no total.
+
+    Até 6 vozes vêm dos naipes; o restante são solistas sorteados entre os coristas.
+    """
+    rng = random.Random(seed)
+    n_naipes = min(len(VOICES), max(2, n_voices))
+    naipes = set(rng.sample(VOICES, n_naipes))
+
+    piece_ranges = {}
+    for v in VOICES:
+        if v not in naipes:
+            piece_ranges[v] = ('', '')
+            continue
+        base_min, base_max = (note_to_midi(n) for n in VOICE_BASE_RANGES[v])
+        lo = base_min + rng.randint(0, 4)
+        hi = max(lo + 7, base_max - rng.randint(0, 4))
+        piece_ranges[v] = (midi_to_note(lo), midi_to_note(hi))
+
+    solistas = {}
+    for nome in rng.sample(sorted(coristas), min(len(coristas), n_voices - n_naipes)):
+        p_min = note_to_midi(coristas[nome]['range_min'])
+        p_max = note_to_midi(coristas[nome]['range_max'])
+        lo = p_min + rng.randint(1, 4)
+        solistas[nome] = [midi_to_note(lo), midi_to_note(max(lo + 5, p_max - rng.randint(1, 4)))]
+
+    return piece_ranges, solistas
+
+
+# ===== MEDIÇÃO =====
+
+def measure(fn, repeat):
+    """Executa fn `repeat` vezes; retorna (menor tempo em s, pico de memória em bytes)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def bench_case(size, n_voices, repeat, confort=0.33):
+    coristas = synthetic_roster(size, seed=size)
+    piece_ranges, solistas = synthetic_piece(n_voices, coristas, seed=size * 100 + n_voices)
+
+    coristas_mgr = CoristasManager()
+    coristas_mgr.grupo = "Benchmark"
+    coristas_mgr.coristas = coristas
+    analysis_mgr = AnalysisManager(coristas_mgr)
+    analysis_mgr.set_solistas(solistas)
+    if solistas:
+        analysis_mgr.toggle_range_mode()  # solistas só entram com os ranges do grupo
+
+    def run_analysis():
+        analysis_mgr._formation_cache.clear()  # mede a análise completa, sem cache
+        analysis_mgr.run_analysis(piece_ranges, "C", "maior", None, confort)
+
+    def best_fit():
+        analysis_mgr.calculate_best_fit_voices(0)
+
+    def group_ranges():
+        coristas_mgr.get_voice_group_ranges(solistas=solistas or None)
+
+    sample = list(coristas.values())[:50]
+
+    def compatible():
+        for c in sample:
+            coristas_mgr.calculate_compatible_voices(c['range_min'], c['range_max'])
+
+    results = {}
+    run_analysis()  # aquece e define current_piece_ranges
+    for name, fn in (("run_analysis", run_analysis),
+                     ("calculate_best_fit_voices", best_fit),
+                     ("get_voice_group_ranges", group_ranges),
+                     ("calculate_compatible_voices", compatible)):
+        seconds, peak = measure(fn, repeat)
+        results[name] = {"seconds": seconds, "peak_bytes": peak}
+    return results
+
+
+def run_suite(sizes, voices, repeat):
+    cases = {}
+    for size in sizes:
+        for n_voices in voices:
+            key = f"coristas={size},vozes={n_voices}"
+            print(f"{key} ...", end=" ", flush=True)
+            cases[key] = bench_case(size, n_voices, repeat)
+            print(f"{cases[key]['run_analysis']['seconds'] * 1000:.1f} ms (run_analysis)")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "cases": cases,
+    }
+
+
+def compare(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Imprime a razão atual/referência por medida; retorna a lista de regressões."""
+    regressions = []
+    for case, stages in current["cases"].items():
+        ref_stages = baseline.get("cases", {}).get(case)
+        if not ref_stages:
+            continue
+        for stage, data in stages.items():
+            ref = ref_stages.get(stage)
+            if not ref or not ref["seconds"]:
+                continue
+            ratio = data["seconds"] / ref["seconds"]
+            mem_ratio = data["peak_bytes"] / ref["peak_bytes"] if ref["peak_bytes"] else 1.0
+            flag = ""
+            if ratio > 1.0 + tolerance:
+                flag = "  <-- regressão"
+                regressions.append((case, stage, ratio))
+            print(f"{case:<24} {stage:<28} tempo {ratio:5.2f}x  memória {mem_ratio:5.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da análise com coros sintéticos.")
+    parser.add_argument("--coristas", type=int, nargs="+", help="tamanhos de coro (padrão: %s)" % ROSTER_SIZES)
+    parser.add_argument("--vozes", type=int, nargs="+", help="vozes por peça (padrão: %s)" % PIECE_VOICES)
+    parser.add_argument("--repeticoes", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--rapido", action="store_true", help="só os casos pequenos")
+    parser.add_argument("--saida", help="grava o resultado neste JSON (referência)")
+    parser.add_argument("--comparar", help="compara com um JSON de referência gravado antes")
+    args = parser.parse_args(argv)
+
+    sizes = args.coristas or (QUICK_ROSTER_SIZES if args.rapido else ROSTER_SIZES)
+    voices = args.vozes or (QUICK_PIECE_VOICES if args.rapido else PIECE_VOICES)
+    result = run_suite(sizes, voices, args.repeticoes)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\nResultado gravado em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(result, baseline)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
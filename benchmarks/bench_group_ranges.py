@@ -0,0 +1,69 @@
+"""
+Ranges do grupo: tempo do índice incremental (GroupRanges) contra o recálculo completo.
+
+Mede, para coros de vários tamanhos, get_voice_group_ranges_full,
+get_voice_group_ranges e uma troca de voz atribuída. A equivalência das duas
+consultas é verificada em tests/test_CoristasManager.py.
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_group_ranges.py
+    python benchmarks/bench_group_ranges.py --coristas 100 1000 --repeticoes 500
+"""
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Constants import VOICES
+from CoristasManager import CoristasManager
+from bench_analysis import synthetic_roster
+
+ROSTER_SIZES = [10, 100, 1000, 5000]
+DEFAULT_REPEAT = 200
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_timings(sizes, repeat, workdir):
+    print(f"{'coristas':>9} {'completo':>12} {'incremental':>12} {'alteração':>12}")
+    for size in sizes:
+        mgr = CoristasManager(data_file=os.path.join(workdir, f"bench_{size}.json"), grupo="Benchmark")
+        mgr.storage.save_group(mgr.grupo, synthetic_roster(size, seed=size))
+        mgr.load_data()
+        nome = next(iter(mgr.coristas))
+        full = best_of(mgr.get_voice_group_ranges_full, max(1, repeat // 10))
+        incremental = best_of(mgr.get_voice_group_ranges, repeat)
+        voices = itertools.cycle(VOICES)
+        change = best_of(lambda: mgr.set_voz_atribuida(nome, next(voices)), repeat)
+        print(f"{size:>9} {full * 1000:>9.3f} ms {incremental * 1e6:>9.1f} us {change * 1e6:>9.1f} us")
+        mgr.storage.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ranges do grupo: incremental x recálculo completo.")
+    parser.add_argument("--coristas", type=int, nargs="+", help="tamanhos de coro (padrão: %s)" % ROSTER_SIZES)
+    parser.add_argument("--repeticoes", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_group_ranges_")
+    try:
+        run_timings(args.coristas or ROSTER_SIZES, args.repeticoes, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
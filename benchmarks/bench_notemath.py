@@ -0,0 +1,66 @@
+"""
+Micro-benchmark das conversões de NoteMath contra as chamadas escalares do librosa.
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_notemath.py [--repeticoes N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import librosa
+import numpy as np
+import NoteMath
+from Constants import NOTES_FREQUENCY_HZ
+
+
+def linear_frequency_to_note(frequency, notes):
+    """Busca linear original de VocalTestCore.frequency_to_note."""
+    min_diff = float('inf')
+    closest_note = None
+    for note, freq in notes.items():
+        diff = abs(frequency - freq)
+        if diff < min_diff:
+            min_diff = diff
+            closest_note = note
+    return closest_note, min_diff
+
+
+def bench(label, reference, candidate, number):
+    t_ref = min(timeit.repeat(reference, number=number, repeat=3)) / number
+    t_new = min(timeit.repeat(candidate, number=number, repeat=3)) / number
+    print(f"{label:<38} librosa/antigo {t_ref * 1e6:9.2f} µs   NoteMath {t_new * 1e6:9.2f} µs   "
+          f"{t_ref / t_new:7.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args(argv)
+    n = args.repeticoes
+
+    rng = random.Random(0)
+    notes = [NoteMath.midi_to_note(rng.randint(36, 84)) for _ in range(256)]
+    midis = [NoteMath.note_to_midi(x) for x in notes]
+    freqs = [rng.uniform(60.0, 1100.0) for _ in range(256)]
+    freqs_arr = np.array(freqs)
+
+    def loop(fn, values):
+        return lambda: [fn(v) for v in values]
+
+    print(f"{len(notes)} valores por chamada, média por lote\n")
+    bench("nota -> MIDI", loop(librosa.note_to_midi, notes), loop(NoteMath.note_to_midi, notes), n // 10)
+    bench("MIDI -> nota", loop(librosa.midi_to_note, midis), loop(NoteMath.midi_to_note, midis), n // 10)
+    bench("Hz -> MIDI (escalar)", loop(librosa.hz_to_midi, freqs), loop(NoteMath.hz_to_midi, freqs), n // 10)
+    bench("Hz -> MIDI (vetor)", lambda: librosa.hz_to_midi(freqs_arr), lambda: NoteMath.hz_to_midi(freqs_arr), n)
+    bench("frequência -> nota da tabela",
+          loop(lambda f: linear_frequency_to_note(f, NOTES_FREQUENCY_HZ), freqs),
+          loop(lambda f: NoteMath.nearest_table_note(f, NOTES_FREQUENCY_HZ), freqs), n // 10)
+
+
+if __name__ == "__main__":
+    main()
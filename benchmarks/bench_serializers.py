@@ -0,0 +1,198 @@
+"""
+Benchmark de carga e gravação dos dados com cada serializador disponível.
+
+Gera um arquivo sintético no esquema do JSON do projeto (padrão: 10.000 coristas
+em 10 grupos e 2.000 músicas) e mede, para json, orjson e msgpack:
+- dumps/loads em memória e o tamanho do arquivo;
+- abrir o JsonStorage a frio (snapshot) e listar os coristas de um grupo;
+- gravar o snapshot (o que a consolidação do diário faz);
+- carregar e salvar o DataStore (DataManager).
+
+Uso (na raiz do projeto):
+    python benchmarks/bench_serializers.py
+    python benchmarks/bench_serializers.py --coristas 1000 --musicas 200 --saida benchmarks/serializers.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Serializers
+from DataManager import DataStore
+from NoteMath import midi_to_note
+from StorageBackend import JsonStorage
+
+DEFAULT_SINGERS = 10000
+DEFAULT_MUSICS = 2000
+DEFAULT_GROUPS = 10
+DEFAULT_REPEAT = 3
+VOICE_NAMES = ("Soprano", "Mezzo-soprano", "Contralto", "Tenor", "Barítono", "Baixo")
+
+
+# ===== DADOS SINTÉTICOS =====
+
+def synthetic_data(n_singers, n_musics, n_groups=DEFAULT_GROUPS, seed=0):
+    """Documento {"grupos", "musicas"} com ranges, vozes, naipes e solistas sorteados."""
+    rng = random.Random(seed)
+    grupos = {f"Grupo {g:02d}": {} for g in range(n_groups)}
+    group_names = list(grupos)
+    for i in range(n_singers):
+        lo = rng.randint(40, 60)
+        hi = lo + rng.randint(12, 24)
+        voz = rng.choice(VOICE_NAMES)
+        grupos[group_names[i % n_groups]][f"Corista {i:05d}"] = {
+            "range_min": midi_to_note(lo),
+            "range_max": midi_to_note(hi),
+            "sexo": rng.choice("FM"),
+            "voz_calculada": voz,
+            "voz_atribuida": voz,
+            "vozes_recomendadas": rng.sample(VOICE_NAMES, 2),
+            "vozes_possiveis": rng.sample(VOICE_NAMES, 3),
+        }
+
+    musicas = {}
+    for i in range(n_musics):
+        grupo = rng.choice(group_names)
+        members = list(grupos[grupo])
+        naipes = rng.sample(VOICE_NAMES, rng.randint(2, 6))
+        ranges = {}
+        for v in VOICE_NAMES:
+            lo = rng.randint(45, 60)
+            ranges[v] = {"min": midi_to_note(lo), "max": midi_to_note(lo + 12)} if v in naipes else {"min": "", "max": ""}
+        musicas[f"Música {i:04d}"] = {
+            "root": rng.choice(("C", "D", "E", "F", "G", "A", "B")),
+            "mode": rng.choice(("maior", "menor")),
+            "grupo": grupo,
+            "ranges": ranges,
+            "solistas": {nome: [midi_to_note(55), midi_to_note(67)] for nome in rng.sample(members, 2)},
+            "voices": {v: rng.sample(members, 4) for v in naipes},
+            "timestamp": "2024-01-01 12:00:00",
+        }
+    return {"grupos": grupos, "musicas": musicas}
+
+
+def datastore_data(data):
+    """O mesmo conteúdo no esquema do DataStore (listas de coristas e músicas)."""
+    coristas = [dict(dados, nome=nome) for g in data["grupos"].values() for nome, dados in g.items()]
+    musicas = [dict(m, name=nome) for nome, m in data["musicas"].items()]
+    return {"coristas": coristas, "musicas": musicas}
+
+
+# ===== MEDIÇÃO =====
+
+def best_of(fn, repeat):
+    """Menor tempo (s) de `repeat` execuções de fn."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_format(name, data, store_data, workdir, repeat):
+    serializer = Serializers.get_serializer(name)
+    ext = ".msgpack" if serializer.binary else ".json"
+    results = {}
+
+    payload = serializer.dumps(data)
+    results["dumps"] = best_of(lambda: serializer.dumps(data), repeat)
+    results["loads"] = best_of(lambda: serializer.loads(payload), repeat)
+    results["bytes"] = len(payload)
+
+    # JsonStorage: o JSON padrão do módulo define o serializador do snapshot
+    Serializers.set_default_serializer(None if serializer.binary else name)
+    try:
+        path = os.path.join(workdir, f"storage_{name}{ext}")
+        Serializers.dump_file(path, data, serializer)
+        grupo = next(iter(data["grupos"]))
+
+        def cold_open():
+            JsonStorage._documents.pop(os.path.abspath(path), None)
+            JsonStorage(path).load_group(grupo)
+
+        results["storage_open"] = best_of(cold_open, repeat)
+        results["storage_snapshot"] = best_of(lambda: Serializers.dump_file(path, data, serializer), repeat)
+        JsonStorage._documents.pop(os.path.abspath(path), None)
+
+        store_path = os.path.join(workdir, f"store_{name}{ext}")
+        Serializers.dump_file(store_path, store_data, serializer)
+        results["datastore_load"] = best_of(lambda: DataStore(store_path, serializer), repeat)
+        store = DataStore(store_path, serializer)
+        results["datastore_save"] = best_of(store.save, repeat)
+    finally:
+        Serializers.set_default_serializer(None)
+    return results
+
+
+def run_suite(n_singers, n_musics, formats, repeat):
+    data = synthetic_data(n_singers, n_musics)
+    store_data = datastore_data(data)
+    workdir = tempfile.mkdtemp(prefix="bench_serializers_")
+    try:
+        cases = {}
+        for name in formats:
+            print(f"{name} ...", end=" ", flush=True)
+            cases[name] = bench_format(name, data, store_data, workdir, repeat)
+            print(f"carga {cases[name]['storage_open'] * 1000:.1f} ms, "
+                  f"gravação {cases[name]['storage_snapshot'] * 1000:.1f} ms, "
+                  f"{cases[name]['bytes'] / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "coristas": n_singers,
+            "musicas": n_musics,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "cases": cases,
+    }
+
+
+def print_table(result):
+    cases = result["cases"]
+    base = cases.get("json")
+    print(f"\n{'medida':<18}" + "".join(f"{name:>20}" for name in cases))
+    for measure in ("dumps", "loads", "storage_open", "storage_snapshot", "datastore_load", "datastore_save"):
+        row = f"{measure:<18}"
+        for name, data in cases.items():
+            cell = f"{data[measure] * 1000:.1f} ms"
+            if base and name != "json" and data[measure]:
+                cell += f" ({base[measure] / data[measure]:.1f}x)"
+            row += f"{cell:>20}"
+        print(row)
+    print(f"{'bytes':<18}" + "".join(f"{data['bytes']:>20}" for data in cases.values()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga/gravação por serializador.")
+    parser.add_argument("--coristas", type=int, default=DEFAULT_SINGERS)
+    parser.add_argument("--musicas", type=int, default=DEFAULT_MUSICS)
+    parser.add_argument("--formatos", nargs="+", help="padrão: todos os disponíveis (%s)" % Serializers.available())
+    parser.add_argument("--repeticoes", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--saida", help="grava o resultado neste JSON")
+    args = parser.parse_args(argv)
+
+    formats = args.formatos or Serializers.available()
+    result = run_suite(args.coristas, args.musicas, formats, args.repeticoes)
+    print_table(result)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\nResultado gravado em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Configuração comum dos testes (pytest, na raiz do projeto: python -m pytest tests).
+
+Os módulos do projeto ficam na raiz, então ela entra no sys.path. Os dados de
+exemplo (coristas_music_data.json) servem de caso real para as análises.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Constants import VOICES
+
+SAMPLE_DATA = os.path.join(ROOT, "coristas_music_data.json")
+
+
+def piece_ranges_of(musica) -> dict:
+    """Ranges da peça no formato de run_analysis: todas as vozes, ('', '') nas ausentes."""
+    ranges = musica.get("ranges", {})
+    return {v: (ranges.get(v, {}).get("min", ""), ranges.get(v, {}).get("max", "")) for v in VOICES}
+
+
+@pytest.fixture(scope="session")
+def sample_data():
+    with open(SAMPLE_DATA, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def sample_cases(sample_data):
+    """[(nome da música, coristas do grupo, ranges da peça, solistas, tom, modo), ...]"""
+    cases = []
+    for nome, musica in sample_data["musicas"].items():
+        grupo = musica.get("grupo") or "Grupo Vocal"
+        cases.append((nome, sample_data["grupos"].get(grupo, {}), piece_ranges_of(musica),
+                      musica.get("solistas") or {}, musica.get("root", "C"), musica.get("mode", "maior")))
+    return cases
+
+
+@pytest.fixture
+def make_analysis(tmp_path):
+    """Cria um AnalysisManager para um dicionário de coristas, com arquivos no tmp_path."""
+    from AnalysisCache import AnalysisCache
+    from AnalysisManager import AnalysisManager
+    from CoristasManager import CoristasManager
+
+    def make(coristas, search_mode="conforto"):
+        mgr = CoristasManager(data_file=str(tmp_path / "dados.json"))
+        mgr.coristas = coristas
+        analysis = AnalysisManager(mgr)
+        analysis.analysis_cache = AnalysisCache(str(tmp_path / "cache"))
+        analysis.search_mode = search_mode
+        return analysis
+
+    return make
@@ -0,0 +1,80 @@
+"""Testes dos motores de alocação: o fluxo deve dar o mesmo resultado que a DP (referência)."""
+import random
+
+import pytest
+
+from AllocationEngine import allocate_influents_dp, allocate_influents_flow
+
+
+def random_problem(rng, n, k_side, k_extra):
+    """
+    Problema indexado como o de calculate_best_fit_voices, com k_side vozes do
+    lado e k_extra vozes extras (como as de solista): poucos coristas cabem
+    nelas e ninguém tem recomendação para elas.
+    """
+    k = k_side + k_extra
+    allowed, rec_fit, utils = [], [], []
+    for _ in range(n):
+        if rng.random() < 0.15:
+            js, fit = list(range(k)), 0  # recomendado que não cabe: forçado em qualquer voz
+        else:
+            js = sorted(rng.sample(range(k_side), rng.randint(1, k_side)))
+            js += [j for j in range(k_side, k) if rng.random() < 0.2]
+            fit = 0
+            for j in js:
+                if j < k_side and rng.random() < 0.4:
+                    fit |= 1 << j
+        p_min = rng.randint(40, 60)
+        p_max = p_min + rng.randint(8, 24)
+        rec_count = bin(fit).count("1")
+        u = {}
+        for j in js:
+            label = 2 if (fit >> j) & 1 else rng.choice((0, 1))
+            spec = 1000 // max(1, rec_count) if label == 2 else 0
+            u[j] = (label, spec, (k - 1 - j) * p_max, j * -p_min)
+        allowed.append(js)
+        rec_fit.append(fit)
+        utils.append(u)
+    required_mask = 0
+    for fit in rec_fit:
+        required_mask |= fit
+    return allowed, rec_fit, utils, k, required_mask
+
+
+def objective(problem, choice):
+    """(cobertura, desequilíbrio, soma das utilidades) de uma escolha."""
+    allowed, rec_fit, utils, k, required_mask = problem
+    counts = [0] * k
+    covered = 0
+    totals = [0, 0, 0, 0]
+    for i, j in enumerate(choice):
+        assert j in allowed[i]
+        counts[j] += 1
+        if (rec_fit[i] >> j) & 1:
+            covered |= 1 << j
+        totals = [t + u for t, u in zip(totals, utils[i][j])]
+    imbalance = max(counts) - min(counts) if k > 1 else 0
+    return bin(covered & required_mask).count("1"), imbalance, tuple(totals)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_flow_matches_dp_on_random_rosters(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        problem = random_problem(rng, rng.randint(0, 8), rng.randint(1, 3), rng.randint(0, 3))
+        flow = allocate_influents_flow(*problem)
+        dp = allocate_influents_dp(*problem)
+        cover_flow, imbalance_flow, utils_flow = objective(problem, flow)
+        cover_dp, imbalance_dp, utils_dp = objective(problem, dp)
+        assert cover_flow == cover_dp
+        assert imbalance_flow == imbalance_dp
+        assert utils_flow == utils_dp
+        assert flow == dp  # mesmo desempate
+
+
+def test_flow_handles_large_roster():
+    rng = random.Random(0)
+    problem = random_problem(rng, 300, 3, 8)
+    choice = allocate_influents_flow(*problem)
+    assert len(choice) == 300
+    assert all(j in allowed for j, allowed in zip(choice, problem[0]))
@@ -0,0 +1,96 @@
+"""Testes do AnalysisManager: formações por classe de T, T inválidos e modos de busca."""
+import random
+
+import pytest
+
+from Constants import VOICES
+from NoteMath import midi_to_note
+
+CONFORTS = (0.0, 0.33, 1.0)
+
+
+def invalid_by_formation(formations) -> set:
+    """Definição de T inválido: algum corista está no best_fit e no not_fit."""
+    return {T for T in range(-11, 12)
+            if not formations["best_fit"][T].names().isdisjoint(formations["not_fit"][T])}
+
+
+def random_coristas(rng, n):
+    """Coristas com ranges sorteados; alguns sem sexo, sem range ou sem recomendadas."""
+    coristas = {}
+    for i in range(n):
+        lo = rng.randint(40, 62)
+        hi = lo + rng.randint(10, 26)
+        dados = {"range_min": midi_to_note(lo), "range_max": midi_to_note(hi)}
+        recomendadas = rng.sample(VOICES, rng.randint(1, 2)) if rng.random() < 0.5 else []
+        dados.update(vozes_recomendadas=recomendadas, vozes_possiveis=rng.sample(VOICES, rng.randint(0, 3)))
+        sexo = rng.choice(("F", "M", None))
+        if sexo:
+            dados["sexo"] = sexo
+        if rng.random() < 0.01:
+            dados["range_min"] = dados["range_max"] = ""
+        coristas[f"Corista {i}"] = dados
+    return coristas
+
+
+@pytest.mark.parametrize("use_group_ranges", (False, True))
+def test_shared_formations_match_direct_calculation(make_analysis, sample_cases, use_group_ranges):
+    """compute_formations (uma alocação por T mod 12) contra calculate_best_fit_voices em cada T."""
+    for nome, coristas, piece_ranges, solistas, root, mode in sample_cases:
+        analysis = make_analysis(coristas)
+        analysis.set_solistas(solistas)
+        if use_group_ranges:
+            analysis.toggle_range_mode()
+        analysis.run_analysis(piece_ranges, root, mode, None, 0.33)
+        shared = analysis.analysis_all
+        ranges = analysis.current_piece_ranges  # os mesmos ranges usados pela análise
+
+        direct = make_analysis(coristas)
+        direct.current_piece_ranges = ranges
+        for T in range(-11, 12):
+            best_fit, not_fit, possible_fit = direct.calculate_best_fit_voices(T)
+            assert shared["best_fit"][T] == best_fit, (nome, T)
+            assert shared["possible_fit"][T] == possible_fit, (nome, T)
+            assert shared["not_fit"][T] == not_fit, (nome, T)
+
+
+@pytest.mark.parametrize("confort", CONFORTS)
+@pytest.mark.parametrize("use_group_ranges", (False, True))
+def test_joint_and_comfort_modes_report_same_invalid_Ts(make_analysis, sample_cases, confort, use_group_ranges):
+    for nome, coristas, piece_ranges, solistas, root, mode in sample_cases:
+        results = {}
+        for search_mode in ("conforto", "conjunta"):
+            analysis = make_analysis(coristas, search_mode)
+            analysis.set_solistas(solistas)
+            if use_group_ranges:
+                analysis.toggle_range_mode()
+            analysis.run_analysis(piece_ranges, root, mode, None, confort)
+            results[search_mode] = analysis.analysis_all
+
+        conforto, conjunta = results["conforto"], results["conjunta"]
+        assert conjunta["invalid_Ts"] == conforto["invalid_Ts"], nome
+        assert conjunta["debug"] == conforto["debug"], nome
+        assert not set(conjunta["debug"]) & set(conjunta["invalid_Ts"]), nome
+
+
+def test_invalid_transpositions_match_formations_on_sample_data(make_analysis, sample_cases):
+    for nome, coristas, piece_ranges, solistas, root, mode in sample_cases:
+        analysis = make_analysis(coristas)
+        formations = analysis.compute_formations(piece_ranges)
+        assert (analysis.invalid_transpositions(piece_ranges, formations["fit_masks"])
+                == invalid_by_formation(formations)), nome
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_invalid_transpositions_match_formations_on_random_rosters(make_analysis, seed):
+    rng = random.Random(seed)
+    analysis = make_analysis({})
+    analysis.coristas_mgr.coristas = random_coristas(rng, rng.randint(1, 12))
+    piece_ranges = {v: ("", "") for v in VOICES}
+    for v in rng.sample(VOICES, rng.randint(1, 4)):
+        lo = rng.randint(45, 62)
+        piece_ranges[v] = (midi_to_note(lo), midi_to_note(lo + rng.randint(8, 18)))
+
+    formations = analysis.compute_formations(piece_ranges)
+    assert (analysis.invalid_transpositions(piece_ranges, formations["fit_masks"])
+            == invalid_by_formation(formations))
@@ -0,0 +1,30 @@
+"""Testes da importação de coristas por planilha (CLI do CoristasImport)."""
+import json
+
+import CoristasImport
+
+
+def write_csv(path):
+    path.write_text("nome;min;max;sexo\nAna;C4;A5;F\nBeto;C3;X9;M\n", encoding="utf-8")
+    return str(path)
+
+
+def test_dry_run_on_missing_group_does_not_touch_storage(tmp_path, capsys):
+    planilha = write_csv(tmp_path / "coristas.csv")
+    dados = tmp_path / "dados.json"
+
+    status = CoristasImport.main([planilha, "--grupo", "Novo", "--dados", str(dados), "--simular"])
+
+    assert status == 1  # a linha do Beto tem nota inválida
+    assert "Simulação: 1 novo(s), 1 com erro" in capsys.readouterr().out
+    assert not dados.exists()
+
+
+def test_import_creates_group(tmp_path):
+    planilha = write_csv(tmp_path / "coristas.csv")
+    dados = tmp_path / "dados.json"
+
+    CoristasImport.main([planilha, "--grupo", "Novo", "--dados", str(dados)])
+
+    grupos = json.loads(dados.read_text(encoding="utf-8"))["grupos"]
+    assert list(grupos["Novo"]) == ["Ana"]
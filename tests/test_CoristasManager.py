@@ -0,0 +1,107 @@
+"""
+Testes do CoristasManager: ranges do grupo mantidos incrementalmente (GroupRanges).
+
+Aplica sequências aleatórias de alterações (incluir, remover, editar/renomear,
+trocar voz atribuída, reclassificar pelos ranges base, trocar o dicionário
+inteiro) e, após cada uma, confere que get_voice_group_ranges devolve o mesmo
+que get_voice_group_ranges_full, na interseção estrita e nos modos de cobertura.
+"""
+import random
+
+import pytest
+
+import CoristasManager as coristas_module
+from Constants import VOICES, VOICE_BASE_RANGES
+from CoristasManager import CoristasManager
+from NoteMath import note_to_midi, midi_to_note
+
+COVERAGES = (1.0, 0.9, 0.8, 0.5)
+STEPS = 150
+
+
+def random_corista(rng, mgr):
+    """Dados de um corista com range sorteado, classificado pelos ranges base do grupo."""
+    lo = rng.randint(38, 64)
+    hi = lo + rng.randint(-2, 26)  # às vezes invertido
+    range_min, range_max = midi_to_note(lo), midi_to_note(hi)
+    recomendadas, possiveis = mgr.calculate_compatible_voices(range_min, range_max)
+    return {
+        'range_min': range_min,
+        'range_max': range_max,
+        'voz_calculada': recomendadas[0] if recomendadas else possiveis[0],
+        'voz_atribuida': rng.choice(VOICES),
+        'vozes_recomendadas': recomendadas,
+        'vozes_possiveis': possiveis,
+    }
+
+
+def random_base_ranges(rng):
+    ranges = {}
+    for voz in rng.sample(VOICES, rng.randint(1, 3)):
+        lo, hi = (note_to_midi(n) for n in VOICE_BASE_RANGES[voz])
+        lo += rng.randint(-3, 3)
+        hi += rng.randint(-3, 3)
+        ranges[voz] = (midi_to_note(lo), midi_to_note(max(lo, hi)))
+    return ranges
+
+
+def apply_random_change(mgr, rng, counter):
+    """Aplica uma alteração aleatória; retorna (operação, contador de nomes)."""
+    names = list(mgr.coristas)
+    op = rng.choice(("incluir", "incluir", "remover", "editar", "renomear", "voz", "voz",
+                     "grupo", "ranges_base", "trocar_dict"))
+    if op == "incluir" or not names:
+        counter += 1
+        nome = f"Novo {counter}"
+        mgr.coristas[nome] = random_corista(rng, mgr)
+        mgr.save_corista(nome)
+    elif op == "remover":
+        mgr.remove_corista(rng.choice(names))
+    elif op == "editar":
+        nome = rng.choice(names)
+        dados = random_corista(rng, mgr)
+        dados['voz_atribuida'] = mgr.coristas[nome]['voz_atribuida']
+        mgr.coristas[nome] = dados
+        mgr.save_corista(nome)
+    elif op == "renomear":
+        # como o diálogo de edição: tira o nome antigo e grava com replace
+        nome = rng.choice(names)
+        counter += 1
+        novo = f"Renomeado {counter}"
+        mgr.coristas[novo] = mgr.coristas.pop(nome)
+        mgr.save_corista(novo, replace=nome)
+    elif op == "voz":
+        mgr.set_voz_atribuida(rng.choice(names), rng.choice(VOICES))
+    elif op == "grupo":
+        # alterações em bloco direto no dicionário, gravadas com save_corista()
+        for nome in rng.sample(names, min(len(names), 5)):
+            mgr.coristas[nome]['voz_atribuida'] = rng.choice(VOICES)
+        mgr.save_corista()
+    elif op == "ranges_base":
+        mgr.set_base_ranges(random_base_ranges(rng) if rng.random() < 0.7 else None)
+    elif op == "trocar_dict":
+        mgr.coristas = {n: dict(d) for n, d in mgr.coristas.items()}
+    return op, counter
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_group_ranges_match_full_recompute(tmp_path, monkeypatch, seed):
+    monkeypatch.setattr(coristas_module.messagebox, "askyesno", lambda *args, **kwargs: True)
+    rng = random.Random(seed)
+    mgr = CoristasManager(data_file=str(tmp_path / "dados.json"), grupo="Verificação")
+    mgr.storage.save_group(mgr.grupo, {f"Corista {i}": random_corista(rng, mgr)
+                                       for i in range(rng.randint(0, 40))})
+    mgr.load_data()
+
+    counter = len(mgr.coristas)
+    try:
+        for step in range(STEPS):
+            op, counter = apply_random_change(mgr, rng, counter)
+            solistas = {n: (mgr.coristas[n]['range_min'], mgr.coristas[n]['range_max'])
+                        for n in rng.sample(list(mgr.coristas), min(2, len(mgr.coristas)))}
+            for args in ((), (solistas,)):
+                for coverage in COVERAGES:
+                    assert (mgr.get_voice_group_ranges(*args, coverage=coverage)
+                            == mgr.get_voice_group_ranges_full(*args, coverage=coverage)), (step, op, coverage)
+    finally:
+        mgr.storage.close()
@@ -0,0 +1,60 @@
+"""Testes do DataStore: índices por nome e gravação em lote."""
+from DataManager import DataStore
+
+
+class CountingStore(DataStore):
+    """DataStore que conta as normalizações de nome (cada uma é um item visitado)."""
+    normalized = 0
+
+    @staticmethod
+    def _normalize(name) -> str:
+        CountingStore.normalized += 1
+        return DataStore._normalize(name)
+
+
+def test_batch_of_new_names_does_not_rescan(tmp_path):
+    store = CountingStore(str(tmp_path / "musicas.json"))
+    CountingStore.normalized = 0
+    n = 5000
+    with store.batch():
+        store.add_or_update_musics({"name": f"Música {i}"} for i in range(n))
+    # índice mantido: poucas normalizações por inclusão, e não uma varredura da lista
+    assert CountingStore.normalized < 5 * n
+    assert len(store.get_musicas()) == n
+    assert store.find_music_by_name("música 4321") == {"name": "Música 4321"}
+
+    reloaded = DataStore(str(tmp_path / "musicas.json"))
+    assert reloaded.get_music_names() == [f"Música {i}" for i in range(n)]
+
+
+def test_updates_existing_music_by_name(tmp_path):
+    store = DataStore(str(tmp_path / "musicas.json"))
+    store.add_or_update_musics([{"name": "Ave Maria"}, {"name": "Sanctus"}])
+    store.add_or_update_music({"name": "SANCTUS", "root": "D"})
+    assert store.get_musicas() == [{"name": "Ave Maria"}, {"name": "SANCTUS", "root": "D"}]
+
+
+def test_direct_list_edits(tmp_path):
+    store = DataStore(str(tmp_path / "musicas.json"))
+    store.add_or_update_musics([{"name": "Ave Maria"}, {"name": "Gloria"}])
+
+    # inclusão e remoção por fora mudam o tamanho da lista: detectadas na consulta
+    store.get_musicas().insert(0, {"name": "Kyrie"})
+    assert store.find_music_by_name("gloria") == {"name": "Gloria"}
+    assert store.find_music_by_name("kyrie") == {"name": "Kyrie"}
+    store.get_musicas().pop(0)
+    assert store.find_music_by_name("kyrie") is None
+
+    # renomear direto no item pede reindex()
+    store.get_musicas()[1]["name"] = "Sanctus"
+    assert store.find_music_by_name("gloria") is None
+    store.reindex()
+    store.add_or_update_music({"name": "Sanctus", "root": "C"})
+    assert store.get_musicas() == [{"name": "Ave Maria"}, {"name": "Sanctus", "root": "C"}]
+
+
+def test_remove_musics_removes_first_occurrence(tmp_path):
+    store = DataStore(str(tmp_path / "musicas.json"))
+    store.get_musicas().extend([{"name": "Ave Maria", "v": 1}, {"name": "Gloria"}, {"name": "Ave Maria", "v": 2}])
+    assert store.remove_musics(["ave maria", "nada"]) == 1
+    assert store.get_musicas() == [{"name": "Gloria"}, {"name": "Ave Maria", "v": 2}]
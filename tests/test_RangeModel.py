@@ -0,0 +1,28 @@
+"""Testes do RangeModel: formações imutáveis."""
+import pickle
+
+from RangeModel import Formation
+
+
+def test_reordered_formations_are_equal_and_hash_alike():
+    a = Formation({"Soprano": ["Ana", "Bia"], "Tenor": ["Caio"]})
+    b = Formation({"Tenor": ("Caio",), "Soprano": ("Ana", "Bia")})
+    assert a == b
+    assert hash(a) == hash(b)
+
+    shared = {}
+    assert shared.setdefault(a, a) is a
+    assert shared.setdefault(b, b) is a  # compute_formations passa a reutilizar a mesma instância
+
+
+def test_formation_differs_by_member_order_and_voice():
+    a = Formation({"Soprano": ["Ana", "Bia"]})
+    assert a != Formation({"Soprano": ["Bia", "Ana"]})
+    assert a != Formation({"Contralto": ["Ana", "Bia"]})
+    assert a == {"Soprano": ("Ana", "Bia")}
+
+
+def test_formation_pickles():
+    a = Formation({"Soprano": ["Ana"], "Tenor": []})
+    b = pickle.loads(pickle.dumps(a))
+    assert b == a and hash(b) == hash(a)